@@ -1,3 +1,15 @@
-from guarddog.scanners.npm_package_scanner import NPMPackageScanner  # NOQA
-from guarddog.scanners.pypi_package_scanner import PypiPackageScanner  # NOQA
-from guarddog.scanners.go_package_scanner import GoModuleScanner  # NOQA
+import importlib
+
+# Scanners are imported on first access, so that importing a guarddog module
+# does not import every scanner and the dependencies of every ecosystem
+_SCANNERS = {
+    "NPMPackageScanner": "guarddog.scanners.npm_package_scanner",
+    "PypiPackageScanner": "guarddog.scanners.pypi_package_scanner",
+    "GoModuleScanner": "guarddog.scanners.go_package_scanner",
+}
+
+
+def __getattr__(name: str):
+    if name in _SCANNERS:
+        return getattr(importlib.import_module(_SCANNERS[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,28 +1,95 @@
+import hashlib
 import logging
 import os
+import threading
+import time
 import yara  # type: ignore
 
-from collections import defaultdict
-from fnmatch import fnmatch
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
 from pathlib import Path
-from typing import Optional, Dict, List
+from typing import Callable, Iterator, Optional, Dict, List, Tuple
 
+from guarddog.analyzer.chunked_match import match_in_windows
 from guarddog.analyzer.metadata import get_metadata_detectors
-from guarddog.analyzer.sourcecode import get_sourcecode_rules, YaraRule
+from guarddog.analyzer.metadata.utils import get_domain_cache
+from guarddog.analyzer.comments import CommentIndex, index_comments
+from guarddog.analyzer.file_manifest import (
+    FileBuffer,
+    FileEntry,
+    build_file_manifest,
+    map_file,
+)
+from guarddog.analyzer.finding_cache import FindingCache
+from guarddog.analyzer.hash_reputation import (
+    KNOWN_MALICIOUS_FILE_RULE,
+    HashReputationIndex,
+    Reputation,
+)
+from guarddog.analyzer.profiling import ScanProfile
+from guarddog.analyzer.rule_metadata import (
+    get_metadata_risk_metadata,
+    get_pending_finding,
+    get_sourcecode_risk_metadata,
+    plan_rule_batches,
+)
+from guarddog.analyzer.rule_scope import RuleScopeIndex, rule_applies
+from guarddog.analyzer.scan_baseline import (
+    ScanBaseline,
+    finding_path,
+    package_root,
+    relative_to_root,
+)
+from guarddog.analyzer.sourcecode import (
+    get_sourcecode_rules,
+    HashRule,
+    SourceCodeRule,
+    YaraRule,
+)
+from guarddog.analyzer.yara_rules import (  # noqa: F401
+    SOURCECODE_RULES_PATH,
+    compile_rules,
+    get_ruleset_fingerprint,
+)
 from guarddog.analyzer.risk_engine import (
     Finding,
-    Level,
+    IncrementalRiskScorer,
+    RiskLabel,
     form_risks_from_findings,
     calculate_risk_score,
-    validate_identifies,
-    validate_mitre_tactics,
 )
-from guarddog.utils.config import YARA_EXT_EXCLUDE
+from guarddog.utils.line_index import LineIndex
+from guarddog.utils.config import (
+    FINDING_CACHE,
+    FINDING_CACHE_LOCATION,
+    FINDING_CACHE_MAX_SIZE,
+    HASH_REPUTATION_INDEX,
+    PARALLELISM,
+    YARA_CHUNK_OVERLAP,
+    YARA_CHUNK_SIZE,
+    YARA_MAX_FILE_SIZE,
+    YARA_PARALLEL_SCAN,
+    YARA_SCAN_TIMEOUT,
+)
 from guarddog.ecosystems import ECOSYSTEM, LANGUAGE
 
-SOURCECODE_RULES_PATH = os.path.join(os.path.dirname(__file__), "sourcecode")
 log = logging.getLogger("guarddog")
 
+# Maximum number of threads libyara allows to scan with the same ruleset
+YARA_MAX_SCAN_THREADS = 32
+
+# Bytes of code kept on each side of a match when extracting its snippet,
+# snippets are trimmed to a few hundred characters in the report anyway
+SNIPPET_MAX_CONTEXT = 2048
+
+
+def _merge_results(results: dict, batch_results: dict) -> None:
+    """Adds the results of a batch of rules to the results of a scan"""
+    results["results"] |= batch_results["results"]
+    results["errors"] |= batch_results["errors"]
+    results["issues"] += batch_results["issues"]
+
 
 class Analyzer:
     """
@@ -37,6 +104,24 @@ class Analyzer:
         exclude (list): list of directories to exclude from source code search
 
         metadata_detectors(list): list of metadata detectors
+
+        compiled_rules(dict): compiled YARA ruleset for each rule selection
+        parallel_scan(bool): match the files of a package with a pool of threads
+        scan_workers(int): number of threads used by parallel scans
+        chunk_size(int): size above which files are matched in overlapping windows
+        chunk_overlap(int): number of bytes shared by consecutive windows
+        scan_timeout(int): YARA timeout of each window, in seconds
+        max_file_size(int): size above which files are not matched
+        profile_rules(bool): report the match time and hits of each rule
+        finding_cache(FindingCache): raw matches of the files already matched,
+            by content hash, None when disabled
+        ruleset_fingerprints(dict): fingerprint of each rule selection
+        hash_index(HashReputationIndex): known benign and malicious files by
+            hash, None when no index was built
+        record_manifest(bool): add the hash of each file to the source code
+            results, so that the next version can be scanned incrementally
+        stop_at(RiskLabel): skip the remaining rules as soon as whether the
+            package reaches this risk label is decided, None to run every rule
     """
 
     def __init__(self, ecosystem=ECOSYSTEM.PYPI) -> None:
@@ -49,6 +134,51 @@ class Analyzer:
         self.yara_ruleset: set[str] = set(
             r.id for r in get_sourcecode_rules(ecosystem, YaraRule)
         )
+        self.hash_ruleset: set[str] = set(
+            r.id for r in get_sourcecode_rules(ecosystem, HashRule)
+        )
+
+        # Known benign and known malicious files are recognized by their hash
+        # before YARA runs. The index is mapped here, before scans are sandboxed
+        self.hash_index: Optional[HashReputationIndex] = None
+        if os.path.exists(HASH_REPUTATION_INDEX):
+            try:
+                self.hash_index = HashReputationIndex(HASH_REPUTATION_INDEX)
+            except (OSError, ValueError) as e:
+                log.warning(f"Unable to load the hash reputation index: {e}")
+
+        # Compiled YARA rulesets, memoized per rule selection
+        self.compiled_rules: dict[frozenset[str], yara.Rules] = {}
+        self._compiled_rules_lock = threading.Lock()
+
+        # Files of a package are matched in parallel when enabled. libyara
+        # refuses to run more than 32 concurrent scans on the same ruleset
+        self.parallel_scan = YARA_PARALLEL_SCAN
+        self.scan_workers = max(1, min(PARALLELISM, YARA_MAX_SCAN_THREADS))
+        self._scan_pool: Optional[ThreadPoolExecutor] = None
+
+        # Very large files are matched in windows, files over the hard cap are
+        # skipped and reported
+        self.chunk_size = YARA_CHUNK_SIZE
+        self.chunk_overlap = YARA_CHUNK_OVERLAP
+        self.scan_timeout = YARA_SCAN_TIMEOUT
+        self.max_file_size = YARA_MAX_FILE_SIZE
+
+        # Each file is also matched against every rule in scope on its own to
+        # attribute match time to rules, which makes profiled scans slower
+        self.profile_rules = False
+
+        # Files shared by many packages are matched once, their matches are then
+        # read back from the cache. Profiled scans always match every file
+        self.finding_cache: Optional[FindingCache] = None
+        if FINDING_CACHE:
+            self.finding_cache = FindingCache(
+                os.path.join(FINDING_CACHE_LOCATION, "findings.db"),
+                FINDING_CACHE_MAX_SIZE,
+            )
+        self.ruleset_fingerprints: dict[frozenset[str], str] = {}
+        self.record_manifest = False
+        self.stop_at: Optional[RiskLabel] = None
 
         # Define paths to exclude from sourcecode analysis
         self.exclude = [
@@ -92,6 +222,7 @@ class Analyzer:
         byte_offset: Optional[int] = None,
         line_number: Optional[int] = None,
         context_window: int = 4096,
+        content: Optional[FileBuffer] = None,
     ) -> bool:
         """
         Check if a position is within a multi-line comment block.
@@ -103,25 +234,33 @@ class Analyzer:
             byte_offset: Optional byte offset - if not provided, calculated from line_number
             line_number: Optional line number - used to calculate byte_offset if not provided
             context_window: Number of bytes to read before the match (default 4KB)
+            content: Optional buffer of the whole file to avoid re-reading it
         """
         try:
             # Calculate byte offset from line number if not provided
             if byte_offset is None:
                 if line_number is None:
                     return False
-                with open(file_path, "r", errors="ignore") as f:
-                    lines_before = [next(f) for _ in range(line_number - 1)]
-                    byte_offset = sum(
-                        len(line.encode("utf-8")) for line in lines_before
-                    )
+                if content is not None:
+                    byte_offset = 0
+                    for _ in range(line_number - 1):
+                        byte_offset = content.find(b"\n", byte_offset) + 1
+                else:
+                    with open(file_path, "r", errors="ignore") as f:
+                        lines_before = [next(f) for _ in range(line_number - 1)]
+                        byte_offset = sum(
+                            len(line.encode("utf-8")) for line in lines_before
+                        )
 
             # Read only a window of context before the match
             start_pos = max(0, byte_offset - context_window)
-            with open(file_path, "rb") as f:
-                f.seek(start_pos)
-                window = f.read(byte_offset - start_pos).decode(
-                    "utf-8", errors="ignore"
-                )
+            if content is not None:
+                window_bytes = content[start_pos:byte_offset]
+            else:
+                with open(file_path, "rb") as f:
+                    f.seek(start_pos)
+                    window_bytes = f.read(byte_offset - start_pos)
+            window = window_bytes.decode("utf-8", errors="ignore")
 
             if language in [LANGUAGE.JAVASCRIPT, LANGUAGE.TYPESCRIPT, LANGUAGE.GO]:
                 # Search backwards for first /* or */
@@ -152,6 +291,8 @@ class Analyzer:
         line_number: int,
         byte_offset: Optional[int] = None,
         line_content: Optional[str] = None,
+        content: Optional[FileBuffer] = None,
+        line_index: Optional[LineIndex] = None,
     ) -> bool:
         """
         Check if a match at a given line is within a comment.
@@ -161,6 +302,8 @@ class Analyzer:
             line_number: Line number (1-indexed) of the match
             byte_offset: Optional byte offset for multi-line comment detection optimization
             line_content: Optional pre-extracted line content to avoid re-reading file
+            content: Optional buffer of the whole file to avoid re-reading it
+            line_index: Optional newline index of the buffer, to locate the line
 
         Returns:
             True if the match is in a comment, False otherwise
@@ -171,7 +314,14 @@ class Analyzer:
 
         try:
             # Get line content if not provided
-            if line_content is None:
+            if line_content is None and content is not None and line_index is not None:
+                line_start = line_index.line_start(line_number)
+                if line_start is None:
+                    return False
+                line_content = content[
+                    line_start : line_index.line_end(line_number)
+                ].decode("utf-8", errors="ignore")
+            elif line_content is None:
                 with open(file_path, "r", errors="ignore") as f:
                     for current_line_num, line in enumerate(f, start=1):
                         if current_line_num == line_number:
@@ -199,7 +349,11 @@ class Analyzer:
 
             # Check multi-line comments (byte_offset will be calculated inside if needed)
             return Analyzer._is_in_multiline_comment(
-                file_path, language, byte_offset=byte_offset, line_number=line_number
+                file_path,
+                language,
+                byte_offset=byte_offset,
+                line_number=line_number,
+                content=content,
             )
 
         except Exception:
@@ -215,24 +369,30 @@ class Analyzer:
         findings by (rule, location), since the risk engine drops that detail and
         the reporter uses it to emphasize the flagged span within the snippet.
         """
+        # Only the matches of the threats that formed risks are looked up
+        threat_locations = {
+            (risk.threat_finding.rule_name, risk.threat_finding.location or "")
+            for risk in risk_objects
+        }
+        results = (sourcecode_results or {}).get("results", {})
         matches_by_rule_location: Dict[tuple, str] = {}
-        for rule_name, rule_matches in (
-            (sourcecode_results or {}).get("results", {}).items()
-        ):
+        for rule_name in {rule_name for rule_name, _ in threat_locations}:
+            rule_matches = results.get(rule_name)
             if not isinstance(rule_matches, list):
                 continue
             for match in rule_matches:
-                if isinstance(match, dict) and match.get("location"):
-                    matches_by_rule_location[(rule_name, match["location"])] = (
-                        match.get("match", "")
-                    )
+                if not isinstance(match, dict) or not match.get("location"):
+                    continue
+                key = (rule_name, match["location"])
+                if key in threat_locations:
+                    matches_by_rule_location[key] = match.get("match", "")
 
         return [
             {
                 "name": risk.name,
                 "category": risk.category,
                 "severity": risk.severity.value,
-                "mitre_tactics": risk.mitre_tactics,
+                "mitre_tactics": list(risk.mitre_tactics),
                 "threat_identifies": risk.threat_finding.identifies,
                 "threat_rule": risk.threat_finding.rule_name,
                 "threat_description": risk.threat_finding.message or "",
@@ -264,6 +424,8 @@ class Analyzer:
         rules=None,
         name: Optional[str] = None,
         version: Optional[str] = None,
+        manifest: Optional[List[FileEntry]] = None,
+        baseline: Optional[ScanBaseline] = None,
     ) -> dict:
         """
         Analyzes a package in the given path
@@ -272,6 +434,11 @@ class Analyzer:
             path (str): path to package
             info (dict, optional): Any package information to analyze metadata. Defaults to None.
             rules (set, optional): Set of rules to analyze. Defaults to all rules.
+            manifest (list, optional): Files of an archive read in memory, analyzed
+                instead of the files under path.
+            baseline (ScanBaseline, optional): Files and findings of a previously
+                scanned version, only files changed since are analyzed by the
+                source code rules
 
         Raises:
             Exception: "{rule} is not a valid rule."
@@ -279,13 +446,21 @@ class Analyzer:
         Returns:
             dict[str]: map from each rule and their corresponding output, including risk score
         """
+        if self.stop_at is not None:
+            return self.analyze_until_verdict(
+                path, info, rules, name, version, manifest=manifest
+            )
 
         metadata_results = None
         sourcecode_results = None
 
         # populate results, errors, and number of issues
-        metadata_results = self.analyze_metadata(path, info, rules, name, version)
-        sourcecode_results = self.analyze_sourcecode(path, rules)
+        metadata_results = self.analyze_metadata(
+            path, info, rules, name, version, manifest=manifest
+        )
+        sourcecode_results = self.analyze_sourcecode(
+            path, rules, manifest=manifest, baseline=baseline
+        )
 
         # Concatenate dictionaries together
         issues = metadata_results["issues"] + sourcecode_results["issues"]
@@ -301,7 +476,7 @@ class Analyzer:
         risk_objects = risk_score.pop("_risks", [])
         formatted_risks = self.format_risks(risk_objects, sourcecode_results)
 
-        return {
+        output = {
             "issues": issues,
             "errors": errors,
             "results": results,
@@ -309,6 +484,124 @@ class Analyzer:
             "risk_score": risk_score,
             "risks": formatted_risks,  # Top-level only, not inside risk_score
         }
+        for key in ("profile", "file_manifest"):
+            if key in sourcecode_results:
+                output[key] = sourcecode_results[key]
+        return output
+
+    def analyze_until_verdict(
+        self,
+        path,
+        info=None,
+        rules=None,
+        name: Optional[str] = None,
+        version: Optional[str] = None,
+        manifest: Optional[List[FileEntry]] = None,
+        metadata_results: Optional[dict] = None,
+    ) -> dict:
+        """
+        Analyzes a package until whether it reaches the stop_at risk label
+        (high_risk when unset) is decided
+
+        Rules run in a few batches, by decreasing expected value per cost. The risk
+        score is updated after each batch, and the remaining rules are skipped as
+        soon as their findings can't change the verdict.
+
+        Args:
+            path (str): path to package
+            info (dict, optional): package information, metadata rules don't run without it
+            rules (set, optional): Set of rules to analyze. Defaults to all rules.
+            manifest (list, optional): Files of an archive read in memory, analyzed
+                instead of the files under path.
+            metadata_results (dict, optional): results of the metadata rules when
+                they already ran, e.g. before the scan was sandboxed
+
+        Returns:
+            dict[str]: same as analyze, with "partial" set and the "skipped_rules"
+                listed when rules were skipped
+        """
+        stop_at = self.stop_at or RiskLabel.HIGH_RISK
+        sourcecode_rules = self.yara_ruleset | self.hash_ruleset
+        metadata_rules = self.metadata_ruleset
+        if rules is not None:
+            sourcecode_rules = sourcecode_rules & rules
+            metadata_rules = metadata_rules & rules
+        elif self.hash_index is None:
+            # Without an index, the hash rules can't report anything
+            sourcecode_rules = sourcecode_rules - self.hash_ruleset
+        if info is None or metadata_results is not None:
+            metadata_rules = set()
+
+        sourcecode_manifest = manifest
+        if sourcecode_manifest is None:
+            sourcecode_manifest = build_file_manifest(path)
+
+        scorer = IncrementalRiskScorer()
+        if metadata_results is None:
+            metadata_results = {"results": {}, "errors": {}, "issues": 0}
+        else:
+            scorer.add_all(self._convert_metadata_to_findings(metadata_results))
+        sourcecode_results: dict = {"results": {}, "errors": {}, "issues": 0}
+
+        risk_metadata = get_sourcecode_risk_metadata(
+            self.ecosystem
+        ) | get_metadata_risk_metadata(self.ecosystem)
+        pending = {
+            rule_name: get_pending_finding(rule_name, risk_metadata[rule_name])
+            for rule_name in sourcecode_rules | metadata_rules
+            if rule_name in risk_metadata
+        }
+
+        batches = plan_rule_batches(self.ecosystem, metadata_rules, sourcecode_rules)
+        skipped_rules: set[str] = set()
+        for i, (batch_metadata_rules, batch_sourcecode_rules) in enumerate(batches):
+            reached = scorer.reaches(stop_at, list(pending.values()))
+            if reached is not None:
+                for metadata_batch, sourcecode_batch in batches[i:]:
+                    skipped_rules |= metadata_batch | sourcecode_batch
+                log.debug(
+                    f"Risk verdict decided ({'reaches' if reached else 'below'} "
+                    f"{stop_at.value}), skipping {len(skipped_rules)} rule(s)"
+                )
+                break
+
+            if batch_metadata_rules:
+                batch_results = self.analyze_metadata(
+                    path,
+                    info,
+                    batch_metadata_rules,
+                    name,
+                    version,
+                    manifest=manifest,
+                )
+                _merge_results(metadata_results, batch_results)
+                scorer.add_all(self._convert_metadata_to_findings(batch_results))
+            if batch_sourcecode_rules:
+                batch_results = self.analyze_sourcecode(
+                    path, batch_sourcecode_rules, manifest=sourcecode_manifest
+                )
+                _merge_results(sourcecode_results, batch_results)
+                scorer.add_all(self._convert_to_findings(batch_results["results"]))
+
+            for rule_name in batch_metadata_rules | batch_sourcecode_rules:
+                pending.pop(rule_name, None)
+
+        risk_score = self.calculate_package_risk_score(
+            sourcecode_results, metadata_results
+        )
+        risk_objects = risk_score.pop("_risks", [])
+        output = {
+            "issues": metadata_results["issues"] + sourcecode_results["issues"],
+            "errors": metadata_results["errors"] | sourcecode_results["errors"],
+            "results": metadata_results["results"] | sourcecode_results["results"],
+            "path": path,
+            "risk_score": risk_score,
+            "risks": self.format_risks(risk_objects, sourcecode_results),
+        }
+        if skipped_rules:
+            output["partial"] = True
+            output["skipped_rules"] = sorted(skipped_rules)
+        return output
 
     def analyze_metadata(
         self,
@@ -317,6 +610,7 @@ class Analyzer:
         rules=None,
         name: Optional[str] = None,
         version: Optional[str] = None,
+        manifest: Optional[List[FileEntry]] = None,
     ) -> dict:
         """
         Analyzes the metadata of a given package
@@ -325,6 +619,8 @@ class Analyzer:
             path (str): path to package
             info (dict): package information given by PyPI Json API
             rules (set, optional): Set of metadata rules to analyze. Defaults to all rules.
+            manifest (list, optional): Files of an archive read in memory, passed to
+                the detectors instead of path.
 
         Returns:
             dict[str]: map from each metadata rule and their corresponding output
@@ -346,9 +642,13 @@ class Analyzer:
         for rule in all_rules:
             try:
                 log.debug(f"Running rule {rule} against package '{name}'")
-                rule_matches, message = self.metadata_detectors[rule].detect(
-                    info, path, name, version
-                )
+                detector = self.metadata_detectors[rule]
+                if manifest is not None:
+                    rule_matches, message = detector.detect_in_manifest(
+                        info, manifest, name, version
+                    )
+                else:
+                    rule_matches, message = detector.detect(info, path, name, version)
                 results[rule] = None
                 if rule_matches:
                     issues += 1
@@ -358,26 +658,536 @@ class Analyzer:
 
         return {"results": results, "errors": errors, "issues": issues}
 
-    def analyze_sourcecode(self, path, rules=None) -> dict:
+    def analyze_sourcecode(
+        self,
+        path,
+        rules=None,
+        manifest: Optional[List[FileEntry]] = None,
+        baseline: Optional[ScanBaseline] = None,
+    ) -> dict:
         """
         Analyzes the source code of a given package
 
         Args:
             path (str): path to directory of package
             rules (set, optional): Set of source code rules to analyze. Defaults to all rules.
+            manifest (list, optional): Files of an archive read in memory, analyzed
+                instead of the files under path.
+            baseline (ScanBaseline, optional): Files and findings of a previously
+                scanned version. Only the files added or modified since are
+                analyzed, the findings of unchanged files are carried over.
 
         Returns:
             dict[str]: map from each source code rule and their corresponding output
         """
-        return self.analyze_yara(path, rules)
+        if self.hash_index is None and baseline is None and not self.record_manifest:
+            output = self.analyze_yara(path, rules, manifest=manifest)
+            output["errors"] |= self._missing_hash_index_errors(rules)
+            return output
+
+        if manifest is None:
+            manifest = build_file_manifest(path)
+
+        ruleset = self.get_sourcecode_fingerprint(rules)
+        root = package_root(entry.relpath for entry in manifest)
+        unchanged_files: set[str] = set()
+        if baseline is not None:
+            if baseline.ruleset == ruleset:
+                unchanged_files = {
+                    entry.relpath
+                    for entry in manifest
+                    if baseline.files.get(relative_to_root(entry.relpath, root))
+                    == self._file_digest(entry)
+                }
+                log.debug(
+                    f"{len(manifest) - len(unchanged_files)} of {len(manifest)} "
+                    "files added or modified since the baseline"
+                )
+            else:
+                log.warning(
+                    "The baseline was scanned with different source code rules, "
+                    "analyzing every file"
+                )
+        changed_manifest = [
+            entry for entry in manifest if entry.relpath not in unchanged_files
+        ]
+
+        # Files known to the hash reputation index are not matched by YARA
+        known_files: set[str] = set()
+        hash_results: Optional[dict] = None
+        if self.hash_index is not None:
+            hash_results = self.analyze_hashes(changed_manifest, rules)
+            known_files = hash_results.pop("known_files")
+
+        output = self.analyze_yara(
+            path,
+            rules,
+            manifest=[
+                entry for entry in changed_manifest if entry.relpath not in known_files
+            ],
+        )
+        if hash_results is not None:
+            output |= {
+                "results": output["results"] | hash_results["results"],
+                "errors": output["errors"] | hash_results["errors"],
+                "issues": output["issues"] + hash_results["issues"],
+            }
+        else:
+            output["errors"] |= self._missing_hash_index_errors(rules)
+
+        if baseline is not None and unchanged_files:
+            self._merge_baseline_findings(
+                output, baseline, unchanged_files, manifest, root
+            )
+
+        if baseline is not None or self.record_manifest:
+            output["file_manifest"] = {
+                "ruleset": ruleset,
+                "root": root,
+                "files": {
+                    relative_to_root(entry.relpath, root): self._file_digest(entry)
+                    for entry in manifest
+                },
+            }
+        return output
+
+    def _merge_baseline_findings(
+        self,
+        output: dict,
+        baseline: ScanBaseline,
+        unchanged_files: set[str],
+        manifest: List[FileEntry],
+        root: str = "",
+    ) -> None:
+        """
+        Adds the findings of the baseline in unchanged files to the results, moved
+        under the top directory of the scanned version
+
+        Findings are ordered as if every file had been analyzed, in manifest
+        order, and are limited to the max_hits of their rule again. Rules that
+        reached max_hits in the baseline may report fewer findings than a full
+        analysis when findings are removed from modified files.
+        """
+        file_order = {entry.relpath: i for i, entry in enumerate(manifest)}
+        sourcecode_rules = {
+            rule.id: rule
+            for rule in get_sourcecode_rules(self.ecosystem)
+            if rule.id in output["results"]
+        }
+
+        unchanged_relpaths = {
+            relative_to_root(relpath, root) for relpath in unchanged_files
+        }
+        for rule_name, findings in baseline.findings_in(
+            unchanged_relpaths, root
+        ).items():
+            if rule_name not in sourcecode_rules or not findings:
+                continue
+            merged = findings + list(output["results"][rule_name] or [])
+            merged.sort(key=lambda f: file_order.get(finding_path(f), len(file_order)))
+
+            max_hits = sourcecode_rules[rule_name].max_hits
+            if max_hits is not None:
+                merged = merged[:max_hits]
+
+            output["issues"] += len(merged) - len(output["results"][rule_name] or [])
+            output["results"][rule_name] = merged
+
+    def _missing_hash_index_errors(self, rules=None) -> dict:
+        """
+        Reports the known-malicious-file rule as not run when it was selected
+        explicitly but there is no hash reputation index to look files up in
+        """
+        if rules is None or KNOWN_MALICIOUS_FILE_RULE not in rules:
+            return {}
+        return {
+            KNOWN_MALICIOUS_FILE_RULE: (
+                f"no hash reputation index at {HASH_REPUTATION_INDEX}, "
+                "build one with `guarddog hash-index build`"
+            )
+        }
+
+    def get_sourcecode_fingerprint(self, rules=None) -> str:
+        """
+        Returns the fingerprint of the source code rules of a rule selection,
+        under which file manifests are recorded
+        """
+        yara_rules = self.yara_ruleset if rules is None else self.yara_ruleset & rules
+        hash_rules = self.hash_ruleset if rules is None else self.hash_ruleset & rules
+        digest = hashlib.sha256(self.get_ruleset_fingerprint(yara_rules).encode())
+        for rule_name in sorted(hash_rules):
+            digest.update(rule_name.encode())
+        return digest.hexdigest()
+
+    def analyze_hashes(self, manifest: List[FileEntry], rules=None) -> dict:
+        """
+        Looks the files of a package up in the hash reputation index
+
+        Args:
+            manifest (list): files of the package
+            rules (set, optional): Set of source code rules to analyze. Defaults to all rules.
 
-    def analyze_yara(self, path: str, rules: Optional[set] = None) -> dict:
+        Returns:
+            dict[str]: results of the hash rules, along with the known_files
+                YARA does not need to match: benign files, and malicious files
+                already reported
+        """
+        all_rules = self.hash_ruleset
+        if rules is not None:
+            all_rules = self.hash_ruleset & rules
+
+        results = {rule: {} for rule in all_rules}  # type: dict
+        errors: Dict[str, str] = {}
+        issues = 0
+        known_files: set[str] = set()
+
+        if self.hash_index is None:
+            return {
+                "results": results,
+                "errors": errors,
+                "issues": issues,
+                "known_files": known_files,
+            }
+
+        findings = []
+        for entry in manifest:
+            try:
+                digest = self._file_digest(entry)
+            except OSError as e:
+                # Unreadable files are reported when YARA fails to match them
+                log.debug(f"Unable to hash {entry.relpath}: {e}")
+                continue
+
+            reputation = self.hash_index.lookup(bytes.fromhex(digest))
+            if reputation == Reputation.BENIGN:
+                known_files.add(entry.relpath)
+            elif (
+                reputation == Reputation.MALICIOUS
+                and KNOWN_MALICIOUS_FILE_RULE in all_rules
+            ):
+                known_files.add(entry.relpath)
+                findings.append(
+                    {
+                        "location": f"{entry.relpath}:1",
+                        "code": "",
+                        "match": "",
+                        "message": (
+                            "File identical to a file of a known malicious "
+                            f"package (sha256 {digest})"
+                        ),
+                    }
+                )
+
+        if findings:
+            results[KNOWN_MALICIOUS_FILE_RULE] = findings
+            issues += len(findings)
+
+        log.debug(
+            f"{len(known_files)} of {len(manifest)} files found in the hash "
+            f"reputation index, {len(findings)} known malicious"
+        )
+        return {
+            "results": results,
+            "errors": errors,
+            "issues": issues,
+            "known_files": known_files,
+        }
+
+    def load_caches(self, rules: Optional[set] = None) -> None:
+        """
+        Loads what the scan reads from guarddog's caches, before it is sandboxed
+
+        The sandbox grants no access to the caches, which a compromised scan
+        could otherwise poison for the following scans: the compiled YARA
+        ruleset of the scan is loaded now, and the finding and domain caches
+        are opened read-only. The hash reputation index is already mapped.
+
+        Args:
+            rules (set, optional): rules of the scan. Defaults to all rules.
+        """
+        yara_rules = self.yara_ruleset if rules is None else self.yara_ruleset & rules
+        if yara_rules:
+            try:
+                self.get_compiled_rules(yara_rules)
+            except Exception as e:
+                # Reported by the scan, which compiles the rules again
+                log.debug(f"Unable to load the compiled YARA rules: {e}")
+
+        if self.finding_cache is not None:
+            self.finding_cache.open(read_only=True)
+        domain_cache = get_domain_cache()
+        if domain_cache is not None:
+            domain_cache.open(read_only=True)
+
+    def get_compiled_rules(self, rule_names: set[str]) -> yara.Rules:
+        """
+        Returns the compiled YARA ruleset for a selection of rules
+
+        The ruleset is compiled (or loaded from the on-disk cache) the first
+        time a selection is requested and reused for every following package.
+
+        Args:
+            rule_names (set): ids of the YARA rules to compile
+
+        Returns:
+            yara.Rules: compiled ruleset, with one namespace per rule
+        """
+        key = frozenset(rule_names)
+        with self._compiled_rules_lock:
+            if key not in self.compiled_rules:
+                self.compiled_rules[key] = compile_rules(key)
+            return self.compiled_rules[key]
+
+    def get_ruleset_fingerprint(self, rule_names: set[str]) -> str:
+        """
+        Returns the fingerprint of a rule selection, which keys the finding cache
+        """
+        key = frozenset(rule_names)
+        with self._compiled_rules_lock:
+            if key not in self.ruleset_fingerprints:
+                self.ruleset_fingerprints[key] = get_ruleset_fingerprint(key)
+            return self.ruleset_fingerprints[key]
+
+    def _get_scan_pool(self) -> ThreadPoolExecutor:
+        """
+        Returns the worker pool used to match the files of a package in parallel
+        """
+        with self._compiled_rules_lock:
+            if self._scan_pool is None:
+                log.debug(
+                    f"Matching files using {self.scan_workers} parallel worker threads"
+                )
+                self._scan_pool = ThreadPoolExecutor(
+                    max_workers=self.scan_workers, thread_name_prefix="guarddog-yara"
+                )
+            return self._scan_pool
+
+    def _match_manifest(
+        self,
+        compiled_rules: yara.Rules,
+        manifest: List[FileEntry],
+        rules_in_scope: Callable[[FileEntry], set[str]],
+        timed_out_files: Optional[List[str]] = None,
+        profile: Optional[ScanProfile] = None,
+        ruleset_fingerprint: Optional[str] = None,
+    ) -> Iterator[Tuple[FileEntry, set[str], list, Optional[Exception]]]:
+        """
+        Matches the files of a manifest against the compiled ruleset
+
+        Files are yielded in manifest order whether they are matched sequentially
+        or, when parallel scanning is enabled, by a pool of worker threads
+        (yara-python releases the GIL while matching). Results are therefore
+        merged deterministically by the caller.
+
+        Args:
+            compiled_rules: compiled ruleset to match
+            manifest: files of the package
+            rules_in_scope: returns the rules that still apply to a file,
+                files without any are not matched
+            timed_out_files: collects the files matched in windows of which
+                some windows timed out
+            profile: records the match time of each file and, by matching them
+                on their own, of each rule in scope
+            ruleset_fingerprint: fingerprint of the compiled ruleset, under
+                which matches are read from and written to the finding cache.
+                None to match every file.
+
+        Yields:
+            (file, rules in scope, matches, error raised by YARA if any)
+        """
+
+        def match(
+            entry: FileEntry, applicable_rules: set[str]
+        ) -> Tuple[list, Optional[Exception]]:
+            try:
+                cache_key = None
+                if self.finding_cache is not None and ruleset_fingerprint is not None:
+                    cache_key = (self._file_digest(entry), ruleset_fingerprint)
+                    cached = self.finding_cache.get(*cache_key)
+                    if cached is not None:
+                        return cached, None
+
+                start = time.perf_counter()
+                file_timeouts: List[str] = []
+                matches = self._match_file(compiled_rules, entry, file_timeouts)
+                if timed_out_files is not None:
+                    timed_out_files.extend(file_timeouts)
+                # Matches of files YARA timed out on are incomplete
+                if (
+                    cache_key is not None
+                    and self.finding_cache is not None
+                    and not file_timeouts
+                ):
+                    self.finding_cache.put(*cache_key, matches)
+
+                if profile is not None:
+                    size = self._file_size(entry)
+                    profile.record_file_match(
+                        entry.relpath, size, time.perf_counter() - start
+                    )
+                    self._profile_rules(entry, applicable_rules, size, profile)
+                return matches, None
+            except Exception as e:
+                return [], e
+
+        if not self.parallel_scan:
+            for entry in manifest:
+                applicable_rules = rules_in_scope(entry)
+                if applicable_rules:
+                    yield (entry, applicable_rules, *match(entry, applicable_rules))
+            return
+
+        pool = self._get_scan_pool()
+        # Bound the number of files in flight so memory does not grow with the
+        # size of the package
+        window = self.scan_workers * 4
+        pending: deque = deque()
+        candidates = iter(manifest)
+        try:
+            while True:
+                while len(pending) < window:
+                    entry = next(candidates, None)
+                    if entry is None:
+                        break
+                    applicable_rules = rules_in_scope(entry)
+                    if applicable_rules:
+                        pending.append(
+                            (
+                                entry,
+                                applicable_rules,
+                                pool.submit(match, entry, applicable_rules),
+                            )
+                        )
+                if not pending:
+                    return
+                entry, applicable_rules, future = pending.popleft()
+                yield (entry, applicable_rules, *future.result())
+        finally:
+            for _, _, future in pending:
+                future.cancel()
+
+    def _match_file(
+        self,
+        compiled_rules: yara.Rules,
+        entry: FileEntry,
+        timed_out_files: Optional[List[str]] = None,
+    ) -> list:
+        """
+        Matches a file of the manifest, in windows if it is very large
+        """
+        if self._file_size(entry) > self.chunk_size:
+            return self._match_in_windows(compiled_rules, entry, timed_out_files)
+        if entry.content is not None:
+            return compiled_rules.match(data=entry.content)
+        return compiled_rules.match(entry.abspath)
+
+    def _profile_rules(
+        self,
+        entry: FileEntry,
+        rule_names: set[str],
+        size: int,
+        profile: ScanProfile,
+    ) -> None:
+        """
+        Times each rule in scope of a file by matching it on its own
+        """
+        for rule_name in sorted(rule_names):
+            try:
+                rule = self.get_compiled_rules({rule_name})
+                start = time.perf_counter()
+                self._match_file(rule, entry)
+                profile.record_rule_match(rule_name, size, time.perf_counter() - start)
+            except Exception as e:
+                log.debug(f"Failed to profile rule {rule_name} on {entry.relpath}: {e}")
+
+    def _match_in_windows(
+        self,
+        compiled_rules: yara.Rules,
+        entry: FileEntry,
+        timed_out_files: Optional[List[str]] = None,
+    ) -> list:
+        """
+        Matches a very large file in overlapping windows, each under a timeout
+
+        Returns:
+            the matches of the file, with offsets relative to its start
+        """
+        with ExitStack() as file_resources:
+            content = (
+                entry.content
+                if entry.content is not None
+                else file_resources.enter_context(map_file(entry.abspath))
+            )
+            matches, timed_out = match_in_windows(
+                compiled_rules,
+                content,
+                self.chunk_size,
+                self.chunk_overlap,
+                self.scan_timeout,
+            )
+
+        if timed_out:
+            log.warning(
+                f"YARA timed out on {timed_out} windows of {entry.relpath}, "
+                "their matches are missing"
+            )
+            if timed_out_files is not None:
+                timed_out_files.append(entry.relpath)
+        return matches
+
+    @staticmethod
+    def _file_digest(entry: FileEntry) -> str:
+        # Shared by the hash reputation lookup and the finding cache
+        if entry.digest is None:
+            if entry.content is not None:
+                entry.digest = hashlib.sha256(entry.content).hexdigest()
+            else:
+                with map_file(entry.abspath) as content:
+                    entry.digest = hashlib.sha256(content).hexdigest()
+        return entry.digest
+
+    @staticmethod
+    def _file_size(entry: FileEntry) -> int:
+        if entry.content is not None:
+            return len(entry.content)
+        try:
+            return os.path.getsize(entry.abspath)
+        except OSError:
+            # Unreadable files fail when matched and are reported then
+            return 0
+
+    @staticmethod
+    def _rule_applies(rule: Optional[SourceCodeRule], entry: FileEntry) -> bool:
+        """
+        Check whether a source code rule should run against a file of the manifest
+
+        Args:
+            rule: Rule metadata (path_include / path_exclude patterns)
+            entry: File of the package manifest
+
+        Returns:
+            True if the file is in the scope of the rule, False otherwise
+        """
+        return rule_applies(rule, entry)
+
+    def analyze_yara(
+        self,
+        path: str,
+        rules: Optional[set] = None,
+        manifest: Optional[List[FileEntry]] = None,
+    ) -> dict:
         """
         Analyzes the IOCs of a given package
 
+        The package is walked once and each file is matched a single time against
+        the compiled ruleset; matches are then attributed back to the rules whose
+        path filters accept the file, up to each rule's max_hits.
+
         Args:
             path (str): path to package
             rules (set, optional): Set of IOC rules to analyze. Defaults to all rules.
+            manifest (list, optional): Files of an archive read in memory, matched
+                instead of walking path.
 
         Returns:
             dict[str]: map from each IOC rule and their corresponding output
@@ -395,179 +1205,244 @@ class Analyzer:
 
         rule_results: defaultdict[str, list[dict]] = defaultdict(list)
 
-        rules_path = {
-            rule_name: os.path.join(SOURCECODE_RULES_PATH, f"{rule_name}.yar")
-            for rule_name in all_rules
-        }
-
-        if len(rules_path) == 0:
+        if len(all_rules) == 0:
             log.debug("No yara rules to run")
             return {"results": results, "errors": errors, "issues": issues}
 
-        import time
+        start_time = time.time()
 
-        # Get rule metadata to access max_hits
-        yara_rules = {r.id: r for r in get_sourcecode_rules(self.ecosystem, YaraRule)}
+        profile = ScanProfile(all_rules) if self.profile_rules else None
 
-        # Run each rule separately to enable per-rule timing and max_hits optimization
-        for rule_name, rule_path in rules_path.items():
-            try:
-                log.debug(f"Executing rule {rule_name}.yar")
-                start_time = time.time()
+        try:
+            compiled_rules = self.get_compiled_rules(all_rules)
+            ruleset_fingerprint = None
+            if self.finding_cache is not None and profile is None:
+                ruleset_fingerprint = self.get_ruleset_fingerprint(all_rules)
+        except Exception as e:
+            for rule_name in all_rules:
+                errors[rule_name] = f"failed to run rule: {str(e)}"
+            log.warning(f"Failed to compile yara rules: {str(e)}")
+            return {"results": results, "errors": errors, "issues": issues}
 
-                scan_rule = yara.compile(filepath=rule_path)
+        # Get rule metadata to access max_hits and path filters
+        yara_rules = {
+            r.id: r
+            for r in get_sourcecode_rules(self.ecosystem, YaraRule)
+            if r.id in all_rules
+        }
 
-                # Get rule metadata
-                rule_obj = yara_rules.get(rule_name)
-                max_hits = (
-                    rule_obj.max_hits
-                    if rule_obj and hasattr(rule_obj, "max_hits")
-                    else None
-                )
-                path_include = (
-                    rule_obj.path_include
-                    if rule_obj and hasattr(rule_obj, "path_include")
-                    else None
-                )
-                path_exclude = (
-                    rule_obj.path_exclude
-                    if rule_obj and hasattr(rule_obj, "path_exclude")
-                    else None
-                )
+        if manifest is None:
+            manifest = build_file_manifest(path)
 
-                hits_found = 0
-                should_stop = False
+        hits_found: defaultdict[str, int] = defaultdict(int)
+        # Rules that reached max_hits or failed are not attributed any more hits
+        stopped_rules: set[str] = set()
+        # (file, snippet) pairs already reported by each rule
+        seen_findings: defaultdict[str, set[tuple[str, str]]] = defaultdict(set)
 
-                for root, _, files in os.walk(path):
-                    if should_stop:
-                        break
+        # Each file is classified once, against the rules that can apply to it
+        scope_index = RuleScopeIndex(
+            {rule_name: yara_rules.get(rule_name) for rule_name in all_rules}
+        )
 
-                    for f in files:
-                        if should_stop:
-                            break
+        # Files over the size cap are skipped, and listed in the errors along
+        # with the files YARA timed out on
+        oversized_files: list[str] = []
+        timed_out_files: list[str] = []
 
-                        scan_file_target_abspath = os.path.join(root, f)
-                        scan_file_target_relpath = os.path.relpath(
-                            scan_file_target_abspath, path
+        def rules_in_scope(entry: FileEntry) -> set[str]:
+            applicable_rules = scope_index.rules_for(entry) - stopped_rules
+            if applicable_rules and self._file_size(entry) > self.max_file_size:
+                log.warning(
+                    f"Skipping {entry.relpath}: larger than {self.max_file_size} bytes"
+                )
+                oversized_files.append(entry.relpath)
+                return set()
+            return applicable_rules
+
+        for entry, applicable_rules, matches, error in self._match_manifest(
+            compiled_rules,
+            manifest,
+            rules_in_scope,
+            timed_out_files,
+            profile,
+            ruleset_fingerprint,
+        ):
+            # Rules may have been stopped while this file was being matched
+            applicable_rules -= stopped_rules
+            if not applicable_rules:
+                continue
+
+            if error is not None:
+                for rule_name in applicable_rules:
+                    errors[rule_name] = f"failed to run rule: {str(error)}"
+                    log.warning(f"Rule {rule_name}.yar failed: {str(error)}")
+                stopped_rules |= applicable_rules
+                continue
+
+            # The file is mapped once, on its first match, and shared by line
+            # numbering, comment filtering and snippet extraction. It is released
+            # before moving on to the next file.
+            with ExitStack() as file_resources:
+                file_mapped = False
+                content: Optional[FileBuffer] = None
+                line_index: Optional[LineIndex] = None
+                comment_index: Optional[CommentIndex] = None
+                # Snippets already extracted in this file, by line and matched text
+                snippets: dict[tuple[int, str], str] = {}
+
+                for m in matches:
+                    # Each rule file is compiled in its own namespace, which also
+                    # holds the helper rules it includes
+                    rule_name = m.namespace
+                    if rule_name not in applicable_rules or rule_name in stopped_rules:
+                        continue
+
+                    if profile is not None:
+                        profile.record_instances(
+                            entry.relpath,
+                            rule_name,
+                            sum(len(s.instances) for s in m.strings),
                         )
 
-                        # Check path_include patterns if specified (takes precedence)
-                        if path_include:
-                            patterns = [p.strip() for p in path_include.split(",")]
-                            matches_pattern = any(
-                                fnmatch(scan_file_target_relpath, pattern)
-                                for pattern in patterns
+                    rule_obj = yara_rules.get(rule_name)
+                    max_hits = rule_obj.max_hits if rule_obj else None
+
+                    for s in m.strings:
+                        for i in s.instances:
+                            if not file_mapped:
+                                file_mapped = True
+                                content = (
+                                    entry.content
+                                    if entry.content is not None
+                                    else self._map_file(file_resources, entry.abspath)
+                                )
+                                if content is not None:
+                                    line_index = LineIndex(content)
+                                    comment_index = index_comments(
+                                        content, self._detect_language(entry.abspath)
+                                    )
+
+                            # Convert byte offset to line number for better readability
+                            line_number = self.get_line_number_from_offset(
+                                entry.abspath, i.offset, line_index=line_index
                             )
-                            if not matches_pattern:
-                                continue
-                        else:
-                            # Default: Skip files with excluded extensions
-                            if f.lower().endswith(tuple(YARA_EXT_EXCLUDE)):
-                                continue
 
-                        # Check path_exclude patterns
-                        if path_exclude:
-                            exclude_patterns = [
-                                p.strip() for p in path_exclude.split(",")
-                            ]
-                            if any(
-                                fnmatch(scan_file_target_relpath, pat)
-                                or fnmatch(f, pat)
-                                for pat in exclude_patterns
+                            # Filter out matches in comments
+                            if comment_index is not None and comment_index.contains(
+                                i.offset
                             ):
+                                log.debug(
+                                    f"Filtered match in comment at {entry.relpath}:{line_number}"
+                                )
                                 continue
 
-                        matches = scan_rule.match(scan_file_target_abspath)
-
-                        for m in matches:
-
-                            for s in m.strings:
-                                for i in s.instances:
-                                    # Convert byte offset to line number for better readability
-                                    line_number = self.get_line_number_from_offset(
-                                        scan_file_target_abspath, i.offset
+                            # The exact bytes YARA matched, so the reporter can
+                            # emphasize the flagged span within the snippet.
+                            matched_text = ""
+                            try:
+                                if isinstance(i.matched_data, bytes):
+                                    matched_text = i.matched_data.decode(
+                                        "utf-8", errors="replace"
                                     )
+                            except Exception:
+                                matched_text = ""
+
+                            # Extract a small window of code around the match offset
+                            # for better readability in the report. Unless the window
+                            # is clipped around the match (long or minified lines), it
+                            # only depends on the line, and is extracted once per line
+                            # and matched text.
+                            snippet_key = None
+                            if (
+                                line_index is not None
+                                and self._snippet_window_size(line_index, line_number)
+                                <= SNIPPET_MAX_CONTEXT
+                            ):
+                                snippet_key = (line_number, matched_text)
+                            code = (
+                                snippets.get(snippet_key)
+                                if snippet_key is not None
+                                else None
+                            )
+                            if code is None:
+                                line_of_code = self.get_lines_around_offset(
+                                    entry.abspath,
+                                    i.offset,
+                                    before=1,
+                                    after=2,
+                                    content=content,
+                                    match_length=i.matched_length,
+                                    max_context=SNIPPET_MAX_CONTEXT,
+                                )
+                                code = self.trim_code_snippet(
+                                    line_of_code, matched_text
+                                )
+                                if snippet_key is not None:
+                                    snippets[snippet_key] = code
+
+                            # since yara can match the multiple times in the same file
+                            # leading to finding several times the same word or pattern
+                            # this dedup the matches
+                            finding_key = (entry.relpath, code)
+                            if finding_key in seen_findings[rule_name]:
+                                continue
+                            seen_findings[rule_name].add(finding_key)
+
+                            finding = {
+                                "location": f"{entry.relpath}:{line_number}",
+                                "code": code,
+                                "match": matched_text,
+                                "message": m.meta.get(
+                                    "description", f"{m.rule} rule matched"
+                                ),
+                            }
+
+                            issues += len(m.strings)
+                            rule_results[rule_name].append(finding)
+                            hits_found[rule_name] += 1
+                            if profile is not None:
+                                profile.record_hit(rule_name)
+
+                            # Check if we've reached max_hits
+                            if (
+                                max_hits is not None
+                                and hits_found[rule_name] >= max_hits
+                            ):
+                                stopped_rules.add(rule_name)
+                                log.debug(
+                                    f"Rule {rule_name}.yar reached max_hits={max_hits}, stopping scan"
+                                )
+                                break
 
-                                    # Filter out matches in comments
-                                    if self.is_match_in_comment(
-                                        scan_file_target_abspath,
-                                        line_number=line_number,
-                                        byte_offset=i.offset,
-                                    ):
-                                        log.debug(
-                                            f"Filtered match in comment at {scan_file_target_relpath}:{line_number}"
-                                        )
-                                        continue
-
-                                    # Extract a small window of code around the match offset
-                                    # for better readability in the report.
-                                    line_of_code = self.get_lines_around_offset(
-                                        scan_file_target_abspath,
-                                        i.offset,
-                                        before=1,
-                                        after=2,
-                                    )
+                        if rule_name in stopped_rules:
+                            break
 
-                                    # The exact bytes YARA matched, so the reporter can
-                                    # emphasize the flagged span within the snippet.
-                                    matched_text = ""
-                                    try:
-                                        if isinstance(i.matched_data, bytes):
-                                            matched_text = i.matched_data.decode(
-                                                "utf-8", errors="replace"
-                                            )
-                                    except Exception:
-                                        matched_text = ""
-
-                                    finding = {
-                                        "location": f"{scan_file_target_relpath}:{line_number}",
-                                        "code": self.trim_code_snippet(
-                                            line_of_code, matched_text
-                                        ),
-                                        "match": matched_text,
-                                        "message": m.meta.get(
-                                            "description", f"{m.rule} rule matched"
-                                        ),
-                                    }
-
-                                    # since yara can match the multiple times in the same file
-                                    # leading to finding several times the same word or pattern
-                                    # this dedup the matches
-                                    if [
-                                        f
-                                        for f in rule_results[rule_name]
-                                        if finding["code"] == f["code"]
-                                    ]:
-                                        continue
-
-                                    issues += len(m.strings)
-                                    rule_results[rule_name].append(finding)
-                                    hits_found += 1
-
-                                    # Check if we've reached max_hits
-                                    if max_hits is not None and hits_found >= max_hits:
-                                        should_stop = True
-                                        log.debug(
-                                            f"Rule {rule_name}.yar reached max_hits={max_hits}, stopping scan"
-                                        )
-                                        break
-
-                                if should_stop:
-                                    break
-
-                            if should_stop:
-                                break
+            # Every rule is done, no need to look at the remaining files
+            if stopped_rules >= all_rules:
+                break
 
-                elapsed_time = time.time() - start_time
-                log.debug(
-                    f"Rule {rule_name}.yar finished, took {elapsed_time:.2f}s ({hits_found} hits found)"
-                )
+        if oversized_files:
+            errors["yara-file-size-limit"] = (
+                f"skipped {len(oversized_files)} files larger than "
+                f"{self.max_file_size} bytes: {', '.join(oversized_files)}"
+            )
+        if timed_out_files:
+            errors["yara-scan-timeout"] = (
+                f"YARA timed out on parts of {len(timed_out_files)} files: "
+                f"{', '.join(sorted(timed_out_files))}"
+            )
 
-            except Exception as e:
-                errors[rule_name] = f"failed to run rule: {str(e)}"
-                log.warning(f"Rule {rule_name}.yar failed: {str(e)}")
+        elapsed_time = time.time() - start_time
+        log.debug(
+            f"Yara rules finished on {len(manifest)} files, took {elapsed_time:.2f}s "
+            f"({sum(hits_found.values())} hits found)"
+        )
 
-        return {"results": results | rule_results, "errors": errors, "issues": issues}
+        output = {"results": results | rule_results, "errors": errors, "issues": issues}
+        if profile is not None:
+            output["profile"] = profile.to_dict()
+        return output
 
     def get_snippet(self, file_path: str, start_line: int, end_line: int) -> str:
         """
@@ -619,17 +1494,37 @@ class Analyzer:
         suffix = ellipsis if window_end < len(code) else ""
         return prefix + code[window_start:window_end] + suffix
 
-    def get_line_number_from_offset(self, file_path: str, offset: int) -> int:
+    @staticmethod
+    def _map_file(file_resources: ExitStack, file_path: str) -> Optional[FileBuffer]:
+        """
+        Map a file in memory for the lifetime of `file_resources`
+
+        Returns:
+            The file buffer, or None if the file can't be read
+        """
+        try:
+            return file_resources.enter_context(map_file(file_path))
+        except Exception as e:
+            log.debug(f"Failed to map {file_path}: {e}")
+            return None
+
+    def get_line_number_from_offset(
+        self, file_path: str, offset: int, line_index: Optional[LineIndex] = None
+    ) -> int:
         """
         Convert a byte offset to a line number in a file
 
         Args:
             file_path: Path to the file
             offset: Byte offset in the file
+            line_index: Optional newline index of the file, avoids re-reading it
 
         Returns:
             Line number (1-indexed) at the given offset
         """
+        if line_index is not None:
+            return line_index.line_number(offset)
+
         try:
             with open(file_path, "rb") as f:
                 content = f.read(offset)
@@ -643,20 +1538,24 @@ class Analyzer:
             )
             return offset  # Fallback to offset if conversion fails
 
-    def get_line_at_offset(self, file_path: str, offset: int) -> str:
+    def get_line_at_offset(
+        self, file_path: str, offset: int, content: Optional[FileBuffer] = None
+    ) -> str:
         """
         Extract the line of code at a given byte offset in a file
 
         Args:
             file_path: Path to the file
             offset: Byte offset in the file
+            content: Optional buffer of the whole file to avoid re-reading it
 
         Returns:
             The line of code containing the offset, stripped of whitespace
         """
         try:
-            with open(file_path, "rb") as f:
-                content = f.read()
+            if content is None:
+                with open(file_path, "rb") as f:
+                    content = f.read()
 
             # Find line boundaries around the offset
             line_start = content.rfind(b"\n", 0, offset) + 1
@@ -679,19 +1578,41 @@ class Analyzer:
             )
             return ""
 
+    @staticmethod
+    def _snippet_window_size(line_index: LineIndex, line_number: int) -> int:
+        """
+        Size in bytes of the lines of the snippet of a match on a line, the
+        line before it and the two lines after it
+        """
+        first = max(line_number - 1, 1)
+        last = min(line_number + 2, line_index.line_count)
+        return (line_index.line_end(last) or 0) - (line_index.line_start(first) or 0)
+
     def get_lines_around_offset(
-        self, file_path: str, offset: int, before: int, after: int
+        self,
+        file_path: str,
+        offset: int,
+        before: int,
+        after: int,
+        content: Optional[FileBuffer] = None,
+        match_length: int = 0,
+        max_context: Optional[int] = None,
     ) -> str:
         """
         Extract a window of lines around a given byte offset.
 
         Returns the matched line plus `before` lines preceding it and `after`
         lines following it, joined by newlines. Leading/trailing blank lines
-        are stripped but interior structure is preserved.
+        are stripped but interior structure is preserved. `content` may hold
+        the whole file (bytes or mmap) to avoid re-reading it. When
+        `max_context` is set, at most that many bytes are kept on each side of
+        the `match_length` bytes at the offset, so that very long lines
+        (minified bundles) are not decoded whole.
         """
         try:
-            with open(file_path, "rb") as f:
-                content = f.read()
+            if content is None:
+                with open(file_path, "rb") as f:
+                    content = f.read()
 
             line_start = content.rfind(b"\n", 0, offset) + 1
             line_end = content.find(b"\n", offset)
@@ -712,6 +1633,10 @@ class Analyzer:
                 nxt = content.find(b"\n", end + 1)
                 end = nxt if nxt != -1 else len(content)
 
+            if max_context is not None:
+                start = max(start, offset - max_context)
+                end = min(end, offset + match_length + max_context)
+
             window = content[start:end]
             return window.decode("utf-8", errors="replace").strip("\n")
 
@@ -721,17 +1646,17 @@ class Analyzer:
             )
             return ""
 
-    def _convert_to_findings(self, results: dict, rules_dict: dict) -> List[Finding]:
+    def _convert_to_findings(self, results: dict) -> List[Finding]:
         """
         Convert rule match results to Finding objects for risk analysis
 
         Args:
             results: Dict of rule_name -> list of matches
-            rules_dict: Dict of rule_name -> rule object
 
         Returns:
             List of Finding objects
         """
+        risk_metadata = get_sourcecode_risk_metadata(self.ecosystem)
         findings = []
 
         for rule_name, matches in results.items():
@@ -739,56 +1664,11 @@ class Analyzer:
                 continue
 
             # Handle both underscore and dash formats (YARA uses underscores in results)
-            rule_name_dash = rule_name.replace("_", "-")
-
-            if rule_name_dash not in rules_dict:
-                continue
-
-            rule = rules_dict[rule_name_dash]
-
-            # Skip rules without risk metadata
-            if not rule.identifies:
-                continue
-
-            # Validate metadata
-            if not validate_identifies(rule.identifies):
-                log.warning(
-                    f"Rule {rule_name} has invalid 'identifies' field: {rule.identifies}"
-                )
+            # Rules without valid risk metadata are not in the table
+            metadata = risk_metadata.get(rule_name.replace("_", "-"))
+            if metadata is None:
                 continue
 
-            if rule.mitre_tactics and not validate_mitre_tactics(rule.mitre_tactics):
-                log.warning(f"Rule {rule_name} has invalid MITRE tactics")
-
-            # Convert severity/specificity/sophistication strings to Level enum
-            try:
-                severity = Level(rule.severity) if rule.severity else Level.MEDIUM
-            except ValueError:
-                log.warning(
-                    f"Rule {rule_name} has invalid severity: {rule.severity}, using MEDIUM"
-                )
-                severity = Level.MEDIUM
-
-            try:
-                specificity = (
-                    Level(rule.specificity) if rule.specificity else Level.MEDIUM
-                )
-            except ValueError:
-                log.warning(
-                    f"Rule {rule_name} has invalid specificity: {rule.specificity}, using MEDIUM"
-                )
-                specificity = Level.MEDIUM
-
-            try:
-                sophistication = (
-                    Level(rule.sophistication) if rule.sophistication else Level.MEDIUM
-                )
-            except ValueError:
-                log.warning(
-                    f"Rule {rule_name} has invalid sophistication: {rule.sophistication}, using MEDIUM"
-                )
-                sophistication = Level.MEDIUM
-
             # Create Finding for each match
             for match in matches:
                 finding = Finding(
@@ -798,12 +1678,12 @@ class Analyzer:
                         if isinstance(match, dict)
                         else ""
                     ),
-                    identifies=rule.identifies,
-                    severity=severity,
-                    mitre_tactics=rule.mitre_tactics or [],
-                    specificity=specificity,
-                    sophistication=sophistication,
-                    max_hits=rule.max_hits,  # Pass max_hits from rule
+                    identifies=metadata.identifies,
+                    severity=metadata.severity,
+                    mitre_tactics=metadata.mitre_tactics,
+                    specificity=metadata.specificity,
+                    sophistication=metadata.sophistication,
+                    max_hits=metadata.max_hits,  # Pass max_hits from rule
                     location=match.get("location") if isinstance(match, dict) else None,
                     code_snippet=match.get("code") if isinstance(match, dict) else None,
                     message=match.get("message") if isinstance(match, dict) else None,
@@ -822,61 +1702,25 @@ class Analyzer:
         Returns:
             List of Finding objects
         """
+        risk_metadata = get_metadata_risk_metadata(self.ecosystem)
         findings = []
 
         for rule_name, message in metadata_results.get("results", {}).items():
             if not message:
                 continue
 
-            detector = self.metadata_detectors.get(rule_name)
-            if not detector or not detector.identifies:
-                continue
-
-            if not validate_identifies(detector.identifies):
-                log.warning(
-                    f"Metadata rule {rule_name} has invalid 'identifies': {detector.identifies}"
-                )
+            metadata = risk_metadata.get(rule_name)
+            if metadata is None:
                 continue
 
-            mitre_tactics = (
-                [t.strip() for t in detector.mitre_tactics.split(",") if t.strip()]
-                if detector.mitre_tactics
-                else []
-            )
-
-            try:
-                severity = (
-                    Level(detector.severity) if detector.severity else Level.MEDIUM
-                )
-            except ValueError:
-                severity = Level.MEDIUM
-
-            try:
-                specificity = (
-                    Level(detector.specificity)
-                    if detector.specificity
-                    else Level.MEDIUM
-                )
-            except ValueError:
-                specificity = Level.MEDIUM
-
-            try:
-                sophistication = (
-                    Level(detector.sophistication)
-                    if detector.sophistication
-                    else Level.MEDIUM
-                )
-            except ValueError:
-                sophistication = Level.MEDIUM
-
             finding = Finding(
                 rule_name=rule_name,
                 file_path="",
-                identifies=detector.identifies,
-                severity=severity,
-                mitre_tactics=mitre_tactics,
-                specificity=specificity,
-                sophistication=sophistication,
+                identifies=metadata.identifies,
+                severity=metadata.severity,
+                mitre_tactics=metadata.mitre_tactics,
+                specificity=metadata.specificity,
+                sophistication=metadata.sophistication,
                 max_hits=None,
                 location=None,
                 code_snippet=None,
@@ -899,15 +1743,8 @@ class Analyzer:
         Returns:
             Dict with risk score information
         """
-        # Build rules dictionary for lookup
-        rules_dict = {
-            rule.id: rule for rule in get_sourcecode_rules(self.ecosystem, YaraRule)
-        }
-
         # Convert sourcecode results to Finding objects
-        all_findings = self._convert_to_findings(
-            sourcecode_results["results"], rules_dict
-        )
+        all_findings = self._convert_to_findings(sourcecode_results["results"])
 
         # Convert metadata results to Finding objects
         if metadata_results:
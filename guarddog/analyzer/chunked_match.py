@@ -0,0 +1,146 @@
+"""
+Matching of very large files in overlapping windows
+
+Giant generated files (bundles, embedded data blobs) are matched one window at
+a time, each window under a YARA timeout, instead of all at once. Windows
+overlap so that a match straddling a boundary is still found whole in the next
+window. Matches are merged back with offsets relative to the start of the file,
+mirroring the attributes of yara.Match used by the analyzer; strings found in
+separate windows are listed in the order they are first found.
+
+Each window is matched on its own, so rules behave differently than on the
+whole file when their condition involves strings further apart than the
+overlap (they may not match), `filesize` (the size of the window) or absolute
+offsets such as `$a at 0` (relative to the start of the window).
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Iterator
+
+import yara  # type: ignore
+
+from guarddog.analyzer.file_manifest import FileBuffer
+
+log = logging.getLogger("guarddog")
+
+
+@dataclass
+class StringInstance:
+    offset: int
+    matched_data: bytes
+    matched_length: int
+
+
+@dataclass
+class StringMatch:
+    identifier: str
+    instances: list[StringInstance] = field(default_factory=list)
+
+
+@dataclass
+class RuleMatch:
+    rule: str
+    namespace: str
+    meta: dict
+    strings: list[StringMatch] = field(default_factory=list)
+
+
+def iter_windows(
+    size: int, window_size: int, overlap: int
+) -> Iterator[tuple[int, int]]:
+    """
+    Yields the [start, end) byte ranges of the windows covering a file
+
+    Args:
+        size: size of the file
+        window_size: size of each window
+        overlap: number of bytes shared by consecutive windows
+
+    Raises:
+        ValueError: the window size isn't positive, or the overlap isn't less
+            than the window size
+    """
+    if window_size <= 0 or not 0 <= overlap < window_size:
+        raise ValueError(
+            f"invalid windows of {window_size} bytes overlapping by {overlap} bytes"
+        )
+    step = window_size - overlap
+    start = 0
+    while True:
+        end = min(start + window_size, size)
+        yield start, end
+        if end >= size:
+            return
+        start += step
+
+
+def match_in_windows(
+    rules: yara.Rules,
+    content: FileBuffer,
+    window_size: int,
+    overlap: int,
+    timeout: int,
+) -> tuple[list[RuleMatch], int]:
+    """
+    Matches the content of a file one window at a time
+
+    Args:
+        rules: compiled ruleset
+        content: content of the file (bytes or memory-mapped)
+        window_size: size of each window
+        overlap: number of bytes shared by consecutive windows
+        timeout: YARA timeout of each window, in seconds
+
+    Returns:
+        (matches with offsets relative to the start of the file,
+         number of windows that timed out)
+    """
+    merged: dict[tuple[str, str], RuleMatch] = {}
+    instances: dict[tuple[str, str, str, int], StringInstance] = {}
+    timed_out = 0
+
+    for start, end in iter_windows(len(content), window_size, overlap):
+        try:
+            matches = rules.match(data=content[start:end], timeout=timeout)
+        except yara.TimeoutError:
+            log.debug(f"YARA timed out on bytes {start}-{end}")
+            timed_out += 1
+            continue
+
+        for m in matches:
+            rule_match = merged.get((m.namespace, m.rule))
+            if rule_match is None:
+                rule_match = RuleMatch(rule=m.rule, namespace=m.namespace, meta=m.meta)
+                merged[(m.namespace, m.rule)] = rule_match
+            strings = {s.identifier: s for s in rule_match.strings}
+
+            for s in m.strings:
+                string_match = strings.get(s.identifier)
+                if string_match is None:
+                    string_match = StringMatch(identifier=s.identifier)
+                    strings[s.identifier] = string_match
+                    rule_match.strings.append(string_match)
+
+                for i in s.instances:
+                    offset = start + i.offset
+                    key = (m.namespace, m.rule, s.identifier, offset)
+                    seen = instances.get(key)
+                    if seen is None:
+                        instance = StringInstance(
+                            offset=offset,
+                            matched_data=i.matched_data,
+                            matched_length=i.matched_length,
+                        )
+                        instances[key] = instance
+                        string_match.instances.append(instance)
+                    elif i.matched_length > seen.matched_length:
+                        # The match was cut by the end of the previous window
+                        seen.matched_data = i.matched_data
+                        seen.matched_length = i.matched_length
+
+    for rule_match in merged.values():
+        for string_match in rule_match.strings:
+            string_match.instances.sort(key=lambda i: i.offset)
+
+    return list(merged.values()), timed_out
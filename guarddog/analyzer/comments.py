@@ -0,0 +1,201 @@
+"""
+Comment and docstring spans of source files
+
+Each file is tokenized once, just enough to tell comments, docstrings and
+string literals apart, and yields the sorted byte spans of its comments.
+Checking whether a match lies in a comment is then a binary search, and
+comment markers inside string literals ("http://...", "/*") are no longer
+mistaken for comments.
+"""
+
+import re
+from array import array
+from bisect import bisect_right
+from typing import Optional
+
+from guarddog.analyzer.file_manifest import FileBuffer
+from guarddog.ecosystems import LANGUAGE
+
+# Shared token patterns, byte offsets are preserved by lexing bytes directly
+_LINE_COMMENT_SLASH = rb"//[^\n]*"
+_BLOCK_COMMENT = rb"/\*.*?(?:\*/|\Z)"
+_DOUBLE_QUOTED = rb'"(?:[^"\\\n]|\\.)*"?'
+_SINGLE_QUOTED = rb"'(?:[^'\\\n]|\\.)*'?"
+
+_C_STYLE_TOKENS = {
+    LANGUAGE.JAVASCRIPT: re.compile(
+        rb"(?P<comment>" + _LINE_COMMENT_SLASH + rb"|" + _BLOCK_COMMENT + rb")"
+        rb"|(?P<string>" + _DOUBLE_QUOTED + rb"|" + _SINGLE_QUOTED
+        # Template literals, without support for nested `${}` templates
+        + rb"|`(?:[^`\\]|\\.)*`?)"
+        # Regular expression literals, only when a value is expected
+        rb"|(?P<regex>/(?:[^/\\\n\[]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/)",
+        re.DOTALL,
+    ),
+    LANGUAGE.GO: re.compile(
+        rb"(?P<comment>" + _LINE_COMMENT_SLASH + rb"|" + _BLOCK_COMMENT + rb")"
+        rb"|(?P<string>" + _DOUBLE_QUOTED + rb"|" + _SINGLE_QUOTED
+        # Raw strings have no escapes
+        + rb"|`[^`]*`?)",
+        re.DOTALL,
+    ),
+}
+_C_STYLE_TOKENS[LANGUAGE.TYPESCRIPT] = _C_STYLE_TOKENS[LANGUAGE.JAVASCRIPT]
+
+_PYTHON_TOKENS = re.compile(
+    rb"(?P<comment>\#[^\n]*)"
+    rb"|(?P<string>[rRbBuUfF]{0,2}(?:"
+    rb'"""(?:[^\\]|\\.)*?(?:"""|\Z)'
+    rb"|'''(?:[^\\]|\\.)*?(?:'''|\Z)"
+    rb"|" + _DOUBLE_QUOTED + rb"|" + _SINGLE_QUOTED + rb"))"
+    rb"|(?P<open>[(\[{])|(?P<close>[)\]}])",
+    re.DOTALL,
+)
+
+_RUBY_TOKENS = re.compile(
+    rb"(?P<comment>\#[^\n]*|^=begin\b.*?(?:^=end\b[^\n]*|\Z))"
+    rb'|(?P<string>"(?:[^"\\]|\\.)*"?|\'(?:[^\'\\]|\\.)*\'?)',
+    re.DOTALL | re.MULTILINE,
+)
+
+# What may follow a string literal for it to be a statement on its own
+_STATEMENT_END = re.compile(rb"[ \t]*(?:\r?\n|;|\#|\Z)")
+
+# Characters and keywords after which a "/" starts a regular expression
+# literal rather than a division
+_REGEX_PRECEDING_CHARS = b"(,=:[!&|?{};+-*%<>~^"
+_REGEX_PRECEDING_KEYWORDS = {
+    b"return",
+    b"typeof",
+    b"instanceof",
+    b"case",
+    b"do",
+    b"else",
+    b"in",
+    b"of",
+    b"new",
+    b"delete",
+    b"void",
+    b"throw",
+    b"yield",
+    b"await",
+}
+_TRAILING_WORD = re.compile(rb"[A-Za-z_$][\w$]*\Z")
+
+
+class CommentIndex:
+    """
+    Sorted, non-overlapping byte spans [start, end) of the comments of a file
+    """
+
+    def __init__(self, spans: list[tuple[int, int]]):
+        self.starts = array("q", (start for start, _ in spans))
+        self.ends = array("q", (end for _, end in spans))
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def contains(self, offset: int) -> bool:
+        """
+        Returns True if the byte at the given offset belongs to a comment
+        """
+        i = bisect_right(self.starts, offset) - 1
+        return i >= 0 and offset < self.ends[i]
+
+
+def _regex_literal_allowed(content: FileBuffer, start: int) -> bool:
+    """
+    Tells a JavaScript regular expression literal from a division by looking
+    at the last significant token before the slash
+    """
+    window = content[max(0, start - 64) : start].rstrip()
+    if not window:
+        return True
+    if window[-1] in _REGEX_PRECEDING_CHARS:
+        return True
+    word = _TRAILING_WORD.search(window)
+    return word is not None and word.group() in _REGEX_PRECEDING_KEYWORDS
+
+
+def _is_python_docstring(content: FileBuffer, start: int, end: int) -> bool:
+    """
+    A string literal is a docstring (or a block comment written as a bare
+    string) when it is a statement on its own: first on its line, not a
+    continuation of the previous line, and followed by the end of the statement
+    """
+    line_start = content.rfind(b"\n", 0, start) + 1
+    if content[line_start:start].strip():
+        return False
+    previous_line = content[max(0, line_start - 3) : line_start].rstrip(b"\r\n")
+    if previous_line.endswith(b"\\"):
+        return False
+    return _STATEMENT_END.match(content, end) is not None
+
+
+def _lex_c_style(content: FileBuffer, language: LANGUAGE) -> list[tuple[int, int]]:
+    tokens = _C_STYLE_TOKENS[language]
+    spans = []
+    pos = 0
+    while True:
+        m = tokens.search(content, pos)
+        if m is None:
+            break
+        if m.lastgroup == "regex" and not _regex_literal_allowed(content, m.start()):
+            # A division: skip the slash and keep lexing what follows it
+            pos = m.start() + 1
+            continue
+        if m.lastgroup == "comment":
+            spans.append((m.start(), m.end()))
+        pos = m.end()
+    return spans
+
+
+def _lex_python(content: FileBuffer) -> list[tuple[int, int]]:
+    spans = []
+    depth = 0
+    pos = 0
+    while True:
+        m = _PYTHON_TOKENS.search(content, pos)
+        if m is None:
+            break
+        kind = m.lastgroup
+        if kind == "open":
+            depth += 1
+        elif kind == "close":
+            depth = max(0, depth - 1)
+        elif kind == "comment":
+            spans.append((m.start(), m.end()))
+        elif depth == 0 and _is_python_docstring(content, m.start(), m.end()):
+            spans.append((m.start(), m.end()))
+        pos = m.end()
+    return spans
+
+
+def _lex_ruby(content: FileBuffer) -> list[tuple[int, int]]:
+    return [
+        (m.start(), m.end())
+        for m in _RUBY_TOKENS.finditer(content)
+        if m.lastgroup == "comment"
+    ]
+
+
+def index_comments(
+    content: FileBuffer, language: Optional[LANGUAGE]
+) -> Optional[CommentIndex]:
+    """
+    Tokenizes a source file once and indexes its comments and docstrings
+
+    Args:
+        content: Content of the file (bytes or memory-mapped)
+        language: Programming language of the file
+
+    Returns:
+        The comment index, or None if the language is not supported
+    """
+    if language in _C_STYLE_TOKENS:
+        return CommentIndex(_lex_c_style(content, language))
+    if language == LANGUAGE.PYTHON:
+        return CommentIndex(_lex_python(content))
+    if language == LANGUAGE.RUBY:
+        return CommentIndex(_lex_ruby(content))
+    return None
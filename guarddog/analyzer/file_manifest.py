@@ -0,0 +1,138 @@
+"""
+File manifest of a package under analysis
+
+The package tree is walked once per scan; every source code rule is then
+dispatched over the resulting manifest instead of walking the tree again.
+Archives can also be listed in memory, their members are then scanned without
+being extracted to disk.
+"""
+
+import mmap
+import os
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator, Optional, Union
+
+from guarddog.utils.archives import iter_archive_members
+from guarddog.utils.config import IN_MEMORY_ARCHIVE_MAX_SIZE
+from guarddog.utils.exceptions import InMemoryBudgetExceeded
+
+# Content of a file, memory-mapped when possible
+FileBuffer = Union[bytes, mmap.mmap]
+
+
+@dataclass
+class FileEntry:
+    """
+    A file of the package under analysis
+
+    Attributes:
+        abspath: Absolute path of the file on disk, or of the archive member
+        relpath: Path of the file relative to the package root
+        name: Base name of the file
+        content: Content of an archive member read in memory, None for files
+            on disk
+        digest: SHA-256 of the content, computed when first needed
+    """
+
+    abspath: str
+    relpath: str
+    name: str
+    content: Optional[bytes] = None
+    digest: Optional[str] = None
+
+
+def build_file_manifest(path: str) -> list[FileEntry]:
+    """
+    Walks a package directory once and lists its files in walk order
+
+    Args:
+        path (str): path to the package directory
+
+    Returns:
+        list[FileEntry]: every file of the package
+    """
+    manifest = []
+    for root, _, files in os.walk(path):
+        for f in files:
+            abspath = os.path.join(root, f)
+            manifest.append(
+                FileEntry(
+                    abspath=abspath, relpath=os.path.relpath(abspath, path), name=f
+                )
+            )
+    return manifest
+
+
+def build_archive_manifest(
+    archive_path: str,
+    zip_password: Optional[bytes] = None,
+    max_size: int = IN_MEMORY_ARCHIVE_MAX_SIZE,
+) -> list[FileEntry]:
+    """
+    Reads the files of an archive in memory, through the safety checks applied
+    when extracting it
+
+    Members are read one at a time, and reading stops as soon as their content
+    exceeds max_size. Links share the content of their target, which is counted
+    once.
+
+    Args:
+        archive_path (str): path to the tar or zip archive
+        zip_password (bytes, optional): password of an encrypted zip archive
+        max_size (int): total size, in bytes, of the content held in memory
+
+    Raises:
+        InMemoryBudgetExceeded: the content of the files exceeds max_size, the
+            archive should be extracted to disk instead
+
+    Returns:
+        list[FileEntry]: every file of the archive, with its content
+    """
+    manifest = []
+    contents: set[int] = set()
+    size = 0
+    for relpath, content in iter_archive_members(archive_path, zip_password):
+        if id(content) not in contents:
+            contents.add(id(content))
+            size += len(content)
+            if size > max_size:
+                raise InMemoryBudgetExceeded(
+                    f"the files of {archive_path} exceed {max_size} bytes"
+                )
+        manifest.append(
+            FileEntry(
+                abspath=os.path.join(archive_path, relpath),
+                relpath=relpath,
+                name=os.path.basename(relpath),
+                content=content,
+            )
+        )
+    return manifest
+
+
+@contextmanager
+def map_file(file_path: str) -> Iterator[FileBuffer]:
+    """
+    Maps a file in memory, read-only, until the context exits
+
+    Every consumer of a file (line numbering, comment filtering, snippets)
+    then shares the same pages instead of reading the file again.
+
+    Args:
+        file_path (str): path to the file
+
+    Yields:
+        FileBuffer: the content of the file
+    """
+    with open(file_path, "rb") as f:
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            # Empty files and special files can't be mapped
+            yield f.read()
+            return
+        try:
+            yield buffer
+        finally:
+            buffer.close()
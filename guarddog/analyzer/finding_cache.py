@@ -0,0 +1,239 @@
+"""
+Content-hash cache of YARA matches
+
+The same files (vendored jQuery, lodash, six.py, generated protobuf stubs) ship
+in thousands of packages. The raw matches of each file are persisted in SQLite,
+keyed by the SHA-256 of the file and the fingerprint of the compiled ruleset, so
+a file seen before is not matched again: findings are rebuilt from the cached
+offsets instead. The cache is bounded in size, least recently used entries are
+evicted first. Cache failures (read-only home, locked database) are never fatal.
+
+Sandboxed scans open the cache read-only before the sandbox is applied: a
+compromised scan could otherwise record that a malicious file has no matches.
+"""
+
+import base64
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+from urllib.request import pathname2url
+
+from guarddog.analyzer.chunked_match import RuleMatch, StringInstance, StringMatch
+
+log = logging.getLogger("guarddog")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS matches (
+    file_digest TEXT NOT NULL,
+    ruleset TEXT NOT NULL,
+    matches BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (file_digest, ruleset)
+);
+CREATE INDEX IF NOT EXISTS matches_last_used ON matches (last_used);
+"""
+
+
+def serialize_matches(matches: list) -> bytes:
+    """
+    Serializes the matches of a file, yara.Match or RuleMatch alike
+    """
+    return json.dumps(
+        [
+            {
+                "rule": m.rule,
+                "namespace": m.namespace,
+                "meta": m.meta,
+                "strings": [
+                    {
+                        "identifier": s.identifier,
+                        "instances": [
+                            [
+                                i.offset,
+                                base64.b64encode(i.matched_data).decode(),
+                                i.matched_length,
+                            ]
+                            for i in s.instances
+                        ],
+                    }
+                    for s in m.strings
+                ],
+            }
+            for m in matches
+        ]
+    ).encode()
+
+
+def deserialize_matches(data: bytes) -> list[RuleMatch]:
+    return [
+        RuleMatch(
+            rule=m["rule"],
+            namespace=m["namespace"],
+            meta=m["meta"],
+            strings=[
+                StringMatch(
+                    identifier=s["identifier"],
+                    instances=[
+                        StringInstance(
+                            offset=offset,
+                            matched_data=base64.b64decode(matched_data),
+                            matched_length=matched_length,
+                        )
+                        for offset, matched_data, matched_length in s["instances"]
+                    ],
+                )
+                for s in m["strings"]
+            ],
+        )
+        for m in json.loads(data)
+    ]
+
+
+class FindingCache:
+    """
+    On-disk cache of the raw YARA matches of files, shared across packages
+
+    The database is opened on first use, or beforehand with open(). Lookups and
+    insertions may come from the worker threads of a parallel scan.
+
+    Attributes:
+        path: location of the SQLite database
+        max_size: total size, in bytes, of the cached matches above which the
+            least recently used entries are evicted
+        read_only: whether the cache is only looked up, matches are then
+            neither inserted nor marked as used
+    """
+
+    def __init__(self, path: str, max_size: int):
+        self.path = path
+        self.max_size = max_size
+        self.read_only = False
+        self._connection: Optional[sqlite3.Connection] = None
+        # Estimate of the size of the cache, refreshed before evicting
+        self._size: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None and self.read_only:
+            self._connection = sqlite3.connect(
+                f"file:{pathname2url(self.path)}?mode=ro",
+                uri=True,
+                timeout=10,
+                check_same_thread=False,
+            )
+        elif self._connection is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    def open(self, read_only: bool = False) -> None:
+        """
+        Opens the database now rather than on first use, e.g. before the scan is
+        sandboxed. A read-only cache that can't be opened now is never opened.
+        """
+        with self._lock:
+            self._close_connection()
+            self.read_only = read_only
+            try:
+                self._connect().execute("SELECT 1 FROM matches LIMIT 1").fetchall()
+            except (sqlite3.Error, OSError) as e:
+                log.debug(f"Unable to open the finding cache {self.path}: {e}")
+                self._close_connection()
+
+    def get(self, file_digest: str, ruleset: str) -> Optional[list[RuleMatch]]:
+        """
+        Returns the cached matches of a file, None if it was never matched
+        against this ruleset
+        """
+        with self._lock:
+            if self.read_only and self._connection is None:
+                return None
+            try:
+                connection = self._connect()
+                row = connection.execute(
+                    "SELECT matches FROM matches WHERE file_digest = ? AND ruleset = ?",
+                    (file_digest, ruleset),
+                ).fetchone()
+                if row is None:
+                    return None
+                if self.read_only:
+                    return deserialize_matches(row[0])
+                with connection:
+                    connection.execute(
+                        "UPDATE matches SET last_used = ? "
+                        "WHERE file_digest = ? AND ruleset = ?",
+                        (time.time(), file_digest, ruleset),
+                    )
+                return deserialize_matches(row[0])
+            except (sqlite3.Error, OSError, ValueError) as e:
+                log.debug(f"Unable to read the finding cache {self.path}: {e}")
+                return None
+
+    def put(self, file_digest: str, ruleset: str, matches: list) -> None:
+        """
+        Caches the matches of a file, evicting the least recently used entries
+        when the cache grows over its maximum size
+        """
+        if self.read_only:
+            return
+        data = serialize_matches(matches)
+        with self._lock:
+            try:
+                connection = self._connect()
+                with connection:
+                    connection.execute(
+                        "INSERT OR REPLACE INTO matches VALUES (?, ?, ?, ?, ?)",
+                        (file_digest, ruleset, data, len(data), time.time()),
+                    )
+                if self._size is None:
+                    self._size = self._total_size(connection)
+                else:
+                    self._size += len(data)
+                if self._size > self.max_size:
+                    self._evict(connection)
+            except (sqlite3.Error, OSError) as e:
+                log.debug(f"Unable to write to the finding cache {self.path}: {e}")
+
+    @staticmethod
+    def _total_size(connection: sqlite3.Connection) -> int:
+        return connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM matches"
+        ).fetchone()[0]
+
+    def _evict(self, connection: sqlite3.Connection) -> None:
+        # Other processes may have grown or shrunk the cache meanwhile
+        size = self._total_size(connection)
+        evicted = []
+        cursor = connection.execute(
+            "SELECT file_digest, ruleset, size FROM matches ORDER BY last_used"
+        )
+        for file_digest, ruleset, entry_size in cursor:
+            if size <= self.max_size:
+                break
+            evicted.append((file_digest, ruleset))
+            size -= entry_size
+        cursor.close()
+
+        with connection:
+            connection.executemany(
+                "DELETE FROM matches WHERE file_digest = ? AND ruleset = ?", evicted
+            )
+        self._size = size
+        log.debug(f"Evicted {len(evicted)} entries from the finding cache")
+
+    def _close_connection(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_connection()
@@ -0,0 +1,188 @@
+"""
+Hash reputation index of known benign and known malicious files
+
+Files of popular libraries, and the payloads of known malicious packages, are
+recognized by their SHA-256 before any rule runs. The index is a sorted array
+of digests per reputation, memory-mapped and binary searched, so that looking a
+file up costs a few page reads whatever the size of the index:
+
+    magic (8 bytes) | benign count (8) | malicious count (8)
+    | benign digests (32 each, sorted) | malicious digests (32 each, sorted)
+"""
+
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import tempfile
+from enum import Enum
+from typing import Iterable, Iterator, Optional
+
+from guarddog.utils.archives import is_supported_archive, iter_archive_members
+
+log = logging.getLogger("guarddog")
+
+MAGIC = b"GDHASH01"
+_HEADER = struct.Struct("<8sQQ")
+DIGEST_SIZE = 32
+
+# Rule reporting files identical to a file of a known malicious package
+KNOWN_MALICIOUS_FILE_RULE = "known-malicious-file"
+
+# Files this small (empty __init__.py, one-line stubs) are shared by malicious
+# and benign packages alike, and are never indexed as malicious
+MIN_MALICIOUS_FILE_SIZE = 64
+
+
+class Reputation(str, Enum):
+    BENIGN = "benign"
+    MALICIOUS = "malicious"
+
+
+class HashReputationIndex:
+    """
+    Memory-mapped hash reputation index
+
+    The index is mapped when opened, before the scan is sandboxed, and stays
+    readable until closed.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._buffer) < _HEADER.size:
+            raise ValueError(f"{path} is not a hash reputation index")
+        magic, self.benign_count, self.malicious_count = _HEADER.unpack_from(
+            self._buffer
+        )
+        expected_size = _HEADER.size + DIGEST_SIZE * (
+            self.benign_count + self.malicious_count
+        )
+        if magic != MAGIC or len(self._buffer) != expected_size:
+            raise ValueError(f"{path} is not a hash reputation index")
+
+        self._malicious_start = _HEADER.size + DIGEST_SIZE * self.benign_count
+
+    def _contains(self, start: int, count: int, digest: bytes) -> bool:
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            offset = start + middle * DIGEST_SIZE
+            value = self._buffer[offset : offset + DIGEST_SIZE]
+            if value < digest:
+                low = middle + 1
+            elif value > digest:
+                high = middle
+            else:
+                return True
+        return False
+
+    def lookup(self, digest: bytes) -> Optional[Reputation]:
+        """
+        Returns the reputation of a file from its SHA-256, None if it is unknown
+        """
+        if self._contains(self._malicious_start, self.malicious_count, digest):
+            return Reputation.MALICIOUS
+        if self._contains(_HEADER.size, self.benign_count, digest):
+            return Reputation.BENIGN
+        return None
+
+    def digests(self, reputation: Reputation) -> Iterator[bytes]:
+        if reputation == Reputation.BENIGN:
+            start, count = _HEADER.size, self.benign_count
+        else:
+            start, count = self._malicious_start, self.malicious_count
+        for offset in range(start, start + count * DIGEST_SIZE, DIGEST_SIZE):
+            yield self._buffer[offset : offset + DIGEST_SIZE]
+
+    def close(self) -> None:
+        self._buffer.close()
+
+
+def write_index(path: str, benign: set[bytes], malicious: set[bytes]) -> None:
+    """
+    Writes a hash reputation index, atomically replacing any previous one
+
+    A file known from benign packages is never reported as malicious: packages
+    copying a popular library along with their payload would otherwise get the
+    library files of every other package flagged.
+    """
+    malicious = malicious - benign
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, len(benign), len(malicious)))
+            for digests in (benign, malicious):
+                for digest in sorted(digests):
+                    f.write(digest)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def read_index(path: str) -> tuple[set[bytes], set[bytes]]:
+    """
+    Returns the benign and malicious digests of an existing index
+    """
+    index = HashReputationIndex(path)
+    try:
+        return (
+            set(index.digests(Reputation.BENIGN)),
+            set(index.digests(Reputation.MALICIOUS)),
+        )
+    finally:
+        index.close()
+
+
+def _iter_file_contents(path: str, zip_password: Optional[bytes]) -> Iterator[bytes]:
+    # Archives (such as the password protected samples of malicious packages)
+    # are read in memory, other files are hashed as they are
+    for root, _, files in os.walk(path):
+        for name in files:
+            file_path = os.path.join(root, name)
+            if is_supported_archive(file_path):
+                try:
+                    for _, content in iter_archive_members(file_path, zip_password):
+                        yield content
+                except Exception as e:
+                    log.warning(f"Unable to read archive {file_path}: {e}")
+                continue
+            with open(file_path, "rb") as f:
+                yield f.read()
+
+
+def hash_directories(
+    paths: Iterable[str],
+    zip_password: Optional[bytes] = None,
+    reputation: Reputation = Reputation.BENIGN,
+) -> set[bytes]:
+    """
+    Hashes the files under local directories, and the members of the archives
+    they contain
+
+    Args:
+        paths: directories to walk
+        zip_password: password of encrypted zip archives
+        reputation: reputation the files are indexed with, small files are
+            not indexed as malicious
+
+    Returns:
+        set[bytes]: SHA-256 digests of the files
+    """
+    digests = set()
+    for path in paths:
+        for content in _iter_file_contents(path, zip_password):
+            if (
+                reputation == Reputation.MALICIOUS
+                and len(content) < MIN_MALICIOUS_FILE_SIZE
+            ):
+                continue
+            digests.add(hashlib.sha256(content).digest())
+    return digests
@@ -1,23 +1,27 @@
+import importlib
+
 from guarddog.analyzer.metadata.detector import Detector
-from guarddog.analyzer.metadata.npm import NPM_METADATA_RULES
-from guarddog.analyzer.metadata.pypi import PYPI_METADATA_RULES
-from guarddog.analyzer.metadata.go import GO_METADATA_RULES
-from guarddog.analyzer.metadata.github_action import GITHUB_ACTION_METADATA_RULES
-from guarddog.analyzer.metadata.rubygems import RUBYGEMS_METADATA_RULES
 from guarddog.ecosystems import ECOSYSTEM
 
+# Module and name of the detectors of each ecosystem. Detectors, and the
+# dependencies they need, are only imported when their ecosystem is scanned
+_METADATA_RULES = {
+    ECOSYSTEM.PYPI: ("guarddog.analyzer.metadata.pypi", "PYPI_METADATA_RULES"),
+    ECOSYSTEM.NPM: ("guarddog.analyzer.metadata.npm", "NPM_METADATA_RULES"),
+    ECOSYSTEM.GO: ("guarddog.analyzer.metadata.go", "GO_METADATA_RULES"),
+    ECOSYSTEM.GITHUB_ACTION: (
+        "guarddog.analyzer.metadata.github_action",
+        "GITHUB_ACTION_METADATA_RULES",
+    ),
+    ECOSYSTEM.RUBYGEMS: (
+        "guarddog.analyzer.metadata.rubygems",
+        "RUBYGEMS_METADATA_RULES",
+    ),
+}
+
 
 def get_metadata_detectors(ecosystem: ECOSYSTEM) -> dict[str, Detector]:
-    match (ecosystem):
-        case ECOSYSTEM.PYPI:
-            return PYPI_METADATA_RULES
-        case ECOSYSTEM.NPM:
-            return NPM_METADATA_RULES
-        case ECOSYSTEM.GO:
-            return GO_METADATA_RULES
-        case ECOSYSTEM.GITHUB_ACTION:
-            return GITHUB_ACTION_METADATA_RULES
-        case ECOSYSTEM.EXTENSION:
-            return {}  # No metadata detectors for extensions currently
-        case ECOSYSTEM.RUBYGEMS:
-            return RUBYGEMS_METADATA_RULES
+    if ecosystem not in _METADATA_RULES:
+        return {}  # No metadata detectors for extensions currently
+    module_name, rules_name = _METADATA_RULES[ecosystem]
+    return getattr(importlib.import_module(module_name), rules_name)
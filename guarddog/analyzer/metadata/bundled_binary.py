@@ -4,6 +4,7 @@ import logging
 import os
 from typing import Optional
 
+from guarddog.analyzer.file_manifest import FileEntry
 from guarddog.analyzer.metadata.detector import Detector
 
 log = logging.getLogger("guarddog")
@@ -40,9 +41,6 @@ class BundledBinary(Detector):
         name: Optional[str] = None,
         version: Optional[str] = None,
     ) -> tuple[bool, str]:
-        def format_file(file: str, kind: str) -> str:
-            return f"{file} ({kind})"
-
         def sha256(file: str) -> str:
             with open(file, "rb") as f:
                 hasher = hashlib.sha256()
@@ -56,7 +54,7 @@ class BundledBinary(Detector):
         if not path:
             raise ValueError("path is needed to run heuristic " + self.get_name())
 
-        bin_files = {}
+        bin_files: dict[str, list[str]] = {}
         for root, _, files in os.walk(path):
             for f in files:
                 path = os.path.join(root, f)
@@ -64,10 +62,42 @@ class BundledBinary(Detector):
                 if kind:
                     digest = sha256(path)
                     if digest not in bin_files:
-                        bin_files[digest] = [format_file(f, kind)]
+                        bin_files[digest] = [self.format_file(f, kind)]
                     else:
-                        bin_files[digest].append(format_file(f, kind))
+                        bin_files[digest].append(self.format_file(f, kind))
+
+        return self.describe(bin_files)
+
+    def detect_in_manifest(
+        self,
+        package_info,
+        manifest: list[FileEntry],
+        name: Optional[str] = None,
+        version: Optional[str] = None,
+    ) -> tuple[bool, str]:
+        log.debug(
+            f"Running bundled binary heuristic on package {name} version {version}"
+        )
+        bin_files: dict[str, list[str]] = {}
+        for entry in manifest:
+            if entry.content is None:
+                continue
+            kind = self.binary_kind(entry.content)
+            if kind:
+                digest = hashlib.sha256(entry.content).hexdigest()
+                if digest not in bin_files:
+                    bin_files[digest] = [self.format_file(entry.name, kind)]
+                else:
+                    bin_files[digest].append(self.format_file(entry.name, kind))
 
+        return self.describe(bin_files)
+
+    @staticmethod
+    def format_file(file: str, kind: str) -> str:
+        return f"{file} ({kind})"
+
+    @staticmethod
+    def describe(bin_files: dict[str, list[str]]) -> tuple[bool, str]:
         if not bin_files:
             return False, ""
 
@@ -79,8 +109,10 @@ class BundledBinary(Detector):
     def is_binary(self, path: str) -> Optional[str]:
         max_head = len(max(self.magic_bytes.values()))
         with open(os.path.join(path), "rb") as fd:
-            header: bytes = fd.read(max_head)
-            for k, v in self.magic_bytes.items():
-                if header[: len(v)] == v:
-                    return k
+            return self.binary_kind(fd.read(max_head))
+
+    def binary_kind(self, header: bytes) -> Optional[str]:
+        for k, v in self.magic_bytes.items():
+            if header[: len(v)] == v:
+                return k
         return None
@@ -2,7 +2,6 @@ from abc import abstractmethod
 from typing import Optional
 import os
 
-from disposable_email_domains import blocklist
 from guarddog.analyzer.metadata.detector import Detector
 
 from .utils import extract_email_address_domain
@@ -32,6 +31,10 @@ class DeceptiveAuthorDetector(Detector):
         """
         Gets the domains that are known to be used by suspicious authors.
         """
+        # The blocklist is a set of over a hundred thousand domains, only built
+        # when an author is checked
+        from disposable_email_domains import blocklist
+
         # Obtain the path to the file containing knonw placeholder email domains
         placeholder_email_domains_filename = "placeholder_email_domains.txt"
 
@@ -1,6 +1,8 @@
 from abc import abstractmethod
 from typing import Optional
 
+from guarddog.analyzer.file_manifest import FileEntry
+
 
 class Detector:
     RULE_NAME = ""
@@ -34,6 +36,21 @@ class Detector:
     ) -> tuple[bool, Optional[str]]:
         pass  # pragma: no cover
 
+    def detect_in_manifest(
+        self,
+        package_info,
+        manifest: list[FileEntry],
+        name: Optional[str] = None,
+        version: Optional[str] = None,
+    ) -> tuple[bool, Optional[str]]:
+        """
+        Runs the heuristic on the files of an archive read in memory
+
+        Heuristics which look at the files of the package override this method,
+        the others run on the package information alone.
+        """
+        return self.detect(package_info, None, name, version)
+
     def get_name(self) -> str:
         return self.name
 
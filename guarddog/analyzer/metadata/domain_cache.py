@@ -0,0 +1,160 @@
+"""
+Persistent cache of the WHOIS lookups of email domains
+
+The maintainers of most packages use the same few email domains (gmail.com,
+the domains of large companies), which every process looked up again. WHOIS
+lookups are slow and rate-limited, their results are persisted in SQLite and
+shared by the processes of the user until they expire. Domains that don't
+exist ("no match" results) expire sooner: they are the ones someone may
+register at any time. Cache failures (read-only home, locked database) are
+never fatal. Sandboxed scans open the cache read-only before the sandbox is
+applied, so that a compromised scan can't vouch for a domain.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional
+from urllib.request import pathname2url
+
+log = logging.getLogger("guarddog")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS domains (
+    domain TEXT PRIMARY KEY,
+    creation_date REAL,
+    registered INTEGER NOT NULL,
+    looked_up REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS domains_looked_up ON domains (looked_up);
+"""
+
+
+class DomainCache:
+    """
+    On-disk cache of the creation date and registration status of domains
+
+    The database is opened on first use, or beforehand with open(), and may be
+    used by several threads and processes at once.
+
+    Attributes:
+        path: location of the SQLite database
+        ttl: seconds a registered domain is cached for
+        negative_ttl: seconds a domain that doesn't exist is cached for
+        read_only: whether lookups are only read from the cache
+    """
+
+    def __init__(self, path: str, ttl: float, negative_ttl: float):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.read_only = False
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None and self.read_only:
+            self._connection = sqlite3.connect(
+                f"file:{pathname2url(self.path)}?mode=ro",
+                uri=True,
+                timeout=10,
+                check_same_thread=False,
+            )
+        elif self._connection is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    def open(self, read_only: bool = False) -> None:
+        """
+        Opens the database now rather than on first use, e.g. before the scan is
+        sandboxed. A read-only cache that can't be opened now is never opened.
+        """
+        with self._lock:
+            self._close_connection()
+            self.read_only = read_only
+            try:
+                self._connect().execute("SELECT 1 FROM domains LIMIT 1").fetchall()
+            except (sqlite3.Error, OSError) as e:
+                log.debug(f"Unable to open the domain cache {self.path}: {e}")
+                self._close_connection()
+
+    def get(self, domain: str) -> Optional[tuple[Optional[datetime], bool]]:
+        """
+        Returns the cached creation date and registration status of a domain,
+        None if it was never looked up or its lookup expired
+        """
+        with self._lock:
+            if self.read_only and self._connection is None:
+                return None
+            try:
+                row = (
+                    self._connect()
+                    .execute(
+                        "SELECT creation_date, registered, looked_up FROM domains "
+                        "WHERE domain = ?",
+                        (domain.lower(),),
+                    )
+                    .fetchone()
+                )
+            except (sqlite3.Error, OSError) as e:
+                log.debug(f"Unable to read the domain cache {self.path}: {e}")
+                return None
+
+        if row is None:
+            return None
+        creation_date, registered, looked_up = row
+        ttl = self.ttl if registered else self.negative_ttl
+        if time.time() - looked_up > ttl:
+            return None
+        if creation_date is not None:
+            creation_date = datetime.fromtimestamp(creation_date, tz=timezone.utc)
+        return creation_date, bool(registered)
+
+    def put(
+        self, domain: str, creation_date: Optional[datetime], registered: bool
+    ) -> None:
+        """
+        Caches the lookup of a domain, and drops the expired ones
+        """
+        if self.read_only:
+            return
+        now = time.time()
+        with self._lock:
+            try:
+                connection = self._connect()
+                with connection:
+                    connection.execute(
+                        "INSERT OR REPLACE INTO domains VALUES (?, ?, ?, ?)",
+                        (
+                            domain.lower(),
+                            (
+                                creation_date.timestamp()
+                                if creation_date is not None
+                                else None
+                            ),
+                            int(registered),
+                            now,
+                        ),
+                    )
+                    connection.execute(
+                        "DELETE FROM domains WHERE looked_up < ?",
+                        (now - max(self.ttl, self.negative_ttl),),
+                    )
+            except (sqlite3.Error, OSError) as e:
+                log.debug(f"Unable to write to the domain cache {self.path}: {e}")
+
+    def _close_connection(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_connection()
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import AbstractSet, Optional
 
 from guarddog.analyzer.metadata.typosquatting import TyposquatDetector
 
@@ -12,7 +12,7 @@ class GoTyposquatDetector(TyposquatDetector):
           as determined by count of references across top starred repositories
     """
 
-    def _get_top_packages(self) -> set:
+    def _get_top_packages(self) -> AbstractSet[str]:
         """
         Gets the top Go packages from local cache.
         Uses the base class implementation without network refresh.
@@ -106,4 +106,4 @@ class GoTyposquatDetector(TyposquatDetector):
 
 if __name__ == "__main__":
     # update top_npm_packages.json
-    GoTyposquatDetector()._get_top_packages()
+    GoTyposquatDetector().refresh_top_packages()
@@ -3,8 +3,12 @@ from pathlib import Path
 import json
 import re
 
+from guarddog.analyzer.file_manifest import FileEntry
 from guarddog.analyzer.metadata.metadata_mismatch import MetadataMismatchDetector
 
+# Location of the manifest inside npm tarballs
+PACKAGE_JSON_PATH = "package/package.json"
+
 # List of fields where mismatch between package.json and NPM can carry malicious information.
 MANIFEST_FIELDS_CHECKLIST = {
     "dependencies": dict,
@@ -28,16 +32,40 @@ class NPMMetadataMismatchDetector(MetadataMismatchDetector):
         name: Optional[str] = None,
         version: Optional[str] = None,
     ) -> tuple[bool, Optional[str]]:
-        # Get the latest version if not specified
-        if not version:
-            version = package_info["dist-tags"]["latest"]
-
         # Load package.json manifest
         if path is None:
             raise ValueError("path is needed to run heuristic " + self.get_name())
-        package_json = Path(path) / "package" / "package.json"
+        package_json = Path(path) / PACKAGE_JSON_PATH
         package_manifest: Dict[str, Any] = json.loads(package_json.read_text())
 
+        return self.compare(package_info, package_manifest, version)
+
+    def detect_in_manifest(
+        self,
+        package_info,
+        manifest: list[FileEntry],
+        name: Optional[str] = None,
+        version: Optional[str] = None,
+    ) -> tuple[bool, Optional[str]]:
+        package_json = next(
+            (entry for entry in manifest if entry.relpath == PACKAGE_JSON_PATH), None
+        )
+        if package_json is None or package_json.content is None:
+            raise ValueError(f"{PACKAGE_JSON_PATH} not found in package archive")
+        package_manifest: Dict[str, Any] = json.loads(package_json.content)
+
+        return self.compare(package_info, package_manifest, version)
+
+    def compare(
+        self,
+        package_info,
+        package_manifest: Dict[str, Any],
+        version: Optional[str] = None,
+    ) -> tuple[bool, Optional[str]]:
+        # Get the latest version if not specified
+        if not version:
+            version = package_info["dist-tags"]["latest"]
+
         # Get NPM manifest for version
         version_info = package_info["versions"][version]
 
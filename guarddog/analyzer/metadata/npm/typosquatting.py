@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import AbstractSet, Optional
 
 from guarddog.analyzer.metadata.typosquatting import TyposquatDetector
 
@@ -12,7 +12,7 @@ class NPMTyposquatDetector(TyposquatDetector):
         popular_packages (set): set of top 5000 most popular packages from npm
     """
 
-    def _get_top_packages(self) -> set:
+    def _get_top_packages(self) -> AbstractSet[str]:
         """
         Gets the top 8000 most popular NPM packages.
         Uses the base class implementation with NPM-specific parameters.
@@ -89,4 +89,4 @@ class NPMTyposquatDetector(TyposquatDetector):
 
 if __name__ == "__main__":
     # update top_npm_packages.json
-    NPMTyposquatDetector()._get_top_packages()
+    NPMTyposquatDetector().refresh_top_packages()
@@ -0,0 +1,174 @@
+"""
+Compact storage of the names of popular packages
+
+The top packages caches are JSON files of several hundred kilobytes. Their names
+are also written, normalized and sorted, to a binary file next to them, which
+is memory-mapped and binary searched: checking whether a package is popular
+then neither parses the JSON file nor builds a set of every name.
+
+    magic (8 bytes) | downloaded timestamp (8) | source mtime in ns (8)
+    | source size (8) | count (8) | name offsets (4 each, count + 1)
+    | UTF-8 names, sorted
+"""
+
+import mmap
+import os
+import struct
+import tempfile
+from collections.abc import Set
+from typing import Iterable, Iterator, Optional
+
+
+def default_file_mode() -> int:
+    """
+    Returns the mode of the files created by open(), 0o666 less the umask
+
+    Temporary files are private (0o600), the caches that replace them may be
+    shared by the users of a machine.
+    """
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+MAGIC = b"GDNAMES1"
+_HEADER = struct.Struct("<8sqqQQ")
+_OFFSET = struct.Struct("<I")
+
+
+class PopularNames(Set):
+    """
+    Memory-mapped, sorted names of the popular packages of an ecosystem
+
+    Attributes:
+        downloaded_timestamp: when the names were downloaded, in seconds
+        source_mtime_ns: modification time of the JSON cache the names are from
+        source_size: size of the JSON cache the names are from
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._buffer) < _HEADER.size:
+            raise ValueError(f"{path} is not a popular names file")
+        (
+            magic,
+            self.downloaded_timestamp,
+            self.source_mtime_ns,
+            self.source_size,
+            self._count,
+        ) = _HEADER.unpack_from(self._buffer)
+        self._names_start = _HEADER.size + _OFFSET.size * (self._count + 1)
+        if magic != MAGIC or len(self._buffer) < self._names_start:
+            raise ValueError(f"{path} is not a popular names file")
+        if self._names_start + self._offset(self._count) != len(self._buffer):
+            raise ValueError(f"{path} is not a popular names file")
+
+    @classmethod
+    def _from_iterable(cls, it: Iterable[str]) -> frozenset:
+        # Results of set operations are regular sets
+        return frozenset(it)
+
+    def _offset(self, i: int) -> int:
+        return _OFFSET.unpack_from(self._buffer, _HEADER.size + _OFFSET.size * i)[0]
+
+    def _name(self, i: int) -> bytes:
+        start = self._names_start + self._offset(i)
+        return self._buffer[start : self._names_start + self._offset(i + 1)]
+
+    def __contains__(self, name: object) -> bool:
+        if not isinstance(name, str):
+            return False
+        encoded = name.encode()
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            value = self._name(middle)
+            if value < encoded:
+                low = middle + 1
+            elif value > encoded:
+                high = middle
+            else:
+                return True
+        return False
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(self._count):
+            yield self._name(i).decode()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self) -> None:
+        self._buffer.close()
+
+
+def write_names(
+    path: str, names: Iterable[str], downloaded_timestamp: int, source: os.stat_result
+) -> None:
+    """
+    Writes a popular names file, atomically replacing any previous one
+
+    Args:
+        names: normalized names of the popular packages
+        downloaded_timestamp: when the names were downloaded, in seconds
+        source: status of the JSON cache the names are from, the names file is
+            ignored once the JSON cache is modified
+    """
+    encoded = sorted({name.encode() for name in names})
+    directory = os.path.dirname(os.path.abspath(path))
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(
+                _HEADER.pack(
+                    MAGIC,
+                    downloaded_timestamp,
+                    source.st_mtime_ns,
+                    source.st_size,
+                    len(encoded),
+                )
+            )
+            offset = 0
+            for name in encoded:
+                f.write(_OFFSET.pack(offset))
+                offset += len(name)
+            f.write(_OFFSET.pack(offset))
+            for name in encoded:
+                f.write(name)
+        os.chmod(tmp_path, default_file_mode())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def open_names(path: str, source_path: str) -> Optional[PopularNames]:
+    """
+    Opens the popular names file of a JSON cache
+
+    Returns:
+        PopularNames: the names, None if the file is missing, invalid or
+        outdated by a modification of the JSON cache
+    """
+    try:
+        names = PopularNames(path)
+    except (OSError, ValueError):
+        return None
+
+    try:
+        source = os.stat(source_path)
+    except OSError:
+        names.close()
+        return None
+
+    if (names.source_mtime_ns, names.source_size) != (
+        source.st_mtime_ns,
+        source.st_size,
+    ):
+        names.close()
+        return None
+    return names
@@ -1,9 +1,11 @@
 import configparser
 import logging
 import os
+import posixpath
 import re
 from typing import Optional
 
+from guarddog.analyzer.file_manifest import FileEntry
 from guarddog.analyzer.metadata.metadata_mismatch import MetadataMismatchDetector
 
 try:
@@ -28,18 +30,13 @@ def _parse_requires_dist(requires_dist: list[str] | None) -> set[str]:
     return {_normalize_dep_name(dep) for dep in requires_dist if dep.strip()}
 
 
-def _parse_pyproject_toml(path: str) -> set[str] | None:
-    """Extract dependencies from pyproject.toml [project].dependencies."""
+def _parse_pyproject_content(content: bytes) -> set[str] | None:
+    """Extract dependencies from the [project].dependencies of a pyproject.toml."""
     if tomllib is None:
         return None
 
-    pyproject_path = os.path.join(path, "pyproject.toml")
-    if not os.path.isfile(pyproject_path):
-        return None
-
     try:
-        with open(pyproject_path, "rb") as f:
-            data = tomllib.load(f)
+        data = tomllib.loads(content.decode("utf-8"))
         deps = data.get("project", {}).get("dependencies", None)
         if deps is None:
             return None
@@ -49,15 +46,11 @@ def _parse_pyproject_toml(path: str) -> set[str] | None:
         return None
 
 
-def _parse_setup_cfg(path: str) -> set[str] | None:
-    """Extract dependencies from setup.cfg [options].install_requires."""
-    setup_cfg_path = os.path.join(path, "setup.cfg")
-    if not os.path.isfile(setup_cfg_path):
-        return None
-
+def _parse_setup_cfg_content(content: bytes) -> set[str] | None:
+    """Extract dependencies from the [options].install_requires of a setup.cfg."""
     try:
         cfg = configparser.ConfigParser()
-        cfg.read(setup_cfg_path)
+        cfg.read_string(content.decode("utf-8", errors="replace"))
         raw = cfg.get("options", "install_requires", fallback=None)
         if raw is None:
             return None
@@ -68,6 +61,20 @@ def _parse_setup_cfg(path: str) -> set[str] | None:
         return None
 
 
+def _read_manifest_file(path: str, file_name: str) -> bytes | None:
+    """Read a manifest file of the package directory, None if it is missing."""
+    manifest_path = os.path.join(path, file_name)
+    if not os.path.isfile(manifest_path):
+        return None
+
+    try:
+        with open(manifest_path, "rb") as f:
+            return f.read()
+    except OSError as e:
+        log.debug(f"Failed to read {file_name}: {e}")
+        return None
+
+
 class PypiMetadataMismatchDetector(MetadataMismatchDetector):
     """Compares PyPI registry requires_dist against pyproject.toml/setup.cfg dependencies.
 
@@ -86,21 +93,59 @@ class PypiMetadataMismatchDetector(MetadataMismatchDetector):
         if path is None:
             raise ValueError("path is needed to run heuristic " + self.get_name())
 
-        # Get requires_dist from PyPI metadata
-        requires_dist = package_info.get("info", {}).get("requires_dist")
-        registry_deps = _parse_requires_dist(requires_dist)
-
         # Find the package subdirectory (sdist extracts to name-version/)
         pkg_name = name or package_info.get("info", {}).get("name", "")
         pkg_dir = _find_package_dir(path, pkg_name)
         if pkg_dir is None:
             return False, None
 
+        return self.compare(
+            package_info,
+            _read_manifest_file(pkg_dir, "pyproject.toml"),
+            _read_manifest_file(pkg_dir, "setup.cfg"),
+        )
+
+    def detect_in_manifest(
+        self,
+        package_info,
+        manifest: list[FileEntry],
+        name: Optional[str] = None,
+        version: Optional[str] = None,
+    ) -> tuple[bool, Optional[str]]:
+        files = {
+            entry.relpath: entry.content
+            for entry in manifest
+            if entry.content is not None
+        }
+
+        pkg_name = name or package_info.get("info", {}).get("name", "")
+        pkg_dir = _find_package_dir_in_manifest(files, pkg_name)
+        if pkg_dir is None:
+            return False, None
+
+        return self.compare(
+            package_info,
+            files.get(posixpath.join(pkg_dir, "pyproject.toml")),
+            files.get(posixpath.join(pkg_dir, "setup.cfg")),
+        )
+
+    def compare(
+        self,
+        package_info,
+        pyproject_toml: bytes | None,
+        setup_cfg: bytes | None,
+    ) -> tuple[bool, Optional[str]]:
+        # Get requires_dist from PyPI metadata
+        requires_dist = package_info.get("info", {}).get("requires_dist")
+        registry_deps = _parse_requires_dist(requires_dist)
+
         # Try pyproject.toml first, then setup.cfg
-        manifest_deps = _parse_pyproject_toml(pkg_dir)
+        manifest_deps = None
+        if pyproject_toml is not None:
+            manifest_deps = _parse_pyproject_content(pyproject_toml)
         manifest_source = "pyproject.toml"
-        if manifest_deps is None:
-            manifest_deps = _parse_setup_cfg(pkg_dir)
+        if manifest_deps is None and setup_cfg is not None:
+            manifest_deps = _parse_setup_cfg_content(setup_cfg)
             manifest_source = "setup.cfg"
         if manifest_deps is None:
             # No parseable manifest found
@@ -151,3 +196,21 @@ def _find_package_dir(path: str, name: str) -> Optional[str]:
         return path
 
     return None
+
+
+def _find_package_dir_in_manifest(files: dict[str, bytes], name: str) -> Optional[str]:
+    """Find the package subdirectory among the files of an archive read in memory."""
+    normalized = name.lower().replace("-", "_")
+    top_level_dirs = dict.fromkeys(
+        relpath.split("/", 1)[0] for relpath in files if "/" in relpath
+    )
+    for entry in top_level_dirs:
+        entry_lower = entry.lower()
+        if entry_lower.startswith(normalized) or entry_lower.startswith(name.lower()):
+            return entry
+
+    # Fallback: check if manifest files exist at root level (wheel archive)
+    if "pyproject.toml" in files or "setup.cfg" in files:
+        return ""
+
+    return None
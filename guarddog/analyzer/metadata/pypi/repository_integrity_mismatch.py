@@ -7,11 +7,8 @@ import configparser
 import logging
 import os
 import re
-import requests
 from typing import Optional, Tuple
 
-import urllib3.util
-
 from guarddog.analyzer.metadata.repository_integrity_mismatch import IntegrityMismatch
 
 GH_REPO_REGEX = r"(?:https?://)?(?:www\.)?github\.com/(?:[\w-]+/)(?:[\w-]+)"
@@ -35,6 +32,8 @@ def find_best_github_candidate(all_candidates_and_highlighted_link, name):
     the project repository.
     If the repository homepage is a GitHub URL, it is used in priority
     """
+    import urllib3.util
+
     candidates, best_github_candidate = all_candidates_and_highlighted_link
 
     # if the project url is a GitHub repository, we should follow this as an instruction. Users will click on it
@@ -89,6 +88,8 @@ def dict_generator(indict, pre=None):
 
 
 def _ensure_proper_url(url):
+    import urllib3.util
+
     parsed = urllib3.util.parse_url(url)
     if parsed.scheme is None:
         url = f"https://{url}"
@@ -119,6 +120,8 @@ def find_github_candidates(package_info) -> Tuple[set[str], Optional[str]]:
     best = None
     if homepage in github_urls:
         if homepage is not None and isinstance(homepage, str):
+            import requests
+
             response = requests.get(homepage)
             if response.status_code == 200:
                 best = _ensure_proper_url(homepage)
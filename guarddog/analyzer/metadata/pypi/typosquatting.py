@@ -1,5 +1,5 @@
 import logging
-from typing import Optional
+from typing import AbstractSet, Optional
 
 import packaging.utils
 
@@ -18,20 +18,18 @@ class PypiTyposquatDetector(TyposquatDetector):
         popular_packages (list): list of top 5000 downloaded packages from PyPI
     """
 
-    def _get_top_packages(self) -> set:
+    def _get_top_packages(self) -> AbstractSet[str]:
         """
         Gets the package information of the top 5000 most downloaded PyPI packages.
         Uses the base class implementation with PyPI-specific parameters.
         """
-        packages = self._get_top_packages_with_refresh(
+        # Package names are canonicalized by normalize_name()
+        return self._get_top_packages_with_refresh(
             packages_filename="top_pypi_packages.json",
             popular_packages_url="https://hugovk.github.io/top-pypi-packages/top-pypi-packages.min.json",
             refresh_days=30,
         )
 
-        # Apply canonicalization to PyPI package names
-        return set(map(self._canonicalize_name, packages))
-
     def _extract_package_names(self, data: dict | list | None) -> list | None:
         """
         Extract package names from PyPI data structure.
@@ -71,9 +69,7 @@ class PypiTyposquatDetector(TyposquatDetector):
             @param **kwargs:
         """
         log.debug(f"Running typosquatting heuristic on PyPI package {name}")
-        normalized_name = packaging.utils.canonicalize_name(
-            package_info["info"]["name"]
-        )
+        normalized_name = self.normalize_name(package_info["info"]["name"])
         similar_package_names = self.get_typosquatted_package(normalized_name)
         if len(similar_package_names) > 0:
             return True, TyposquatDetector.MESSAGE_TEMPLATE % ", ".join(
@@ -81,6 +77,9 @@ class PypiTyposquatDetector(TyposquatDetector):
             )
         return False, None
 
+    def normalize_name(self, package_name: str) -> str:
+        return self._canonicalize_name(package_name)
+
     def _get_confused_forms(self, package_name) -> list:
         """
         Gets confused terms for python packages
@@ -122,4 +121,4 @@ class PypiTyposquatDetector(TyposquatDetector):
 
 if __name__ == "__main__":
     # update top_pypi_packages.json
-    PypiTyposquatDetector()._get_top_packages()
+    PypiTyposquatDetector().refresh_top_packages()
@@ -4,8 +4,6 @@ import re
 from abc import abstractmethod
 from typing import List, Optional
 
-import pygit2
-
 from guarddog.analyzer.metadata.detector import Detector
 from guarddog.analyzer.metadata.utils import get_file_hash
 
@@ -109,6 +107,9 @@ class IntegrityMismatch(Detector):
         tmp_dir = os.path.dirname(path)
         repo_path = os.path.join(tmp_dir, "sources", name)
 
+        # pygit2 is only imported when a repository is cloned
+        import pygit2
+
         try:
             repo = pygit2.clone_repository(url=github_url, path=repo_path)
         except Exception as e:
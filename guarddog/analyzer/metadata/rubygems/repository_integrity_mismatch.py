@@ -1,8 +1,6 @@
 import logging
 from typing import Optional
 
-import urllib3.util
-
 from guarddog.analyzer.metadata.repository_integrity_mismatch import IntegrityMismatch
 
 log = logging.getLogger("guarddog")
@@ -18,6 +16,9 @@ def normalize_github_url(url):
         url = url.replace("git://", "https://")
     if url.startswith("http://"):
         url = url.replace("http://", "https://")
+
+    import urllib3.util
+
     parsed = urllib3.util.parse_url(url)
     if parsed.host not in ("github.com", "www.github.com"):
         return None
@@ -1,5 +1,5 @@
 import logging
-from typing import Optional
+from typing import AbstractSet, Optional
 
 from guarddog.analyzer.metadata.typosquatting import TyposquatDetector
 
@@ -16,7 +16,7 @@ class RubyGemsTyposquatDetector(TyposquatDetector):
         popular_packages (set): set of critical/popular gems from ecosyste.ms
     """
 
-    def _get_top_packages(self) -> set:
+    def _get_top_packages(self) -> AbstractSet[str]:
         """
         Gets the top 1000 critical RubyGems packages.
         Uses the base class implementation with RubyGems-specific parameters.
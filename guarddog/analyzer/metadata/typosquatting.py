@@ -1,19 +1,179 @@
 import abc
+import atexit
 import json
 import logging
 import os
+import tempfile
+import threading
 import time
 from datetime import datetime, timedelta
 from itertools import permutations
-from typing import Optional
-
-import requests
+from typing import AbstractSet, Iterable, Iterator, Optional
 
 from guarddog.analyzer.metadata.detector import Detector
-from guarddog.utils.config import TOP_PACKAGES_CACHE_LOCATION
+from guarddog.analyzer.metadata.popular_names import (
+    default_file_mode,
+    open_names,
+    write_names,
+)
+from guarddog.utils.config import (
+    TOP_PACKAGES_AUTO_REFRESH,
+    TOP_PACKAGES_CACHE_LOCATION,
+)
 
 log = logging.getLogger("guarddog")
 
+# Cache files being refreshed in the background by this process, and the
+# threads refreshing them
+_refreshing: set[str] = set()
+_refreshing_lock = threading.Lock()
+_refresh_threads: list[threading.Thread] = []
+
+# Seconds the interpreter waits at exit for the background refreshes to finish
+REFRESH_EXIT_TIMEOUT = 30
+
+
+def write_cache_file(path: str, cache_data: dict) -> None:
+    """
+    Writes a top packages cache file, atomically replacing any previous one
+
+    Concurrent processes read either the previous or the new file, never a
+    partially written one.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(cache_data, f, ensure_ascii=False, indent=4)
+        os.chmod(tmp_path, default_file_mode())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def wait_for_background_refreshes(timeout: Optional[float] = None) -> None:
+    """
+    Waits for the refreshes of the top packages caches started in the background
+
+    Args:
+        timeout: seconds to wait for all of them, None to wait until they finish
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    for thread in list(_refresh_threads):
+        if deadline is None:
+            thread.join()
+        else:
+            thread.join(max(deadline - time.monotonic(), 0))
+
+
+# Refreshes run in daemon threads, which would be killed mid-download or
+# mid-write when the scan finishes first
+atexit.register(wait_for_background_refreshes, REFRESH_EXIT_TIMEOUT)
+
+
+def _deletions(name: str) -> Iterator[tuple[int, str]]:
+    # Single-character deletions of a name, along with the deleted position
+    for i in range(len(name)):
+        yield i, name[:i] + name[i + 1 :]
+
+
+def _sorted_neighborhood(name: str) -> set[str]:
+    # Sorted characters of a name, and their single-character deletions
+    letters = "".join(sorted(name))
+    return {letters} | {deletion for _, deletion in _deletions(letters)}
+
+
+class TyposquatIndex:
+    """
+    Deletion-neighborhood index of the popular packages of an ecosystem
+
+    Every popular name and each of its confused forms is indexed as is, and by
+    each of its single-character deletions (along with the deleted position).
+    Two names are a length one edit away when:
+        - one is a deletion of the other (insertion or deletion)
+        - they have a deletion at the same position in common (substitution)
+        - swapping two adjacent characters of one gives the other
+    so finding the popular packages a name is close to takes O(len(name)) hash
+    probes, instead of comparing it to every popular name.
+
+    Hyphen permutations are factorial in the number of hyphens and are not
+    indexed. A name one edit away from a permutation of a package has (almost)
+    the characters of the package, the packages with hyphens are therefore
+    indexed by the deletion neighborhood of their sorted characters, which
+    narrows down the packages whose permutations need to be checked.
+    """
+
+    def __init__(self, variants: Iterable[tuple[str, str]]):
+        """
+        Args:
+            variants: name of each variant (the package itself or one of its
+                confused forms), along with the popular package it is a
+                variant of
+        """
+        self._names: dict[str, tuple[str, ...]] = {}
+        # Deletions of the variants, by deleted position
+        self._deletions: list[dict[str, tuple[str, ...]]] = []
+        self._anagrams: dict[str, tuple[str, ...]] = {}
+
+        for variant, package in variants:
+            self._names[variant] = self._names.get(variant, ()) + (package,)
+            while len(self._deletions) < len(variant):
+                self._deletions.append({})
+            for i in range(len(variant)):
+                deletion = variant[:i] + variant[i + 1 :]
+                deletions = self._deletions[i]
+                deletions[deletion] = deletions.get(deletion, ()) + (package,)
+
+            if variant == package and "-" in package:
+                for key in _sorted_neighborhood(package):
+                    self._anagrams[key] = self._anagrams.get(key, ()) + (package,)
+
+    def lookup(self, name: str) -> set[str]:
+        """
+        Returns the popular packages with a variant a length one edit away
+        from a name
+        """
+        matches: set[str] = set()
+        names = self._names
+        deletions = self._deletions
+
+        for i, deletion in _deletions(name):
+            # Deleting a character of the name gives a variant
+            found = names.get(deletion)
+            if found:
+                matches.update(found)
+            # The name and a variant only differ at this position
+            if i < len(deletions):
+                found = deletions[i].get(deletion)
+                if found:
+                    matches.update(found)
+
+        # Deleting a character of a variant gives the name
+        for i in range(min(len(name) + 1, len(deletions))):
+            found = deletions[i].get(name)
+            if found:
+                matches.update(found)
+
+        # Swapping two adjacent characters of the name gives a variant
+        for i in range(len(name) - 1):
+            found = names.get(name[:i] + name[i + 1] + name[i] + name[i + 2 :])
+            if found:
+                matches.update(found)
+
+        return matches
+
+    def permutation_candidates(self, name: str) -> set[str]:
+        """
+        Returns the popular packages with hyphens that may have a permutation
+        a length one edit away from a name
+        """
+        candidates: set[str] = set()
+        for key in _sorted_neighborhood(name):
+            candidates.update(self._anagrams.get(key, ()))
+        return candidates
+
 
 class TyposquatDetector(Detector):
     MESSAGE_TEMPLATE = (
@@ -22,7 +182,10 @@ class TyposquatDetector(Detector):
     )
 
     def __init__(self) -> None:
-        self.popular_packages = self._get_top_packages()  # Find top PyPI packages
+        self._popular_packages: Optional[AbstractSet[str]] = None
+        self._index: Optional[TyposquatIndex] = None
+        self._popular_packages_url: Optional[str] = None
+        self._force_refresh = False
         super().__init__(
             name="typosquatting",
             description="Identify packages that are named closely to an highly popular package",
@@ -33,8 +196,37 @@ class TyposquatDetector(Detector):
             sophistication="low",
         )
 
+    @property
+    def popular_packages(self) -> AbstractSet[str]:
+        """
+        Normalized names of the top packages of the ecosystem, loaded (and
+        refreshed if expired) the first time a package name is checked
+        """
+        if self._popular_packages is None:
+            self._popular_packages = self._get_top_packages()
+        return self._popular_packages
+
+    @popular_packages.setter
+    def popular_packages(self, packages: AbstractSet[str]) -> None:
+        self._popular_packages = packages
+        self._index = None
+
+    @property
+    def index(self) -> TyposquatIndex:
+        """
+        Index of the popular packages and their variants, built the first time
+        a package name is checked
+        """
+        if self._index is None:
+            self._index = TyposquatIndex(
+                (variant, package)
+                for package in self.popular_packages
+                for variant in [package, *self._get_confused_forms(package)]
+            )
+        return self._index
+
     @abc.abstractmethod
-    def _get_top_packages(self) -> set:
+    def _get_top_packages(self) -> AbstractSet[str]:
         """
         Subclasses should implement this to return a set of top package names.
 
@@ -48,18 +240,28 @@ class TyposquatDetector(Detector):
         packages_filename: str,
         popular_packages_url: Optional[str] = None,
         refresh_days: int = 30,
-    ) -> set:
+    ) -> AbstractSet[str]:
         """
         Common implementation for getting top packages with optional network refresh.
 
+        An expired cache is served as is, and refreshed in a background thread
+        for the next runs (unless GUARDDOG_TOP_PACKAGES_AUTO_REFRESH is false).
+        The top packages are only downloaded before being returned when there
+        is no cache to serve, or when refresh_top_packages() asks for it.
+
+        The normalized names are also written to a compact popular names file
+        next to the cache, which is memory-mapped instead of parsing the cache
+        on the next runs.
+
         Args:
             packages_filename: Name of the JSON file (e.g., "top_pypi_packages.json")
             popular_packages_url: URL to fetch fresh package data. If None, refresh is disabled.
             refresh_days: Number of days before file is considered expired
 
         Returns:
-            set: Set of package names
+            AbstractSet[str]: normalized package names
         """
+        self._popular_packages_url = popular_packages_url
         resources_dir = TOP_PACKAGES_CACHE_LOCATION
         if resources_dir is None:
             resources_dir = os.path.abspath(
@@ -67,16 +269,26 @@ class TyposquatDetector(Detector):
             )
 
         top_packages_path = os.path.join(resources_dir, packages_filename)
-        log.debug(f"Loading cache from: {top_packages_path}")
-
-        cache_data = self._load_cache_file(top_packages_path)
-
-        if cache_data:
-            log.debug(f"Cache loaded successfully with keys: {list(cache_data.keys())}")
+        names = open_names(self._names_path(top_packages_path), top_packages_path)
+        top_packages_information: Optional[AbstractSet[str]] = names
+
+        if names is not None:
+            log.debug(f"Loaded {len(names)} compact package names from: {names.path}")
+            cache_data: dict | None = {
+                "downloaded_timestamp": names.downloaded_timestamp
+            }
         else:
-            log.debug("Cache is empty or invalid")
-
-        top_packages_information = cache_data.get("packages") if cache_data else None
+            log.debug(f"Loading cache from: {top_packages_path}")
+            cache_data = self._load_cache_file(top_packages_path)
+            if cache_data:
+                log.debug(
+                    f"Cache loaded successfully with keys: {list(cache_data.keys())}"
+                )
+                top_packages_information = self._compact_cache_file(
+                    top_packages_path, cache_data
+                )
+            else:
+                log.debug("Cache is empty or invalid")
 
         # Enable refresh if URL is provided
         enable_refresh = popular_packages_url is not None
@@ -85,38 +297,136 @@ class TyposquatDetector(Detector):
             f"Cache expired check: {is_expired} (refresh enabled: {enable_refresh})"
         )
 
-        if enable_refresh and is_expired and popular_packages_url is not None:
-            log.info(
-                f"Cache is expired, attempting to refresh from: {popular_packages_url}"
+        if enable_refresh and self._force_refresh:
+            top_packages_information = self._refresh_cache_file(
+                top_packages_path, popular_packages_url
             )
-            new_response_data = self._get_top_packages_network_raw(popular_packages_url)
-            if new_response_data is not None:
-                log.debug("Downloaded new data, extracting package names")
-                top_packages_information = self._extract_package_names(
-                    new_response_data
-                )
-
-                # Save with new standardized format
-                cache_data = {
-                    "downloaded_timestamp": int(time.time()),
-                    "packages": top_packages_information,
-                }
-
-                if top_packages_information is not None:
-                    log.info(
-                        f"Saving refreshed cache with {len(top_packages_information)} packages to {top_packages_path}"
-                    )
-                with open(top_packages_path, "w+") as f:
-                    json.dump(cache_data, f, ensure_ascii=False, indent=4)
-            else:
-                log.warning(
+            if top_packages_information is None:
+                raise RuntimeError(
                     f"Failed to download new cache data from {popular_packages_url}"
                 )
+        elif enable_refresh and is_expired:
+            if top_packages_information is None:
+                # There is no stale cache to serve in the meantime
+                log.info(
+                    f"Cache is missing, attempting to download it from: {popular_packages_url}"
+                )
+                top_packages_information = self._refresh_cache_file(
+                    top_packages_path, popular_packages_url
+                )
+            elif TOP_PACKAGES_AUTO_REFRESH:
+                self._refresh_cache_file_in_background(
+                    top_packages_path, popular_packages_url
+                )
 
         if top_packages_information is None:
             return set()
 
-        return set(top_packages_information)
+        return top_packages_information
+
+    def refresh_top_packages(self) -> bool:
+        """
+        Downloads the top packages and replaces their cache now, whatever its
+        age, then reloads them
+
+        Returns:
+            bool: False if the top packages of the ecosystem are not refreshed
+            from the network
+
+        Raises:
+            RuntimeError: the top packages could not be downloaded
+        """
+        self._force_refresh = True
+        try:
+            self.popular_packages = self._get_top_packages()
+        finally:
+            self._force_refresh = False
+        return self._popular_packages_url is not None
+
+    def _refresh_cache_file(self, path: str, url: str) -> AbstractSet[str] | None:
+        """
+        Downloads the top packages and atomically replaces their cache file
+
+        Returns:
+            AbstractSet[str]: the downloaded package names, normalized, None if
+            they could not be downloaded
+        """
+        new_response_data = self._get_top_packages_network_raw(url)
+        if new_response_data is None:
+            log.warning(f"Failed to download new cache data from {url}")
+            return None
+
+        log.debug("Downloaded new data, extracting package names")
+        top_packages_information = self._extract_package_names(new_response_data)
+        if top_packages_information is None:
+            log.warning(f"Unexpected format of the data downloaded from {url}")
+            return None
+
+        # Save with new standardized format
+        cache_data = {
+            "downloaded_timestamp": int(time.time()),
+            "packages": top_packages_information,
+        }
+        log.info(
+            f"Saving refreshed cache with {len(top_packages_information)} packages to {path}"
+        )
+        try:
+            write_cache_file(path, cache_data)
+        except OSError as e:
+            log.warning(f"Unable to save the refreshed cache to {path}: {e}")
+            return {self.normalize_name(name) for name in top_packages_information}
+        return self._compact_cache_file(path, cache_data)
+
+    @staticmethod
+    def _names_path(path: str) -> str:
+        return os.path.splitext(path)[0] + ".names"
+
+    def _compact_cache_file(self, path: str, cache_data: dict) -> AbstractSet[str]:
+        """
+        Writes the normalized names of a cache file to its popular names file
+
+        Returns:
+            AbstractSet[str]: the memory-mapped names, or the names themselves
+            if the popular names file could not be written
+        """
+        names = {self.normalize_name(name) for name in cache_data["packages"]}
+        names_path = self._names_path(path)
+        try:
+            write_names(
+                names_path,
+                names,
+                int(cache_data["downloaded_timestamp"]),
+                os.stat(path),
+            )
+        except (OSError, TypeError, ValueError) as e:
+            log.debug(f"Unable to save the compact package names to {names_path}: {e}")
+            return names
+
+        return open_names(names_path, path) or names
+
+    def _refresh_cache_file_in_background(self, path: str, url: str) -> None:
+        """
+        Refreshes a cache file in a daemon thread, unless it is already being
+        refreshed by this process
+        """
+        with _refreshing_lock:
+            if path in _refreshing:
+                return
+            _refreshing.add(path)
+
+        def refresh():
+            try:
+                self._refresh_cache_file(path, url)
+            except Exception as e:
+                log.debug(f"Unable to refresh {path}: {e}")
+            finally:
+                with _refreshing_lock:
+                    _refreshing.discard(path)
+
+        log.info(f"Cache is expired, refreshing it in the background from: {url}")
+        thread = threading.Thread(target=refresh, name=f"refresh {path}", daemon=True)
+        _refresh_threads.append(thread)
+        thread.start()
 
     def _cache_is_expired(self, cache_data: dict | None, days: int) -> bool:
         """
@@ -210,6 +520,8 @@ class TyposquatDetector(Detector):
         Returns:
             dict | list: Full response data or None on error
         """
+        import requests
+
         try:
             response = requests.get(url)
             response.raise_for_status()
@@ -345,7 +657,8 @@ class TyposquatDetector(Detector):
         is possibly typosquatting from
 
         Checks for Levenshtein distance, permutations, and confused terms
-        against the top 5000 most downloaded PyPI packages
+        against the top 5000 most downloaded PyPI packages, looked up in the
+        index of the popular packages
 
         Args:
             package_name (str): name of package
@@ -358,17 +671,45 @@ class TyposquatDetector(Detector):
         if package_name in self.popular_packages:
             return []
 
-        # Go through popular packages and find length one edit typosquats
-        typosquatted = set()
-        for popular_package in self.popular_packages:
-            if self._is_length_one_edit_away(package_name, popular_package):
+        typosquatted = self.index.lookup(package_name)
+        for popular_package in (
+            self.index.permutation_candidates(package_name) - typosquatted
+        ):
+            if any(
+                self._is_length_one_edit_away(package_name, name)
+                for name in self._generate_permutations(popular_package)
+            ):
                 typosquatted.add(popular_package)
 
-            alternate_popular_names = self._get_confused_forms(popular_package)
-            swapped_popular_names = self._generate_permutations(popular_package)
+        return list(typosquatted)
 
-            for name in alternate_popular_names + swapped_popular_names:
-                if self._is_length_one_edit_away(package_name, name):
-                    typosquatted.add(popular_package)
+    def normalize_name(self, package_name: str) -> str:
+        """
+        Returns the form of a package name that is compared to popular packages
+        """
+        return package_name
 
-        return list(typosquatted)
+    def screen(self, package_names: Iterable[str]) -> dict[str, list[str]]:
+        """
+        Screens a list of package names, such as the dependencies of a project,
+        without any package information
+
+        Each distinct normalized name is looked up in the index once.
+
+        Args:
+            package_names: names of the packages, as declared
+
+        Returns:
+            dict: names of the popular packages each package could be
+            typosquatting, for the packages that could be
+        """
+        normalized = {name: self.normalize_name(name) for name in package_names}
+        similar = {
+            name: self.get_typosquatted_package(name)
+            for name in set(normalized.values())
+        }
+        return {
+            name: similar[normalized_name]
+            for name, normalized_name in normalized.items()
+            if similar[normalized_name]
+        }
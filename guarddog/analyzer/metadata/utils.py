@@ -3,8 +3,15 @@ from functools import cache
 from typing import Optional
 
 import hashlib
-import whois  # type: ignore
-from whois.exceptions import PywhoisError  # type: ignore[import-untyped]
+import os
+
+from guarddog.analyzer.metadata.domain_cache import DomainCache
+from guarddog.utils.config import (
+    DOMAIN_CACHE,
+    DOMAIN_CACHE_LOCATION,
+    DOMAIN_CACHE_NEGATIVE_TTL,
+    DOMAIN_CACHE_TTL,
+)
 
 NPM_MAINTAINER_EMAIL_WARNING = (
     "note that NPM's API may not provide accurate information regarding the maintainer's email, "
@@ -13,11 +20,34 @@ NPM_MAINTAINER_EMAIL_WARNING = (
 )
 
 
+_domain_cache: Optional[DomainCache] = None
+
+
+def get_domain_cache() -> Optional[DomainCache]:
+    """
+    Returns the persistent cache of WHOIS lookups, None if it is disabled
+    """
+    global _domain_cache
+    if not DOMAIN_CACHE:
+        return None
+    if _domain_cache is None:
+        _domain_cache = DomainCache(
+            os.path.join(DOMAIN_CACHE_LOCATION, "domains.db"),
+            DOMAIN_CACHE_TTL,
+            DOMAIN_CACHE_NEGATIVE_TTL,
+        )
+    return _domain_cache
+
+
 @cache
 def get_domain_creation_date(domain) -> tuple[Optional[datetime], bool]:
     """
     Gets the creation date of an domain name
 
+    Lookups are cached for the process. Conclusive lookups (a creation date,
+    or a "no match" answer) are also cached in the persistent domain cache
+    shared with the other processes.
+
     Args:
         domain (str): domain of email address
 
@@ -25,17 +55,48 @@ def get_domain_creation_date(domain) -> tuple[Optional[datetime], bool]:
         datetime: creation date of domain
         bool:     if the domain is currently registered
     """
+    domain_cache = get_domain_cache()
+    if domain_cache is not None:
+        cached = domain_cache.get(domain)
+        if cached is not None:
+            return cached
+
+    result = _whois_domain_creation_date(domain)
+    if result is None:
+        # The lookup failed, the domain is considered registered with an
+        # unknown creation date, and looked up again by the next process
+        return None, True
+
+    if domain_cache is not None:
+        domain_cache.put(domain, *result)
+    return result
+
+
+def _whois_domain_creation_date(domain) -> Optional[tuple[Optional[datetime], bool]]:
+    """
+    Looks the creation date of a domain up in WHOIS
+
+    Returns:
+        tuple: creation date of the domain (None if it doesn't exist) and
+        whether it is registered, None if the lookup failed or gave no
+        creation date (rate limiting, timeouts, unparsable answers)
+    """
+    # whois is only imported when a domain is looked up
+    import whois  # type: ignore
+    from whois.exceptions import PywhoisError  # type: ignore[import-untyped]
 
     try:
         domain_information = whois.whois(domain)
     except PywhoisError as e:
         # The domain doesn't exist at all, if that's the case we consider it vulnerable
         # since someone could register it
-        return None, (not str(e).lower().startswith("no match for"))
+        if str(e).lower().startswith("no match for"):
+            return None, False
+        return None
 
     if domain_information.creation_date is None:
         # No creation date in whois, so we can't know
-        return None, True
+        return None
 
     creation_dates = domain_information.creation_date
 
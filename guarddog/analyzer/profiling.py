@@ -0,0 +1,101 @@
+"""
+Profiling of the source code rules
+
+A scan matches every file once against the whole ruleset, which tells how long
+each file took but not which rules dominate. When profiling, each file is also
+matched against every rule in scope on its own, so that match time, bytes
+scanned and raw/post-filter hit counts can be attributed to individual rules.
+"""
+
+import threading
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from typing import Iterable
+
+
+@dataclass
+class RuleProfile:
+    """
+    Attributes:
+        match_time: seconds spent matching the rule on its own
+        files_scanned: number of files the rule was matched against
+        bytes_scanned: total size of those files
+        raw_instances: string instances YARA matched for the rule
+        hits: findings reported once comments, duplicates and max_hits are filtered
+    """
+
+    match_time: float = 0.0
+    files_scanned: int = 0
+    bytes_scanned: int = 0
+    raw_instances: int = 0
+    hits: int = 0
+
+
+@dataclass
+class FileProfile:
+    """
+    Attributes:
+        size: size of the file
+        match_time: seconds spent matching the file against the whole ruleset
+        raw_instances: string instances YARA matched in the file
+    """
+
+    size: int = 0
+    match_time: float = 0.0
+    raw_instances: int = 0
+
+
+class ScanProfile:
+    """
+    Per-rule and per-file timings and counts of a source code scan
+
+    Matches may be recorded from the worker threads of a parallel scan.
+    """
+
+    def __init__(self, rule_names: Iterable[str]):
+        self.rules: dict[str, RuleProfile] = {
+            rule_name: RuleProfile() for rule_name in rule_names
+        }
+        self.files: defaultdict[str, FileProfile] = defaultdict(FileProfile)
+        self._lock = threading.Lock()
+
+    def record_file_match(self, relpath: str, size: int, elapsed: float) -> None:
+        with self._lock:
+            file_profile = self.files[relpath]
+            file_profile.size = size
+            file_profile.match_time += elapsed
+
+    def record_rule_match(self, rule_name: str, size: int, elapsed: float) -> None:
+        with self._lock:
+            rule_profile = self.rules[rule_name]
+            rule_profile.match_time += elapsed
+            rule_profile.files_scanned += 1
+            rule_profile.bytes_scanned += size
+
+    def record_instances(self, relpath: str, rule_name: str, count: int) -> None:
+        with self._lock:
+            self.files[relpath].raw_instances += count
+            self.rules[rule_name].raw_instances += count
+
+    def record_hit(self, rule_name: str) -> None:
+        with self._lock:
+            self.rules[rule_name].hits += 1
+
+    def to_dict(self) -> dict:
+        """
+        Returns the profile as a JSON serializable dict, rules and files sorted
+        from the slowest to the fastest
+        """
+        with self._lock:
+            rules = sorted(
+                self.rules.items(), key=lambda item: item[1].match_time, reverse=True
+            )
+            files = sorted(
+                self.files.items(), key=lambda item: item[1].match_time, reverse=True
+            )
+            return {
+                "match_time": sum(f.match_time for _, f in files),
+                "bytes_scanned": sum(f.size for _, f in files),
+                "rules": {rule_name: asdict(profile) for rule_name, profile in rules},
+                "files": {relpath: asdict(profile) for relpath, profile in files},
+            }
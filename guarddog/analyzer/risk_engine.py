@@ -7,11 +7,13 @@ This module implements a risk correlation and scoring system that:
 3. Uses MITRE ATT&CK tactics to understand attack progression
 """
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
-from typing import List, Optional, Dict, Union
+from typing import List, Optional, Dict, Sequence, Tuple, Union
 from collections import Counter
+from functools import lru_cache
 import logging
+import sys
 
 log = logging.getLogger("guarddog")
 
@@ -62,6 +64,11 @@ ATTACK_PHASES = {
     ],
 }
 
+# Attack phase of each MITRE ATT&CK tactic
+TACTIC_PHASES = {
+    tactic: phase for phase, tactics in ATTACK_PHASES.items() for tactic in tactics
+}
+
 # Valid categories for the identifies field
 VALID_CATEGORIES = {
     "network",
@@ -83,56 +90,71 @@ VALID_TYPES = {"capability", "threat"}
 # ============================================================================
 
 
-@dataclass
+@lru_cache(maxsize=None)
+def parse_identifies(identifies: str) -> Tuple[str, str, Optional[str]]:
+    """
+    Splits an identifies field into its type, category and detail
+
+    Rules share a few dozen identifies values, each one is only split once.
+    """
+    parts = identifies.split(".")
+    return (
+        parts[0],
+        parts[1] if len(parts) > 1 else "",
+        parts[2] if len(parts) > 2 else None,
+    )
+
+
+@dataclass(slots=True)
 class Finding:
     """
     A single YARA rule match
 
+    Packages can have many thousands of findings: they are slotted, share the
+    strings of their rule, and parse identifies once when created.
+
     Attributes:
         rule_name: Name of the rule that matched
         file_path: Path to the file where the match occurred
         identifies: What this rule detects (e.g., "threat.network.outbound")
         severity: Impact level (low/medium/high)
-        mitre_tactics: List of MITRE ATT&CK tactics
+        mitre_tactics: MITRE ATT&CK tactics, a tuple shared by the findings of the rule
         specificity: Pattern specificity - how specific to malware vs legitimate code (low/medium/high)
         sophistication: Technique advancement level (low/medium/high)
         max_hits: Maximum number of risks to form from this rule per file (None = unlimited)
         location: Specific location in file (line number, offset)
         code_snippet: Matched code
         message: Description of what was found
+        type: 'capability' or 'threat', from identifies
+        category: network, filesystem, process, runtime..., from identifies
+        detail: outbound, inbound, read, write..., from identifies
     """
 
     rule_name: str
     file_path: str
     identifies: str
     severity: Level
-    mitre_tactics: List[str]
+    mitre_tactics: Sequence[str]
     specificity: Level = Level.MEDIUM
     sophistication: Level = Level.MEDIUM
     max_hits: Optional[int] = None
     location: Optional[str] = None
     code_snippet: Optional[str] = None
     message: Optional[str] = None
+    type: str = field(init=False, repr=False, compare=False)
+    category: str = field(init=False, repr=False, compare=False)
+    detail: Optional[str] = field(init=False, repr=False, compare=False)
 
-    @property
-    def type(self) -> str:
-        """Returns 'capability' or 'threat'"""
-        return self.identifies.split(".")[0]
-
-    @property
-    def category(self) -> str:
-        """Returns category: network, filesystem, process, runtime"""
-        parts = self.identifies.split(".")
-        return parts[1] if len(parts) > 1 else ""
-
-    @property
-    def detail(self) -> Optional[str]:
-        """Returns detail: outbound, inbound, read, write, etc."""
-        parts = self.identifies.split(".")
-        return parts[2] if len(parts) > 2 else None
+    def __post_init__(self):
+        self.rule_name = sys.intern(self.rule_name)
+        self.file_path = sys.intern(self.file_path)
+        self.identifies = sys.intern(self.identifies)
+        if self.message is not None:
+            self.message = sys.intern(self.message)
+        self.type, self.category, self.detail = parse_identifies(self.identifies)
 
 
-@dataclass
+@dataclass(slots=True)
 class Risk:
     """
     A formed risk from correlating capability + threat (or runtime threat alone)
@@ -146,23 +168,24 @@ class Risk:
         sophistication: Sophistication level
         threat_finding: The threat finding that formed this risk
         capability_finding: The capability finding (None for runtime threats)
+        name: Risk name, 'risk.network' or 'risk.network.outbound'
     """
 
     category: str
     detail: Optional[str]
     severity: Level
-    mitre_tactics: List[str]
+    mitre_tactics: Sequence[str]
     specificity: Level
     sophistication: Level
     threat_finding: Finding
     capability_finding: Optional[Finding]
+    name: str = field(init=False, repr=False, compare=False)
 
-    @property
-    def name(self) -> str:
-        """Returns risk name: 'risk.network' or 'risk.network.outbound'"""
+    def __post_init__(self):
         if self.detail:
-            return f"risk.{self.category}.{self.detail}"
-        return f"risk.{self.category}"
+            self.name = sys.intern(f"risk.{self.category}.{self.detail}")
+        else:
+            self.name = sys.intern(f"risk.{self.category}")
 
 
 @dataclass
@@ -225,7 +248,7 @@ def validate_identifies(identifies: str) -> bool:
     return True
 
 
-def validate_mitre_tactics(tactics: List[str]) -> bool:
+def validate_mitre_tactics(tactics: Sequence[str]) -> bool:
     """
     Validates that MITRE tactics are recognized
 
@@ -292,6 +315,81 @@ def can_form_risk(threat: Finding, capability: Finding) -> bool:
     return threat_detail == cap_detail
 
 
+# Wildcard of the capability index keys, for any detail or any file
+_ANY = object()
+
+
+class CapabilityIndex:
+    """
+    Capabilities of a package indexed by category, detail and file
+
+    Finds the capability a threat pairs with in constant time, instead of
+    checking can_form_risk against every capability. The capability found is the
+    one the ordered scan would pick: the first compatible capability in the
+    threat's file, else the first compatible capability in any file.
+    """
+
+    def __init__(self, capabilities: List[Finding]):
+        self.first: Optional[Finding] = capabilities[0] if capabilities else None
+        # (file_path, category, detail) -> (position, capability) of the first
+        # capability of each key, file_path and detail being possibly _ANY
+        self._first_by_key: Dict[tuple, Tuple[int, Finding]] = {}
+        self._matches: Dict[tuple, Optional[Finding]] = {}
+        for position, capability in enumerate(capabilities):
+            category = capability.category
+            detail = capability.detail
+            for file_path in (capability.file_path, _ANY):
+                for key_detail in (detail, _ANY):
+                    self._first_by_key.setdefault(
+                        (file_path, category, key_detail), (position, capability)
+                    )
+
+    def _first_compatible(
+        self, file_path, category: str, detail: Optional[str]
+    ) -> Optional[Finding]:
+        if detail is None:
+            # A general threat matches any capability of its category
+            entry = self._first_by_key.get((file_path, category, _ANY))
+            return entry[1] if entry else None
+
+        # A specific threat matches general capabilities and the same detail
+        entries = [
+            entry
+            for entry in (
+                self._first_by_key.get((file_path, category, None)),
+                self._first_by_key.get((file_path, category, detail)),
+            )
+            if entry is not None
+        ]
+        return min(entries, key=lambda entry: entry[0])[1] if entries else None
+
+    def find_compatible(self, threat: Finding) -> Optional[Finding]:
+        """
+        Returns the capability a threat forms a risk with, preferring the
+        threat's own file, None if no capability is compatible
+        """
+        key = (threat.file_path, threat.identifies)
+        if key not in self._matches:
+            _, category, detail = parse_identifies(threat.identifies)
+            self._matches[key] = self._first_compatible(
+                threat.file_path, category, detail
+            ) or self._first_compatible(_ANY, category, detail)
+        return self._matches[key]
+
+
+def is_standalone_threat(threat: Finding) -> bool:
+    """
+    Standalone threat categories form risks without capability pairing:
+    - runtime/metadata: inherently self-contained (obfuscation, env reads, etc.)
+    - setup/npm: install-time threats are already execution-context specific
+    - HIGH specificity threats: malware-specific enough to stand alone
+    """
+    return (
+        threat.category in ("runtime", "metadata", "setup", "npm")
+        or threat.specificity == Level.HIGH
+    )
+
+
 def form_risks_from_findings(findings: List[Finding]) -> List[Risk]:
     """
     Form risks from findings in the same file
@@ -323,22 +421,22 @@ def form_risks_from_findings(findings: List[Finding]) -> List[Risk]:
             limited_findings.extend(rule_findings)
 
     # Now form risks from the limited findings
-    capabilities = [f for f in limited_findings if f.type == "capability"]
-    threats = [f for f in limited_findings if f.type == "threat"]
-
+    capabilities = []
+    threats = []
+    for finding in limited_findings:
+        finding_type = finding.type
+        if finding_type == "capability":
+            capabilities.append(finding)
+        elif finding_type == "threat":
+            threats.append(finding)
+    capability_index = CapabilityIndex(capabilities)
+
+    # Risk messages are only formatted when debug logging is on
+    debug = log.isEnabledFor(logging.DEBUG)
     risks = []
 
     for threat in threats:
-        # Standalone threat categories: form risks without capability pairing.
-        # - runtime/metadata: inherently self-contained (obfuscation, env reads, etc.)
-        # - setup/npm: install-time threats are already execution-context specific
-        # - HIGH specificity threats: malware-specific enough to stand alone
-        is_standalone = (
-            threat.category in ("runtime", "metadata", "setup", "npm")
-            or threat.specificity == Level.HIGH
-        )
-
-        if is_standalone:
+        if is_standalone_threat(threat):
             risks.append(
                 Risk(
                     category=threat.category,
@@ -355,31 +453,21 @@ def form_risks_from_findings(findings: List[Finding]) -> List[Risk]:
 
         # Find matching capability — prefer same file, then cross-file same category,
         # then cross-category (weaker correlation)
-        same_file_cap = None
-        cross_file_cap = None
-        cross_category_cap = None
-        for capability in capabilities:
-            if can_form_risk(threat, capability):
-                if capability.file_path == threat.file_path:
-                    same_file_cap = capability
-                    break
-                elif cross_file_cap is None:
-                    cross_file_cap = capability
-            elif cross_category_cap is None:
-                # Any capability can form a weak cross-category risk
-                cross_category_cap = capability
-
-        matched_cap = same_file_cap or cross_file_cap
+        matched_cap = capability_index.find_compatible(threat)
+        # Without any compatible capability, every capability can form a weak
+        # cross-category risk and the first one is used
+        cross_category_cap = capability_index.first
         if matched_cap:
             is_cross_file = matched_cap.file_path != threat.file_path
             risk_severity = threat.severity
             if is_cross_file:
                 risk_severity = _downgrade_severity(threat.severity)
-                log.debug(
-                    f"Cross-file risk: {threat.identifies} ({threat.file_path}) + "
-                    f"{matched_cap.identifies} ({matched_cap.file_path}) — "
-                    f"severity downgraded {threat.severity.value} → {risk_severity.value}"
-                )
+                if debug:
+                    log.debug(
+                        f"Cross-file risk: {threat.identifies} ({threat.file_path}) + "
+                        f"{matched_cap.identifies} ({matched_cap.file_path}) — "
+                        f"severity downgraded {threat.severity.value} → {risk_severity.value}"
+                    )
             risks.append(
                 Risk(
                     category=threat.category,
@@ -396,10 +484,11 @@ def form_risks_from_findings(findings: List[Finding]) -> List[Risk]:
             # Cross-category pairing: threat in one domain + capability in another
             # Downgrade severity by two levels (weaker signal)
             risk_severity = _downgrade_severity(_downgrade_severity(threat.severity))
-            log.debug(
-                f"Cross-category risk: {threat.identifies} + "
-                f"{cross_category_cap.identifies} — severity {risk_severity.value}"
-            )
+            if debug:
+                log.debug(
+                    f"Cross-category risk: {threat.identifies} + "
+                    f"{cross_category_cap.identifies} — severity {risk_severity.value}"
+                )
             risks.append(
                 Risk(
                     category=threat.category,
@@ -436,9 +525,9 @@ def get_primary_phase(risk: Risk) -> Optional[str]:
 
     primary_tactic = risk.mitre_tactics[0]
 
-    for phase, tactics in ATTACK_PHASES.items():
-        if primary_tactic in tactics:
-            return phase
+    phase = TACTIC_PHASES.get(primary_tactic)
+    if phase is not None:
+        return phase
 
     log.warning(f"Unknown MITRE tactic '{primary_tactic}' for risk {risk.name}")
     return None
@@ -501,6 +590,89 @@ def has_credential_access_with_exfil(risks: List[Risk]) -> bool:
     return has_credential_access and has_network_exfil
 
 
+def _score_from_factors(
+    max_severity: int,
+    num_stages: int,
+    dominant_specificity: Level,
+    dominant_sophistication: Level,
+    has_meaningful_specificity: bool,
+    distinct_threat_categories: int,
+    has_source_code_risks: bool,
+    explain: bool = True,
+) -> Tuple[float, Dict[str, float]]:
+    """
+    Weighs the scoring factors of a package and applies the score gates
+
+    Returns:
+        The score, and the weighted component of each factor
+    """
+    # NOTE: if you change these weights, update the Risk Scoring table in README.md
+    severity_component = (max_severity / 3.0) * 0.30
+
+    if num_stages >= 3:
+        chain_value = 1.0
+    elif num_stages == 2:
+        chain_value = 0.7
+    else:
+        chain_value = 0.4
+
+    chain_component = chain_value * 0.20
+    specificity_component = LEVEL_VALUES[dominant_specificity] * 0.30
+    sophistication_component = LEVEL_VALUES[dominant_sophistication] * 0.20
+
+    # Calculate final score
+    raw_score = (
+        severity_component
+        + chain_component
+        + specificity_component
+        + sophistication_component
+    )
+    final_score = round(raw_score * 10, 1)
+
+    # Specificity gate: LOW-specificity-only packages with few distinct threat
+    # categories are likely benign (legitimate libs using dangerous APIs).
+    # Skip the cap if ANY risk has HIGH or MEDIUM specificity (strong signal).
+    if (
+        dominant_specificity == Level.LOW
+        and not has_meaningful_specificity
+        and num_stages < 3
+        and distinct_threat_categories < 3
+    ):
+        cap = 4.9
+        if final_score > cap:
+            if explain:
+                log.debug(
+                    f"Score capped at {cap}: LOW-specificity, <3 threat categories, no full chain"
+                )
+            final_score = cap
+
+    # High-risk gate: require source code evidence to be labelled high_risk.
+    # Metadata-only signals never cross into "high_risk".
+    if final_score >= 7 and not has_source_code_risks:
+        final_score = 6.9
+        if explain:
+            log.debug("Score capped at 6.9: high_risk label requires source code risks")
+
+    return final_score, {
+        "severity_component": severity_component,
+        "chain_component": chain_component,
+        "specificity_component": specificity_component,
+        "sophistication_component": sophistication_component,
+    }
+
+
+def get_risk_label(score: float) -> RiskLabel:
+    """Maps a score to its risk label"""
+    if score == 0:
+        return RiskLabel.NO_RISKS_DETECTED
+    elif score < 5:
+        return RiskLabel.LOW
+    elif score < 7:
+        return RiskLabel.SUSPICIOUS
+    else:
+        return RiskLabel.HIGH_RISK
+
+
 def calculate_risk_score(risks: List[Risk]) -> RiskScore:
     """
     Calculate final risk score using Factor Rating method
@@ -532,9 +704,7 @@ def calculate_risk_score(risks: List[Risk]) -> RiskScore:
         )
 
     # Factor 1: Severity (30% weight -- strongest signal)
-    # NOTE: if you change these weights, update the Risk Scoring table in README.md
     max_severity = max(SEVERITY_VALUES[r.severity] for r in risks)
-    severity_component = (max_severity / 3.0) * 0.30
 
     # Factor 2: Attack Chain (20% weight)
     # Count distinct attack stages present
@@ -553,70 +723,31 @@ def calculate_risk_score(risks: List[Risk]) -> RiskScore:
         num_stages = 3
         log.debug("Treating credential-access + exfiltration as full chain")
 
-    if num_stages >= 3:
-        chain_value = 1.0
-    elif num_stages == 2:
-        chain_value = 0.7
-    else:
-        chain_value = 0.4
-
-    chain_component = chain_value * 0.20
-
     # Factor 3: Specificity (30% weight -- most discriminating factor)
     specificity_levels = [r.specificity for r in risks]
     dominant_specificity = get_dominant_level(specificity_levels)
-    specificity_component = LEVEL_VALUES[dominant_specificity] * 0.30
 
     # Factor 4: Sophistication (20% weight)
     sophistication_levels = [r.sophistication for r in risks]
     dominant_sophistication = get_dominant_level(sophistication_levels)
-    sophistication_component = LEVEL_VALUES[dominant_sophistication] * 0.20
 
-    # Calculate final score
-    raw_score = (
-        severity_component
-        + chain_component
-        + specificity_component
-        + sophistication_component
-    )
-    final_score = round(raw_score * 10, 1)
-
-    # Specificity gate: LOW-specificity-only packages with few distinct threat
-    # categories are likely benign (legitimate libs using dangerous APIs).
-    # Skip the cap if ANY risk has HIGH or MEDIUM specificity (strong signal).
     has_meaningful_specificity = any(
         r.specificity in (Level.HIGH, Level.MEDIUM) for r in risks
     )
     distinct_threat_categories = len(set(r.category for r in risks))
-    if (
-        dominant_specificity == Level.LOW
-        and not has_meaningful_specificity
-        and num_stages < 3
-        and distinct_threat_categories < 3
-    ):
-        cap = 4.9
-        if final_score > cap:
-            log.debug(
-                f"Score capped at {cap}: LOW-specificity, <3 threat categories, no full chain"
-            )
-            final_score = cap
-
-    # High-risk gate: require source code evidence to be labelled high_risk.
-    # Metadata-only signals never cross into "high_risk".
     has_source_code_risks = any(r.category != "metadata" for r in risks)
-    if final_score >= 7 and not has_source_code_risks:
-        final_score = 6.9
-        log.debug("Score capped at 6.9: high_risk label requires source code risks")
-
-    # Map score to label
-    if final_score == 0:
-        label = RiskLabel.NO_RISKS_DETECTED
-    elif final_score < 5:
-        label = RiskLabel.LOW
-    elif final_score < 7:
-        label = RiskLabel.SUSPICIOUS
-    else:
-        label = RiskLabel.HIGH_RISK
+
+    final_score, components = _score_from_factors(
+        max_severity,
+        num_stages,
+        dominant_specificity,
+        dominant_sophistication,
+        has_meaningful_specificity,
+        distinct_threat_categories,
+        has_source_code_risks,
+    )
+
+    label = get_risk_label(final_score)
 
     # Collect all findings
     all_findings = []
@@ -631,10 +762,7 @@ def calculate_risk_score(risks: List[Risk]) -> RiskScore:
         risks=risks,
         findings=all_findings,
         score_breakdown={
-            "severity_component": round(severity_component, 3),
-            "chain_component": round(chain_component, 3),
-            "specificity_component": round(specificity_component, 3),
-            "sophistication_component": round(sophistication_component, 3),
+            **{name: round(value, 3) for name, value in components.items()},
             "num_stages": num_stages,
             "has_source_code_risks": has_source_code_risks,
             "max_severity": max_severity,
@@ -642,3 +770,219 @@ def calculate_risk_score(risks: List[Risk]) -> RiskScore:
             "dominant_sophistication": dominant_sophistication.value,
         },
     )
+
+
+# ============================================================================
+# Incremental Scoring
+# ============================================================================
+
+
+def _bound_dominant_level(
+    levels: List[Level], added: List[Tuple[Level, Optional[int]]], lowest: bool
+) -> Level:
+    """
+    Lowest or highest dominant level of levels once some of the added levels
+    are added, each up to its count (None = unbounded)
+    """
+    low = sum(1 for level in levels if level == Level.LOW)
+    high = sum(1 for level in levels if level == Level.HIGH)
+    total = len(levels)
+
+    if lowest:
+        # Adding as many low levels as possible is the worst case
+        counts = [count for level, count in added if level == Level.LOW]
+        if None in counts:
+            return Level.LOW
+        low += sum(counts)
+        total += sum(counts)
+    else:
+        # Adding every other level is the best case
+        others = [(level, count) for level, count in added if level != Level.LOW]
+        high += sum(1 for level, _ in others if level == Level.HIGH)
+        if any(count is None for _, count in others):
+            return Level.HIGH if high else Level.MEDIUM
+        total += sum(count for _, count in others)
+
+    if not total:
+        return Level.MEDIUM
+    if low > total / 2:
+        return Level.LOW
+    return Level.HIGH if high else Level.MEDIUM
+
+
+def _count_attack_stages(
+    tactics_and_categories: List[Tuple[Sequence[str], str]],
+) -> int:
+    stages = {
+        TACTIC_PHASES[tactics[0]]
+        for tactics, _ in tactics_and_categories
+        if tactics and tactics[0] in TACTIC_PHASES
+    }
+    has_credential_access = any(
+        "credential-access" in tactics for tactics, _ in tactics_and_categories
+    )
+    has_network_exfil = any(
+        category == "network"
+        and any(t in ["exfiltration", "command-and-control"] for t in tactics)
+        for tactics, category in tactics_and_categories
+    )
+    if len(stages) < 3 and has_credential_access and has_network_exfil:
+        return 3
+    return len(stages)
+
+
+class IncrementalRiskScorer:
+    """
+    Risk score of a package, updated finding by finding
+
+    Besides the current score, bounds the score the package can still reach once
+    the rules that haven't run yet report their findings, so that a scan can
+    stop as soon as its verdict is decided.
+    """
+
+    def __init__(self):
+        self.findings: List[Finding] = []
+        self._hits: Counter = Counter()
+        self._risks: Optional[List[Risk]] = None
+
+    def add(self, finding: Finding) -> None:
+        """Adds a finding, past the max_hits of its rule it is ignored"""
+        if (
+            finding.max_hits is not None
+            and self._hits[finding.rule_name] >= finding.max_hits
+        ):
+            return
+        self._hits[finding.rule_name] += 1
+        self.findings.append(finding)
+        self._risks = None
+
+    def add_all(self, findings: List[Finding]) -> None:
+        for finding in findings:
+            self.add(finding)
+
+    @property
+    def risks(self) -> List[Risk]:
+        if self._risks is None:
+            self._risks = form_risks_from_findings(self.findings)
+        return self._risks
+
+    def score(self) -> RiskScore:
+        return calculate_risk_score(self.risks)
+
+    def score_bounds(self, pending: List[Finding]) -> Tuple[float, float]:
+        """
+        Returns the lowest and highest score the package can reach
+
+        Risks only get added, and existing risks only get more severe, as
+        findings come in. The score can still decrease when the added risks
+        make low specificity or sophistication dominant, which the lowest score
+        accounts for.
+
+        Args:
+            pending: one finding for each rule that hasn't run yet, standing for
+                the findings it can report up to its max_hits (None = unbounded)
+        """
+        risks = self.risks
+        capability_pending = any(f.type == "capability" for f in pending)
+        has_capability = capability_pending or any(
+            f.type == "capability" for f in self.findings
+        )
+
+        # Risks that may still form, and how many of each: threats without a
+        # capability yet, and the threats of the pending rules
+        paired_threats = {id(risk.threat_finding) for risk in risks}
+        potential: List[Tuple[Finding, Optional[int]]] = [
+            (finding, 1)
+            for finding in self.findings
+            if capability_pending
+            and finding.type == "threat"
+            and id(finding) not in paired_threats
+        ] + [
+            (finding, finding.max_hits)
+            for finding in pending
+            if finding.type == "threat"
+            and (has_capability or is_standalone_threat(finding))
+        ]
+        return (
+            self._lowest_score(risks, potential),
+            self._highest_score(risks, potential, capability_pending),
+        )
+
+    @staticmethod
+    def _lowest_score(
+        risks: List[Risk], potential: List[Tuple[Finding, Optional[int]]]
+    ) -> float:
+        if not risks:
+            return 0.0
+        score, _ = _score_from_factors(
+            max(SEVERITY_VALUES[r.severity] for r in risks),
+            _count_attack_stages([(r.mitre_tactics, r.category) for r in risks]),
+            _bound_dominant_level(
+                [r.specificity for r in risks],
+                [(f.specificity, count) for f, count in potential],
+                lowest=True,
+            ),
+            _bound_dominant_level(
+                [r.sophistication for r in risks],
+                [(f.sophistication, count) for f, count in potential],
+                lowest=True,
+            ),
+            any(r.specificity in (Level.HIGH, Level.MEDIUM) for r in risks),
+            len(set(r.category for r in risks)),
+            any(r.category != "metadata" for r in risks),
+            explain=False,
+        )
+        return score
+
+    @staticmethod
+    def _highest_score(
+        risks: List[Risk],
+        potential: List[Tuple[Finding, Optional[int]]],
+        capability_pending: bool,
+    ) -> float:
+        if not risks and not potential:
+            return 0.0
+        # A pending capability can pair a threat in its file, undoing the
+        # downgrade of cross-file and cross-category risks
+        severities = [
+            r.threat_finding.severity if capability_pending else r.severity
+            for r in risks
+        ] + [f.severity for f, _ in potential]
+        tactics_and_categories = [(r.mitre_tactics, r.category) for r in risks] + [
+            (f.mitre_tactics, f.category) for f, _ in potential
+        ]
+        specificities = [r.specificity for r in risks] + [
+            f.specificity for f, _ in potential
+        ]
+        score, _ = _score_from_factors(
+            max(SEVERITY_VALUES[severity] for severity in severities),
+            _count_attack_stages(tactics_and_categories),
+            _bound_dominant_level(
+                [r.specificity for r in risks],
+                [(f.specificity, count) for f, count in potential],
+                lowest=False,
+            ),
+            _bound_dominant_level(
+                [r.sophistication for r in risks],
+                [(f.sophistication, count) for f, count in potential],
+                lowest=False,
+            ),
+            any(level in (Level.HIGH, Level.MEDIUM) for level in specificities),
+            len(set(category for _, category in tactics_and_categories)),
+            any(category != "metadata" for _, category in tactics_and_categories),
+            explain=False,
+        )
+        return score
+
+    def reaches(self, label: RiskLabel, pending: List[Finding]) -> Optional[bool]:
+        """
+        Returns whether the package reaches a risk label, None while the
+        pending rules can still change the answer
+        """
+        lowest, highest = self.score_bounds(pending)
+        rank = list(RiskLabel).index
+        if rank(get_risk_label(lowest)) >= rank(label):
+            return True
+        if rank(get_risk_label(highest)) < rank(label):
+            return False
+        return None
@@ -0,0 +1,243 @@
+"""
+Risk metadata of the source code rules and metadata detectors
+
+The identifies, levels and MITRE tactics of each rule are validated and
+normalized once per ecosystem, into a read-only table. Converting the results
+of a package into findings is then a lookup in that table.
+"""
+
+import logging
+import math
+from dataclasses import dataclass
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from guarddog.analyzer.metadata import get_metadata_detectors
+from guarddog.analyzer.risk_engine import (
+    LEVEL_VALUES,
+    SEVERITY_VALUES,
+    Finding,
+    Level,
+    parse_identifies,
+    validate_identifies,
+    validate_mitre_tactics,
+)
+from guarddog.analyzer.sourcecode import get_sourcecode_rules
+from guarddog.ecosystems import ECOSYSTEM
+
+log = logging.getLogger("guarddog")
+
+# Number of batches the rules of a scan stopping at a verdict run in. Every
+# batch of source code rules is one more pass over the files of the package
+EARLY_EXIT_BATCHES = 3
+
+
+@dataclass(frozen=True, slots=True)
+class RuleRiskMetadata:
+    """
+    Normalized risk metadata of a rule
+
+    Attributes:
+        identifies: What the rule detects (e.g., "threat.network.outbound")
+        severity: Impact level
+        mitre_tactics: MITRE ATT&CK tactics, shared by the findings of the rule
+            and immutable for that reason
+        specificity: Pattern specificity
+        sophistication: Technique advancement level
+        max_hits: Maximum number of risks to form from the rule (None = unlimited)
+    """
+
+    identifies: str
+    severity: Level
+    mitre_tactics: Tuple[str, ...]
+    specificity: Level
+    sophistication: Level
+    max_hits: Optional[int] = None
+
+
+def _parse_level(label: str, field_name: str, value: Optional[str]) -> Level:
+    if not value:
+        return Level.MEDIUM
+    try:
+        return Level(value)
+    except ValueError:
+        log.warning(f"{label} has invalid {field_name}: {value}, using MEDIUM")
+        return Level.MEDIUM
+
+
+def normalize_risk_metadata(
+    label: str,
+    identifies: Optional[str],
+    severity: Optional[str],
+    mitre_tactics: Sequence[str],
+    specificity: Optional[str],
+    sophistication: Optional[str],
+    max_hits: Optional[int] = None,
+) -> Optional[RuleRiskMetadata]:
+    """
+    Validates and normalizes the risk metadata of a rule
+
+    Args:
+        label: name of the rule in warnings, e.g. "Rule shady-links"
+
+    Returns:
+        The normalized metadata, None if the rule has no valid identifies and
+        can't form risks
+    """
+    if not identifies:
+        return None
+
+    if not validate_identifies(identifies):
+        log.warning(f"{label} has invalid 'identifies' field: {identifies}")
+        return None
+
+    if mitre_tactics and not validate_mitre_tactics(mitre_tactics):
+        log.warning(f"{label} has invalid MITRE tactics")
+
+    return RuleRiskMetadata(
+        identifies=identifies,
+        severity=_parse_level(label, "severity", severity),
+        mitre_tactics=tuple(mitre_tactics),
+        specificity=_parse_level(label, "specificity", specificity),
+        sophistication=_parse_level(label, "sophistication", sophistication),
+        max_hits=max_hits,
+    )
+
+
+@lru_cache(maxsize=None)
+def get_sourcecode_risk_metadata(
+    ecosystem: ECOSYSTEM,
+) -> Mapping[str, RuleRiskMetadata]:
+    """
+    Returns the risk metadata of the source code rules of an ecosystem, by rule id
+    """
+    table = {}
+    for rule in get_sourcecode_rules(ecosystem):
+        metadata = normalize_risk_metadata(
+            f"Rule {rule.id}",
+            rule.identifies,
+            rule.severity,
+            rule.mitre_tactics or [],
+            rule.specificity,
+            rule.sophistication,
+            rule.max_hits,
+        )
+        if metadata is not None:
+            table[rule.id] = metadata
+    return MappingProxyType(table)
+
+
+@lru_cache(maxsize=None)
+def get_metadata_risk_metadata(
+    ecosystem: ECOSYSTEM,
+) -> Mapping[str, RuleRiskMetadata]:
+    """
+    Returns the risk metadata of the metadata detectors of an ecosystem, by rule name
+    """
+    table = {}
+    for rule_name, detector in get_metadata_detectors(ecosystem).items():
+        metadata = normalize_risk_metadata(
+            f"Metadata rule {rule_name}",
+            detector.identifies,
+            detector.severity,
+            [t.strip() for t in (detector.mitre_tactics or "").split(",") if t.strip()],
+            detector.specificity,
+            detector.sophistication,
+            # A metadata rule reports a single finding
+            max_hits=1,
+        )
+        if metadata is not None:
+            table[rule_name] = metadata
+    return MappingProxyType(table)
+
+
+def get_expected_value(metadata: RuleRiskMetadata) -> float:
+    """
+    Weight of the risks a rule can form in the score of a package: its
+    severity, specificity and sophistication, weighed like the scoring factors
+    """
+    return (
+        SEVERITY_VALUES[metadata.severity] / 3.0 * 0.30
+        + LEVEL_VALUES[metadata.specificity] * 0.30
+        + LEVEL_VALUES[metadata.sophistication] * 0.20
+    )
+
+
+def get_pending_finding(rule_name: str, metadata: RuleRiskMetadata) -> Finding:
+    """
+    Returns a finding standing for the findings a rule that hasn't run yet can
+    report, up to its max_hits
+    """
+    return Finding(
+        rule_name=rule_name,
+        file_path="",
+        identifies=metadata.identifies,
+        severity=metadata.severity,
+        mitre_tactics=metadata.mitre_tactics,
+        specificity=metadata.specificity,
+        sophistication=metadata.sophistication,
+        max_hits=metadata.max_hits,
+    )
+
+
+def plan_rule_batches(
+    ecosystem: ECOSYSTEM,
+    metadata_rules: Iterable[str],
+    sourcecode_rules: Iterable[str],
+    batch_count: int = EARLY_EXIT_BATCHES,
+) -> List[Tuple[set[str], set[str]]]:
+    """
+    Splits the rules of a scan in batches, by decreasing expected value per cost
+
+    Capabilities only form risks along with threats of their category, and take
+    the expected value of the best of these threats. Rules without risk metadata
+    can't change the score and run last. Source code rules cost their match_cost,
+    metadata rules run once per package and cost 1.
+
+    Returns:
+        list[tuple[set, set]]: metadata rules and source code rules of each batch
+    """
+    rule_costs = {rule.id: rule.match_cost for rule in get_sourcecode_rules(ecosystem)}
+    metadata_rules = set(metadata_rules)
+    sourcecode_rules = set(sourcecode_rules)
+    risk_metadata = {
+        rule_name: metadata
+        for rule_name, metadata in get_sourcecode_risk_metadata(ecosystem).items()
+        if rule_name in sourcecode_rules
+    } | {
+        rule_name: metadata
+        for rule_name, metadata in get_metadata_risk_metadata(ecosystem).items()
+        if rule_name in metadata_rules
+    }
+
+    threat_values: dict[str, float] = {}
+    for metadata in risk_metadata.values():
+        kind, category, _ = parse_identifies(metadata.identifies)
+        if kind == "threat":
+            threat_values[category] = max(
+                threat_values.get(category, 0.0), get_expected_value(metadata)
+            )
+
+    def priority(rule_name: str) -> float:
+        metadata = risk_metadata.get(rule_name)
+        if metadata is None:
+            return 0.0
+        kind, category, _ = parse_identifies(metadata.identifies)
+        if kind == "threat":
+            value = get_expected_value(metadata)
+        else:
+            value = threat_values.get(category, 0.0)
+        return value / rule_costs.get(rule_name, 1)
+
+    ordered = sorted(metadata_rules | sourcecode_rules, key=priority, reverse=True)
+    batch_size = max(1, math.ceil(len(ordered) / batch_count))
+    return [
+        (
+            {rule for rule in batch if rule in metadata_rules},
+            {rule for rule in batch if rule in sourcecode_rules},
+        )
+        for batch in (
+            ordered[i : i + batch_size] for i in range(0, len(ordered), batch_size)
+        )
+    ]
@@ -0,0 +1,122 @@
+"""
+Scope of the source code rules over the files of a package
+
+Most rules only apply to a few file extensions or to well-known files
+(package.json, setup.py). The rules are indexed by the extensions and base
+names their path_include patterns name, so each file of the manifest is
+classified once and only checked against the rules that can apply to it.
+"""
+
+import re
+from collections import defaultdict
+from typing import Optional
+
+from guarddog.analyzer.file_manifest import FileEntry
+from guarddog.analyzer.sourcecode import SourceCodeRule
+from guarddog.utils.config import YARA_EXT_EXCLUDE
+
+# "*.js", "*.min.js": the rule applies to files with a given extension
+_EXTENSION_PATTERN = re.compile(r"\*\.([^*?\[\]/]+)")
+# "setup.py", "*/setup.py": the rule applies to files with a given base name
+_NAME_PATTERN = re.compile(r"(?:\*/)?([^*?\[\]/]+)")
+
+
+def rule_applies(rule: Optional[SourceCodeRule], entry: FileEntry) -> bool:
+    """
+    Check whether a source code rule should run against a file of the manifest
+
+    Args:
+        rule: Rule metadata (path_include / path_exclude patterns)
+        entry: File of the package manifest
+
+    Returns:
+        True if the file is in the scope of the rule, False otherwise
+    """
+    path_include = rule.path_include_regex if rule else None
+    path_exclude = rule.path_exclude_regex if rule else None
+
+    # Check path_include patterns if specified (takes precedence)
+    if path_include is not None:
+        if not path_include.match(entry.relpath):
+            return False
+    else:
+        # Default: Skip files with excluded extensions
+        if entry.name.lower().endswith(tuple(YARA_EXT_EXCLUDE)):
+            return False
+
+    # Check path_exclude patterns
+    if path_exclude is not None:
+        if path_exclude.match(entry.relpath) or path_exclude.match(entry.name):
+            return False
+
+    return True
+
+
+def _file_extension(name: str) -> Optional[str]:
+    return name.rsplit(".", 1)[1] if "." in name else None
+
+
+class RuleScopeIndex:
+    """
+    Rules that can apply to a file, by file extension and base name
+
+    Candidates are then confirmed against the compiled path filters of each
+    rule, so the index never changes which rules apply to a file.
+
+    Attributes:
+        rules: rule metadata, by rule name (None when a rule has no metadata)
+        by_extension: rules naming a file extension in their path_include
+        by_name: rules naming a base name in their path_include
+        unindexed: rules that may apply to any file
+    """
+
+    def __init__(self, rules: dict[str, Optional[SourceCodeRule]]):
+        self.rules = rules
+        self.by_extension: defaultdict[str, set[str]] = defaultdict(set)
+        self.by_name: defaultdict[str, set[str]] = defaultdict(set)
+        self.unindexed: set[str] = set()
+
+        for rule_name, rule in rules.items():
+            if rule is None or not rule.path_include:
+                self.unindexed.add(rule_name)
+                continue
+
+            keys = []
+            for pattern in rule.path_include.split(","):
+                pattern = pattern.strip()
+                if match := _EXTENSION_PATTERN.fullmatch(pattern):
+                    # A file ending with ".min.js" has the extension "js"
+                    keys.append((self.by_extension, match.group(1).rsplit(".", 1)[-1]))
+                elif match := _NAME_PATTERN.fullmatch(pattern):
+                    keys.append((self.by_name, match.group(1)))
+                else:
+                    # Any other glob could match any file
+                    keys = []
+                    break
+
+            if not keys:
+                self.unindexed.add(rule_name)
+            for index, key in keys:
+                index[key].add(rule_name)
+
+    def candidates(self, entry: FileEntry) -> set[str]:
+        """
+        Returns the rules whose path_include may accept a file
+        """
+        candidates = set(self.unindexed)
+        extension = _file_extension(entry.name)
+        if extension is not None and extension in self.by_extension:
+            candidates |= self.by_extension[extension]
+        if entry.name in self.by_name:
+            candidates |= self.by_name[entry.name]
+        return candidates
+
+    def rules_for(self, entry: FileEntry) -> set[str]:
+        """
+        Returns the rules that apply to a file of the manifest
+        """
+        return {
+            rule_name
+            for rule_name in self.candidates(entry)
+            if rule_applies(self.rules[rule_name], entry)
+        }
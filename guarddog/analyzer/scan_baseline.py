@@ -0,0 +1,114 @@
+"""
+Baseline of a previously scanned version of a package
+
+Consecutive versions of a package share almost every file. A scan can record the
+SHA-256 of each file of the package (the file_manifest section of its report);
+scanning the next version against that report then only runs the source code
+rules on added and modified files, and carries the findings of unchanged files
+over from the report.
+
+Archives usually extract to a versioned top directory (pkg-1.4.0/, mod@v1.4.0/):
+files are compared by their path relative to the directory shared by every file
+of the package, and findings carried over are moved under the new one.
+"""
+
+import os
+from dataclasses import dataclass
+from typing import Iterable
+
+
+def finding_path(finding: dict) -> str:
+    """
+    Returns the path of the file of a source code finding, from its location
+    """
+    return finding.get("location", "").rsplit(":", 1)[0]
+
+
+def package_root(relpaths: Iterable[str]) -> str:
+    """
+    Returns the top directory shared by every file of a package, "" if files
+    are at the top level or in several top directories
+    """
+    roots = set()
+    for relpath in relpaths:
+        parts = relpath.replace(os.sep, "/").split("/", 1)
+        roots.add(parts[0] if len(parts) == 2 else "")
+        if len(roots) > 1:
+            return ""
+    return roots.pop() if roots else ""
+
+
+def relative_to_root(relpath: str, root: str) -> str:
+    """
+    Returns the path of a file relative to the top directory of its package
+    """
+    if root and relpath.replace(os.sep, "/").startswith(root + "/"):
+        return relpath[len(root) + 1 :]
+    return relpath
+
+
+@dataclass
+class ScanBaseline:
+    """
+    Files and source code findings of a previously scanned version
+
+    Attributes:
+        ruleset: fingerprint of the source code rules the version was scanned with
+        files: SHA-256 of each file, by path relative to the package root
+        results: findings of the version, by rule
+        root: top directory shared by the files of the version, "" if none
+    """
+
+    ruleset: str
+    files: dict[str, str]
+    results: dict[str, list[dict]]
+    root: str = ""
+
+    @classmethod
+    def from_report(cls, report: dict) -> "ScanBaseline":
+        """
+        Reads the baseline from the JSON report of a scan
+
+        Raises:
+            ValueError: the scan did not record its file manifest
+        """
+        file_manifest = report.get("file_manifest")
+        if not file_manifest:
+            raise ValueError(
+                "the report has no file manifest, scan the version with --record-manifest"
+            )
+        return cls(
+            ruleset=file_manifest["ruleset"],
+            files=file_manifest["files"],
+            results={
+                rule_name: findings
+                for rule_name, findings in report.get("results", {}).items()
+                if isinstance(findings, list)
+            },
+            root=file_manifest.get("root", ""),
+        )
+
+    def findings_in(self, relpaths: set[str], root: str = "") -> dict[str, list[dict]]:
+        """
+        Returns the findings of the baseline located in some of its files
+
+        Args:
+            relpaths: paths of the files, relative to the package root
+            root: top directory of the scanned version, the findings are
+                located under it
+        """
+        moved: dict[str, list[dict]] = {}
+        for rule_name, findings in self.results.items():
+            moved[rule_name] = []
+            for finding in findings:
+                path = finding_path(finding)
+                relpath = relative_to_root(path, self.root)
+                if relpath not in relpaths:
+                    continue
+                if root != self.root:
+                    location = os.path.join(root, relpath) if root else relpath
+                    finding = finding | {
+                        "location": location + finding["location"][len(path) :]
+                    }
+                moved[rule_name].append(finding)
+        return moved
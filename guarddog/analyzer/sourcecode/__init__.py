@@ -1,15 +1,42 @@
+import hashlib
+import json
+import logging
 import os
 import re
 import pathlib
-from dataclasses import dataclass
+import tempfile
+from dataclasses import dataclass, field
+from fnmatch import translate
+from functools import lru_cache
 from typing import Optional, Iterable, List
 
 from guarddog.ecosystems import ECOSYSTEM
 
+log = logging.getLogger("guarddog")
+
 current_dir = pathlib.Path(__file__).parent.resolve()
 
 EXTENSION_YARA_PREFIX = "extension_"
 
+
+def compile_path_patterns(patterns: Optional[str]) -> Optional[re.Pattern]:
+    """
+    Compiles comma-separated glob patterns into a single regular expression
+
+    Matching a path against the compiled expression is equivalent to calling
+    fnmatch on each pattern, without splitting and translating them every time.
+
+    Args:
+        patterns: Glob patterns, e.g. "*.min.js,dist/*"
+
+    Returns:
+        The compiled expression, or None if there are no patterns
+    """
+    if not patterns:
+        return None
+    return re.compile("|".join(translate(p.strip()) for p in patterns.split(",")))
+
+
 # These data class aim to reduce the spreading of the logic
 # Instead of using the a dict as a structure and parse it difffently
 # depending on the type
@@ -31,6 +58,12 @@ class SourceCodeRule:
         specificity: Pattern specificity - how specific to malware vs legitimate code (low/medium/high)
         sophistication: Technique advancement (low/medium/high)
         max_hits: Maximum number of risks to form from this rule per file (None = unlimited)
+        path_include: Glob patterns of the files the rule applies to
+        path_exclude: Glob patterns of the files the rule never applies to
+        path_include_regex: path_include compiled once, when the rule is loaded
+        path_exclude_regex: path_exclude compiled once, when the rule is loaded
+        match_cost: Relative cost of matching the rule, 1 plus its number of
+            regular expressions, which dominate the match time of YARA rules
     """
 
     id: str
@@ -49,6 +82,18 @@ class SourceCodeRule:
     )
     path_include: Optional[str] = None  # Glob patterns: "*/package.json,*/setup.py"
     path_exclude: Optional[str] = None  # Glob patterns: "*.min.js,dist/*"
+    match_cost: int = 1
+
+    path_include_regex: Optional[re.Pattern] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    path_exclude_regex: Optional[re.Pattern] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self):
+        self.path_include_regex = compile_path_patterns(self.path_include)
+        self.path_exclude_regex = compile_path_patterns(self.path_exclude)
 
 
 @dataclass
@@ -56,6 +101,15 @@ class YaraRule(SourceCodeRule):
     pass
 
 
+@dataclass
+class HashRule(SourceCodeRule):
+    """
+    Rule matching whole files by their hash, against the hash reputation index
+    """
+
+    pass
+
+
 def get_sourcecode_rules(
     ecosystem: ECOSYSTEM, kind: Optional[type] = None
 ) -> Iterable[SourceCodeRule]:
@@ -65,7 +119,7 @@ def get_sourcecode_rules(
         ecosystem: The ecosystem to filter for if rules are ecosystem specific
         kind: The kind of rule to filter for
     """
-    for rule in SOURCECODE_RULES:
+    for rule in load_sourcecode_rules():
         if kind and not isinstance(rule, kind):
             continue
         # Include rules that match the specific ecosystem OR rules that apply to any ecosystem (None)
@@ -74,14 +128,10 @@ def get_sourcecode_rules(
         yield rule
 
 
-SOURCECODE_RULES: list[SourceCodeRule] = list()
-
-yara_rule_file_names = list(
-    filter(lambda x: x.endswith("yar"), os.listdir(current_dir))
-)
-# all yar files placed in the sourcecode directory are loaded as YARA rules
-# refer to README.md for more information
-for file_name in yara_rule_file_names:
+def parse_yara_rule(file_name: str, content: str) -> YaraRule:
+    """
+    Extracts the metadata of a YARA rule from the source of its .yar file
+    """
     rule_id = pathlib.Path(file_name).stem
 
     # Determine ecosystem based on filename prefix
@@ -89,68 +139,231 @@ for file_name in yara_rule_file_names:
         ECOSYSTEM.EXTENSION if file_name.startswith(EXTENSION_YARA_PREFIX) else None
     )
 
-    with open(os.path.join(current_dir, file_name), "r") as fd:
-        content = fd.read()
+    # Extract description
+    # rule_id uses hyphens but YARA rule names use underscores
+    yara_rule_name = rule_id.replace("-", "_")
+    description_match = re.search(
+        rf"\s*rule\s+{yara_rule_name}[^}}]+meta:[^}}]+description\s*=\s*\"(.+?)\"",
+        content,
+    )
+    rule_description = description_match.group(1) if description_match else ""
+
+    # Extract new risk-based metadata fields
+    identifies_match = re.search(r"identifies\s*=\s*\"(.+?)\"", content)
+    identifies = identifies_match.group(1) if identifies_match else None
+
+    severity_match = re.search(r"severity\s*=\s*\"(.+?)\"", content)
+    severity = severity_match.group(1) if severity_match else None
+
+    specificity_match = re.search(r"specificity\s*=\s*\"(.+?)\"", content)
+    specificity = specificity_match.group(1) if specificity_match else None
+
+    sophistication_match = re.search(r"sophistication\s*=\s*\"(.+?)\"", content)
+    sophistication = sophistication_match.group(1) if sophistication_match else None
+
+    # Extract MITRE tactics (comma-separated string format)
+    # For capabilities without tactics, default to empty list
+    mitre_tactics = []
+    tactics_match = re.search(r"mitre_tactics\s*=\s*\"(.+?)\"", content)
+    if tactics_match:
+        tactics_str = tactics_match.group(1)
+        # Parse comma-separated values
+        if tactics_str.strip():
+            mitre_tactics = [t.strip() for t in tactics_str.split(",") if t.strip()]
+
+    # Extract max_hits (integer or None)
+    max_hits = None
+    max_hits_match = re.search(r"max_hits\s*=\s*(\d+)", content)
+    if max_hits_match:
+        max_hits = int(max_hits_match.group(1))
+
+    # Extract path_include (glob patterns)
+    path_include_match = re.search(r"path_include\s*=\s*\"(.+?)\"", content)
+    path_include = path_include_match.group(1) if path_include_match else None
+
+    # Extract path_exclude (glob patterns)
+    path_exclude_match = re.search(r"path_exclude\s*=\s*\"(.+?)\"", content)
+    path_exclude = path_exclude_match.group(1) if path_exclude_match else None
+
+    # Regular expression strings, e.g. $re = /eval\(.+\)/
+    regex_count = len(re.findall(r"\$\w*\s*=\s*/", content))
+
+    return YaraRule(
+        id=rule_id,
+        file=file_name,
+        description=rule_description,
+        ecosystem=rule_ecosystem,
+        identifies=identifies,
+        severity=severity,
+        mitre_tactics=mitre_tactics,
+        specificity=specificity,
+        sophistication=sophistication,
+        max_hits=max_hits,
+        path_include=path_include,
+        path_exclude=path_exclude,
+        match_cost=1 + regex_count,
+    )
+
 
-        # Extract description
-        # rule_id uses hyphens but YARA rule names use underscores
-        yara_rule_name = rule_id.replace("-", "_")
-        description_match = re.search(
-            rf"\s*rule\s+{yara_rule_name}[^}}]+meta:[^}}]+description\s*=\s*\"(.+?)\"",
-            content,
+# Rule manifest
+#
+# Parsing the metadata of every .yar file is done once, when the package is
+# built, into a JSON manifest keyed by rule file. Loading the rules then only
+# hashes each file to check its manifest entry is still current, and parses the
+# files that were added or modified since the manifest was generated.
+
+RULES_MANIFEST_PATH = os.path.join(current_dir, "rules-manifest.json")
+RULES_MANIFEST_VERSION = 1
+
+# Fields of a YaraRule stored in its manifest entry, along with the sha256 of
+# its file. The file name keys the entry and the ecosystem is stored by value
+_MANIFEST_FIELDS = (
+    "id",
+    "description",
+    "identifies",
+    "severity",
+    "mitre_tactics",
+    "specificity",
+    "sophistication",
+    "max_hits",
+    "path_include",
+    "path_exclude",
+    "match_cost",
+)
+
+
+def get_yara_rule_file_names() -> list[str]:
+    # all yar files placed in the sourcecode directory are loaded as YARA rules
+    # refer to README.md for more information
+    return [name for name in os.listdir(current_dir) if name.endswith("yar")]
+
+
+def _manifest_entry(rule: YaraRule, digest: str) -> dict:
+    entry = {name: getattr(rule, name) for name in _MANIFEST_FIELDS}
+    entry["ecosystem"] = rule.ecosystem.value if rule.ecosystem else None
+    entry["sha256"] = digest
+    return entry
+
+
+def _rule_from_manifest_entry(file_name: str, entry: dict) -> YaraRule:
+    return YaraRule(
+        file=file_name,
+        ecosystem=ECOSYSTEM(entry["ecosystem"]) if entry["ecosystem"] else None,
+        **{name: entry[name] for name in _MANIFEST_FIELDS},
+    )
+
+
+def build_rules_manifest() -> dict:
+    """
+    Parses every .yar file of the sourcecode directory into a rule manifest
+    """
+    rules = {}
+    for file_name in sorted(get_yara_rule_file_names()):
+        with open(os.path.join(current_dir, file_name), "rb") as f:
+            content = f.read()
+        rule = parse_yara_rule(file_name, content.decode())
+        rules[file_name] = _manifest_entry(rule, hashlib.sha256(content).hexdigest())
+    return {"version": RULES_MANIFEST_VERSION, "rules": rules}
+
+
+def write_rules_manifest(path: str = RULES_MANIFEST_PATH) -> dict:
+    """
+    Generates the rule manifest, atomically replacing any previous one
+
+    Returns:
+        dict: the manifest
+    """
+    manifest = build_rules_manifest()
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+            f.write("\n")
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return manifest
+
+
+def read_rules_manifest(path: str = RULES_MANIFEST_PATH) -> dict[str, dict]:
+    """
+    Returns the entries of the rule manifest by rule file, none if the manifest
+    is missing or was generated by another version of the format
+    """
+    try:
+        with open(path, "r") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        log.debug(f"Unable to read the rule manifest {path}: {e}")
+        return {}
+    if manifest.get("version") != RULES_MANIFEST_VERSION:
+        log.debug(f"Ignoring the rule manifest {path}, generated by another version")
+        return {}
+    return manifest["rules"]
+
+
+def load_yara_rules(
+    manifest_path: Optional[str] = RULES_MANIFEST_PATH,
+) -> list[YaraRule]:
+    """
+    Loads the YARA rules from the rule manifest, parsing the .yar files the
+    manifest has no current entry for
+
+    Args:
+        manifest_path: path of the rule manifest, None to parse every file
+    """
+    manifest = read_rules_manifest(manifest_path) if manifest_path else {}
+    rules = []
+    stale = []
+    for file_name in get_yara_rule_file_names():
+        with open(os.path.join(current_dir, file_name), "rb") as f:
+            content = f.read()
+        entry = manifest.get(file_name)
+        if entry is not None and entry["sha256"] == hashlib.sha256(content).hexdigest():
+            rules.append(_rule_from_manifest_entry(file_name, entry))
+        else:
+            stale.append(file_name)
+            rules.append(parse_yara_rule(file_name, content.decode()))
+
+    if stale:
+        log.debug(
+            f"The rule manifest is stale for {len(stale)} rule(s), parsed them instead: "
+            + ", ".join(stale)
         )
-        rule_description = description_match.group(1) if description_match else ""
-
-        # Extract new risk-based metadata fields
-        identifies_match = re.search(r"identifies\s*=\s*\"(.+?)\"", content)
-        identifies = identifies_match.group(1) if identifies_match else None
-
-        severity_match = re.search(r"severity\s*=\s*\"(.+?)\"", content)
-        severity = severity_match.group(1) if severity_match else None
-
-        specificity_match = re.search(r"specificity\s*=\s*\"(.+?)\"", content)
-        specificity = specificity_match.group(1) if specificity_match else None
-
-        sophistication_match = re.search(r"sophistication\s*=\s*\"(.+?)\"", content)
-        sophistication = sophistication_match.group(1) if sophistication_match else None
-
-        # Extract MITRE tactics (comma-separated string format)
-        # For capabilities without tactics, default to empty list
-        mitre_tactics = []
-        tactics_match = re.search(r"mitre_tactics\s*=\s*\"(.+?)\"", content)
-        if tactics_match:
-            tactics_str = tactics_match.group(1)
-            # Parse comma-separated values
-            if tactics_str.strip():
-                mitre_tactics = [t.strip() for t in tactics_str.split(",") if t.strip()]
-
-        # Extract max_hits (integer or None)
-        max_hits = None
-        max_hits_match = re.search(r"max_hits\s*=\s*(\d+)", content)
-        if max_hits_match:
-            max_hits = int(max_hits_match.group(1))
-
-        # Extract path_include (glob patterns)
-        path_include_match = re.search(r"path_include\s*=\s*\"(.+?)\"", content)
-        path_include = path_include_match.group(1) if path_include_match else None
-
-        # Extract path_exclude (glob patterns)
-        path_exclude_match = re.search(r"path_exclude\s*=\s*\"(.+?)\"", content)
-        path_exclude = path_exclude_match.group(1) if path_exclude_match else None
-
-        SOURCECODE_RULES.append(
-            YaraRule(
-                id=rule_id,
-                file=file_name,
-                description=rule_description,
-                ecosystem=rule_ecosystem,
-                identifies=identifies,
-                severity=severity,
-                mitre_tactics=mitre_tactics,
-                specificity=specificity,
-                sophistication=sophistication,
-                max_hits=max_hits,
-                path_include=path_include,
-                path_exclude=path_exclude,
-            )
+    return rules
+
+
+@lru_cache(maxsize=None)
+def load_sourcecode_rules() -> list[SourceCodeRule]:
+    """
+    Returns every source code rule, loaded the first time rules are requested
+    """
+    rules: list[SourceCodeRule] = list(load_yara_rules())
+
+    # Files identical to a file of a known malicious package are reported without
+    # running any YARA rule on them
+    rules.append(
+        HashRule(
+            id="known-malicious-file",
+            file="hash-reputation.idx",
+            description=(
+                "Identifies files identical to a file of a known malicious package, "
+                "looked up in the hash reputation index"
+            ),
+            ecosystem=None,
+            identifies="threat.runtime.known-malicious",
+            severity="high",
+            mitre_tactics=["execution"],
+            specificity="high",
+            sophistication="low",
         )
+    )
+    return rules
+
+
+def __getattr__(name: str):
+    # SOURCECODE_RULES is loaded lazily, when first accessed
+    if name == "SOURCECODE_RULES":
+        return load_sourcecode_rules()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,140 @@
+"""
+Compiled YARA ruleset cache
+
+Compiling the source code rules is by far the most expensive part of setting up
+a scan. Rules are therefore compiled once per selection into a single
+`yara.Rules` object (one namespace per rule file) and persisted to disk, keyed
+by a hash of the rule sources, so later processes only have to `yara.load()` it.
+Rulesets precompiled when the package is built are shipped along with the rules,
+under the same key, and are loaded before looking at the cache.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+from typing import Iterable
+
+import yara  # type: ignore
+
+from guarddog.utils.config import CACHE_LOCATION
+
+SOURCECODE_RULES_PATH = os.path.join(os.path.dirname(__file__), "sourcecode")
+YARA_RULES_CACHE_LOCATION = os.path.join(CACHE_LOCATION, "yara")
+PRECOMPILED_RULES_LOCATION = os.path.join(SOURCECODE_RULES_PATH, "compiled")
+
+log = logging.getLogger("guarddog")
+
+
+def get_rule_path(rule_name: str) -> str:
+    return os.path.join(SOURCECODE_RULES_PATH, f"{rule_name}.yar")
+
+
+def get_ruleset_fingerprint(rule_names: Iterable[str]) -> str:
+    """
+    Hash the sources of a rule selection
+
+    The digest covers the yara-python version, every selected .yar file and
+    every .meta file they may include, so any edit invalidates the cache.
+
+    Args:
+        rule_names: ids of the rules in the selection
+
+    Returns:
+        str: hex digest identifying the compiled ruleset
+    """
+    digest = hashlib.sha256()
+    digest.update(yara.__version__.encode())
+
+    includes = sorted(
+        f for f in os.listdir(SOURCECODE_RULES_PATH) if f.endswith(".meta")
+    )
+    for rule_name in sorted(rule_names):
+        digest.update(rule_name.encode())
+        with open(get_rule_path(rule_name), "rb") as f:
+            digest.update(f.read())
+    for include in includes:
+        digest.update(include.encode())
+        with open(os.path.join(SOURCECODE_RULES_PATH, include), "rb") as f:
+            digest.update(f.read())
+
+    return digest.hexdigest()
+
+
+def compile_rules(rule_names: Iterable[str]) -> yara.Rules:
+    """
+    Return the compiled ruleset for a rule selection
+
+    Each rule file is compiled in its own namespace, named after the rule id,
+    so matches can be attributed back to the rule that produced them. The
+    result is loaded from the on-disk cache when available, and written to it
+    otherwise. Cache failures (read-only home, sandbox) are never fatal.
+
+    Args:
+        rule_names: ids of the rules to compile
+
+    Returns:
+        yara.Rules: compiled ruleset
+    """
+    rule_names = sorted(rule_names)
+    fingerprint = get_ruleset_fingerprint(rule_names)
+    cache_path = os.path.join(YARA_RULES_CACHE_LOCATION, f"{fingerprint}.yarc")
+    precompiled_path = os.path.join(PRECOMPILED_RULES_LOCATION, f"{fingerprint}.yarc")
+
+    for path in (precompiled_path, cache_path):
+        if not os.path.exists(path):
+            continue
+        try:
+            rules = yara.load(filepath=path)
+            log.debug(f"Loaded compiled YARA rules from {path}")
+            return rules
+        except Exception as e:
+            log.debug(f"Unable to load compiled YARA rules from {path}: {e}")
+
+    rules = yara.compile(
+        filepaths={rule_name: get_rule_path(rule_name) for rule_name in rule_names}
+    )
+
+    try:
+        save_rules(rules, cache_path)
+        log.debug(f"Saved compiled YARA rules to {cache_path}")
+    except Exception as e:
+        log.debug(f"Unable to save compiled YARA rules to {cache_path}: {e}")
+
+    return rules
+
+
+def save_rules(rules: yara.Rules, path: str) -> None:
+    """
+    Saves a compiled ruleset, atomically replacing any previous one
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    # Write to a temporary file and rename it so that concurrent processes
+    # never load a partially written ruleset
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    os.close(fd)
+    try:
+        rules.save(filepath=tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def precompile_rules(rule_names: Iterable[str]) -> str:
+    """
+    Compiles a rule selection into the rulesets shipped with the package
+
+    Returns:
+        str: path of the precompiled ruleset
+    """
+    rule_names = sorted(rule_names)
+    path = os.path.join(
+        PRECOMPILED_RULES_LOCATION, f"{get_ruleset_fingerprint(rule_names)}.yarc"
+    )
+    rules = yara.compile(
+        filepaths={rule_name: get_rule_path(rule_name) for rule_name in rule_names}
+    )
+    save_rules(rules, path)
+    return path
@@ -9,14 +9,14 @@ import os
 import shutil
 import sys
 import tempfile
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 from urllib.parse import urlparse, unquote
 
 import click
-import requests
 from prettytable import PrettyTable
 
 from guarddog.analyzer.metadata import get_metadata_detectors
+from guarddog.analyzer.risk_engine import RiskLabel
 from guarddog.analyzer.sourcecode import get_sourcecode_rules
 from guarddog.ecosystems import ECOSYSTEM
 from guarddog.reporters.reporter_factory import ReporterFactory, ReporterType
@@ -24,6 +24,12 @@ from guarddog.reporters.reporter_factory import ReporterFactory, ReporterType
 from guarddog.scanners import get_package_scanner, get_project_scanner
 from guarddog.scanners.scanner import github_blob_to_raw_url
 from guarddog.utils.archives import safe_extract
+from guarddog.utils.config import (
+    FINDING_CACHE,
+    HASH_REPUTATION_INDEX,
+    IN_MEMORY_ARCHIVE_SCAN,
+)
+from guarddog.utils.exceptions import InMemoryBudgetExceeded
 from guarddog.sandbox import (
     is_available as sandbox_available,
     apply_sandbox,
@@ -37,9 +43,21 @@ AVAILABLE_LOG_LEVELS_NAMES = list(
     map(lambda level: logging.getLevelName(level), AVAILABLE_LOG_LEVELS)
 )
 
+if TYPE_CHECKING:
+    from guarddog.analyzer.scan_baseline import ScanBaseline
+
 log = logging.getLogger("guarddog")
 
 
+def __getattr__(name: str):
+    # requests is slow to import and only needed to download a remote package
+    if name == "requests":
+        import requests
+
+        return requests
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 def common_options(fn):
     fn = click.option(
         "--exit-non-zero-on-finding",
@@ -90,6 +108,45 @@ def scan_options(fn):
             "Not supported for tar archives."
         ),
     )(fn)
+    fn = click.option(
+        "--profile-rules",
+        is_flag=True,
+        default=False,
+        help=(
+            "Report the match time, bytes scanned and hits of each source code "
+            "rule and file (slows down the scan)"
+        ),
+    )(fn)
+    fn = click.option(
+        "--record-manifest",
+        is_flag=True,
+        default=False,
+        help=(
+            "Add the hash of each file to the results, so that the JSON report "
+            "can be used with --diff-from to scan the next version"
+        ),
+    )(fn)
+    fn = click.option(
+        "--stop-at",
+        default=None,
+        type=click.Choice(
+            [label.value for label in RiskLabel if label != RiskLabel.NO_RISKS_DETECTED]
+        ),
+        help=(
+            "Stop running rules as soon as whether the package reaches this risk "
+            "label is decided, the results are then marked as partial. With "
+            "--exit-non-zero-on-finding, exit non-zero when the label is reached"
+        ),
+    )(fn)
+    fn = click.option(
+        "--diff-from",
+        default=None,
+        type=click.Path(exists=True, dir_okay=False),
+        help=(
+            "JSON report of a previous version scanned with --record-manifest: only "
+            "files added or modified since are scanned by the source code rules"
+        ),
+    )(fn)
     return fn
 
 
@@ -197,6 +254,10 @@ def _scan(
     sandbox: Optional[bool] = None,
     metadata: Optional[str] = None,
     zip_password: Optional[str] = None,
+    profile_rules: bool = False,
+    record_manifest: bool = False,
+    diff_from: Optional[str] = None,
+    stop_at: Optional[str] = None,
 ):
     """Scan a package
 
@@ -206,6 +267,12 @@ def _scan(
         rules (list[str]): specific rules to run, defaults to all
         sandbox (bool): None/True=require sandbox (fail if unavailable),
             False=disable sandbox (only via explicit --no-sandbox)
+        profile_rules (bool): add a profile of the source code rules to the
+            results, written to stderr unless the output format is json
+        record_manifest (bool): add the hash of each file to the results
+        diff_from (str): path to the JSON report of a previous version, only
+            files changed since are scanned by the source code rules
+        stop_at (str): risk label at which verdict the scan stops early
     """
 
     if sandbox is False:
@@ -224,6 +291,20 @@ def _scan(
     if scanner is None:
         log.error(f"Command scan is not supported for ecosystem {ecosystem}")
         sys.exit(1)
+    scanner.analyzer.profile_rules = profile_rules
+    scanner.analyzer.record_manifest = record_manifest
+    if stop_at is not None:
+        if diff_from is not None:
+            log.error("--stop-at can't be combined with --diff-from")
+            sys.exit(1)
+        # The manifest and the profile of a partial scan would miss the skipped rules
+        if record_manifest:
+            log.error("--stop-at can't be combined with --record-manifest")
+            sys.exit(1)
+        if profile_rules:
+            log.error("--stop-at can't be combined with --profile-rules")
+            sys.exit(1)
+        scanner.analyzer.stop_at = RiskLabel(stop_at)
 
     # Load metadata JSON if provided (enables metadata rules for local scans)
     import json
@@ -233,6 +314,17 @@ def _scan(
         with open(metadata, "r") as f:
             metadata_info = json.load(f)
 
+    baseline: Optional["ScanBaseline"] = None
+    if diff_from:
+        from guarddog.analyzer.scan_baseline import ScanBaseline
+
+        try:
+            with open(diff_from, "r") as f:
+                baseline = ScanBaseline.from_report(json.load(f))
+        except ValueError as e:
+            log.error(f"Unable to scan incrementally from {diff_from}: {e}")
+            sys.exit(1)
+
     zip_password_bytes: Optional[bytes] = None
     if zip_password is not None:
         if zip_password == "-":
@@ -249,8 +341,11 @@ def _scan(
             # deny reads under the real path.
             identifier = os.path.realpath(identifier)
             if sandbox:
+                scanner.analyzer.load_caches(rule_param)
                 apply_sandbox(scan_paths=[identifier], writable_paths=[])
-            result |= scanner.scan_local(identifier, rule_param, info=metadata_info)
+            result |= scanner.scan_local(
+                identifier, rule_param, info=metadata_info, baseline=baseline
+            )
 
         elif os.path.isfile(identifier):
             log.debug(f"Considering that '{identifier}' is a local archive file")
@@ -271,16 +366,16 @@ def _scan(
                 sandboxed_archive = os.path.join(tempdir, os.path.basename(identifier))
                 shutil.copyfile(identifier, sandboxed_archive)
                 if sandbox:
+                    scanner.analyzer.load_caches(rule_param)
                     apply_sandbox(scan_paths=[], writable_paths=[tempdir])
-                extract_dir = os.path.join(tempdir, "_extracted")
-                os.makedirs(extract_dir, exist_ok=True)
-                safe_extract(
+                result |= _scan_archive(
+                    scanner,
                     sandboxed_archive,
-                    extract_dir,
-                    zip_password=zip_password_bytes,
-                )
-                result |= scanner.scan_local(
-                    extract_dir, rule_param, info=metadata_info
+                    os.path.join(tempdir, "_extracted"),
+                    rule_param,
+                    metadata_info,
+                    zip_password_bytes,
+                    baseline,
                 )
 
         elif identifier.startswith(("http://", "https://")):
@@ -291,6 +386,8 @@ def _scan(
             tmp_root = os.path.realpath(tempfile.gettempdir())
             with tempfile.TemporaryDirectory(dir=tmp_root) as tempdir:
                 # Download before sandbox: network access is needed here.
+                import requests
+
                 download_url = github_blob_to_raw_url(identifier)
                 filename = (
                     unquote(os.path.basename(urlparse(download_url).path)) or "archive"
@@ -302,12 +399,16 @@ def _scan(
                 with open(archive_path, "wb") as f:
                     f.write(response.raw.read())
                 if sandbox:
+                    scanner.analyzer.load_caches(rule_param)
                     apply_sandbox(scan_paths=[], writable_paths=[tempdir])
-                extract_dir = os.path.join(tempdir, "_extracted")
-                os.makedirs(extract_dir, exist_ok=True)
-                safe_extract(archive_path, extract_dir, zip_password=zip_password_bytes)
-                result |= scanner.scan_local(
-                    extract_dir, rule_param, info=metadata_info
+                result |= _scan_archive(
+                    scanner,
+                    archive_path,
+                    os.path.join(tempdir, "_extracted"),
+                    rule_param,
+                    metadata_info,
+                    zip_password_bytes,
+                    baseline,
                 )
 
         elif identifier.startswith("s3://"):
@@ -333,19 +434,22 @@ def _scan(
                 # http/https branch).
                 kind, local_path = download_from_s3(identifier, download_root)
                 if sandbox:
+                    scanner.analyzer.load_caches(rule_param)
                     apply_sandbox(scan_paths=[], writable_paths=[tempdir])
                 if kind == "archive":
-                    extract_dir = os.path.join(tempdir, "_extracted")
-                    os.makedirs(extract_dir, exist_ok=True)
-                    safe_extract(
-                        local_path, extract_dir, zip_password=zip_password_bytes
+                    result |= _scan_archive(
+                        scanner,
+                        local_path,
+                        os.path.join(tempdir, "_extracted"),
+                        rule_param,
+                        metadata_info,
+                        zip_password_bytes,
+                        baseline,
                     )
-                    scan_target = extract_dir
                 else:
-                    scan_target = local_path
-                result |= scanner.scan_local(
-                    scan_target, rule_param, info=metadata_info
-                )
+                    result |= scanner.scan_local(
+                        local_path, rule_param, info=metadata_info, baseline=baseline
+                    )
 
         else:
             log.debug(f"Considering that '{identifier}' is a remote target")
@@ -354,25 +458,70 @@ def _scan(
                 sys.exit(1)
             if sandbox:
                 result |= _scan_remote_sandboxed(
-                    scanner, identifier, version, rule_param
+                    scanner, identifier, version, rule_param, baseline
                 )
             else:
-                result |= scanner.scan_remote(identifier, version, rule_param)
+                result |= scanner.scan_remote(
+                    identifier, version, rule_param, baseline=baseline
+                )
 
     except Exception as e:
         log.error(f"Error occurred while scanning target {identifier}: '{e}'\n")
         sys.exit(1)
 
+    # The json reporter outputs the profile along with the results
+    profile = None
+    if output_format != "json":
+        profile = result.pop("profile", None)
+
     reporter = ReporterFactory.create_reporter(ReporterType.from_str(output_format))
     stdout, stderr = reporter.render_scan(result)
     sys.stdout.write(stdout)
     sys.stderr.write(stderr)
+    if profile is not None:
+        sys.stderr.write(json.dumps({"profile": profile}, indent=2) + "\n")
 
     if exit_non_zero_on_finding:
+        if stop_at is not None:
+            exit_when_label_reached(result, RiskLabel(stop_at))
         exit_with_status_code([result])
 
 
-def _scan_remote_sandboxed(scanner, name, version, rules):
+def _scan_archive(
+    scanner,
+    archive_path: str,
+    extract_dir: str,
+    rules,
+    metadata_info,
+    zip_password: Optional[bytes],
+    baseline: Optional["ScanBaseline"] = None,
+) -> dict:
+    """Scan a package archive, in memory or once extracted to extract_dir
+
+    Args:
+        archive_path (str): path to the archive
+        extract_dir (str): directory to extract the archive to, created if needed
+        zip_password (bytes): password of an encrypted zip archive
+        baseline (ScanBaseline): files and findings of a previous version
+    """
+    if IN_MEMORY_ARCHIVE_SCAN:
+        try:
+            return scanner.scan_archive(
+                archive_path,
+                rules,
+                info=metadata_info,
+                zip_password=zip_password,
+                baseline=baseline,
+            )
+        except InMemoryBudgetExceeded as e:
+            log.debug(f"Unable to scan the archive in memory, extracting it: {e}")
+
+    os.makedirs(extract_dir, exist_ok=True)
+    safe_extract(archive_path, extract_dir, zip_password=zip_password)
+    return scanner.scan_local(extract_dir, rules, info=metadata_info, baseline=baseline)
+
+
+def _scan_remote_sandboxed(scanner, name, version, rules, baseline=None):
     """Remote scan with sandboxed extraction and analysis.
 
     Phase 1 (unsandboxed): download, extract (in sandboxed subprocess),
@@ -410,8 +559,15 @@ def _scan_remote_sandboxed(scanner, name, version, rules):
         )
 
         # Phase 2: sandbox main process, then run source code analysis
+        analyzer.load_caches(rules)
         apply_sandbox(scan_paths=[file_path], writable_paths=[tmpdir])
-        sourcecode_results = analyzer.analyze_sourcecode(file_path, rules)
+        if analyzer.stop_at is not None:
+            return analyzer.analyze_until_verdict(
+                file_path, rules=rules, metadata_results=metadata_results
+            )
+        sourcecode_results = analyzer.analyze_sourcecode(
+            file_path, rules, baseline=baseline
+        )
 
         # Combine results (same as Analyzer.analyze)
         risk_score = analyzer.calculate_package_risk_score(
@@ -423,7 +579,7 @@ def _scan_remote_sandboxed(scanner, name, version, rules):
                 "name": risk.name,
                 "category": risk.category,
                 "severity": risk.severity.value,
-                "mitre_tactics": risk.mitre_tactics,
+                "mitre_tactics": list(risk.mitre_tactics),
                 "threat_identifies": risk.threat_finding.identifies,
                 "threat_rule": risk.threat_finding.rule_name,
                 "threat_description": risk.threat_finding.message or "",
@@ -443,7 +599,7 @@ def _scan_remote_sandboxed(scanner, name, version, rules):
             }
             for risk in risk_objects
         ]
-        return {
+        output = {
             "issues": metadata_results["issues"] + sourcecode_results["issues"],
             "errors": metadata_results["errors"] | sourcecode_results["errors"],
             "results": metadata_results["results"] | sourcecode_results["results"],
@@ -451,6 +607,10 @@ def _scan_remote_sandboxed(scanner, name, version, rules):
             "risk_score": risk_score,
             "risks": formatted_risks,
         }
+        for key in ("profile", "file_manifest"):
+            if key in sourcecode_results:
+                output[key] = sourcecode_results[key]
+        return output
     finally:
         shutil.rmtree(tmpdir, ignore_errors=True)
 
@@ -483,6 +643,20 @@ class CliEcosystem(click.Group):
         self.name = ecosystem.name.lower()
         self.ecosystem = ecosystem
 
+    # The commands of an ecosystem list its rules, and are only built when the
+    # ecosystem is invoked, so that the CLI only loads the rules it runs
+    def get_command(self, ctx, cmd_name):
+        self._add_ecosystem_commands()
+        return super().get_command(ctx, cmd_name)
+
+    def list_commands(self, ctx):
+        self._add_ecosystem_commands()
+        return super().list_commands(ctx)
+
+    def _add_ecosystem_commands(self):
+        if self.commands:
+            return
+
         def rule_options(fn):
             rules = _get_all_rules(self.ecosystem)
             fn = click.option(
@@ -513,6 +687,10 @@ class CliEcosystem(click.Group):
             sandbox,
             metadata,
             zip_password,
+            profile_rules,
+            record_manifest,
+            diff_from,
+            stop_at,
         ):
             return _scan(
                 target,
@@ -525,6 +703,10 @@ class CliEcosystem(click.Group):
                 sandbox=sandbox,
                 metadata=metadata,
                 zip_password=zip_password,
+                profile_rules=profile_rules,
+                record_manifest=record_manifest,
+                diff_from=diff_from,
+                stop_at=stop_at,
             )
 
         @click.command("verify", help=f"Verify a given {self.ecosystem.name} package")
@@ -554,11 +736,198 @@ class CliEcosystem(click.Group):
         self.add_command(list_rules_ecosystem, "list-rules")
 
 
+def hash_index_options(fn):
+    fn = click.option(
+        "--benign",
+        multiple=True,
+        type=click.Path(exists=True, file_okay=False),
+        help="Directory of known benign files, such as extracted popular packages",
+    )(fn)
+    fn = click.option(
+        "--malicious",
+        multiple=True,
+        type=click.Path(exists=True, file_okay=False),
+        help="Directory of known malicious packages, extracted or archived",
+    )(fn)
+    fn = click.option(
+        "--index",
+        default=HASH_REPUTATION_INDEX,
+        show_default=True,
+        type=click.Path(dir_okay=False),
+        help="Location of the hash reputation index",
+    )(fn)
+    fn = click.option(
+        "--zip-password",
+        default=None,
+        help=(
+            "Password of the encrypted ZIP archives under the directories "
+            "(the malicious packages dataset uses 'infected')"
+        ),
+    )(fn)
+    return fn
+
+
+@cli.group("hash-index")
+def hash_index():
+    """
+    Manage the hash reputation index of known benign and malicious files
+
+    Files found in the index are not matched against YARA rules, and files of
+    known malicious packages are reported by the known-malicious-file rule.
+    """
+
+
+@hash_index.command(
+    "build", help="Build the hash reputation index from local directories"
+)
+@hash_index_options
+def hash_index_build(benign, malicious, index, zip_password):
+    _build_hash_index(benign, malicious, index, zip_password, update=False)
+
+
+@hash_index.command(
+    "update", help="Add the files of local directories to the hash reputation index"
+)
+@hash_index_options
+def hash_index_update(benign, malicious, index, zip_password):
+    _build_hash_index(benign, malicious, index, zip_password, update=True)
+
+
+def _build_hash_index(
+    benign: tuple[str, ...],
+    malicious: tuple[str, ...],
+    index: str,
+    zip_password: Optional[str],
+    update: bool,
+):
+    """Hash the files of local directories into the hash reputation index
+
+    Args:
+        benign (tuple): directories of known benign files
+        malicious (tuple): directories of known malicious packages
+        index (str): location of the index
+        update (bool): add to the digests of the existing index, if any,
+            instead of replacing them
+    """
+    from guarddog.analyzer.hash_reputation import (
+        Reputation,
+        hash_directories,
+        read_index,
+        write_index,
+    )
+
+    password = zip_password.encode() if zip_password is not None else None
+
+    benign_digests: set[bytes] = set()
+    malicious_digests: set[bytes] = set()
+    if update and os.path.exists(index):
+        try:
+            benign_digests, malicious_digests = read_index(index)
+        except (OSError, ValueError) as e:
+            log.error(f"Unable to read the hash reputation index {index}: {e}")
+            sys.exit(1)
+
+    benign_digests |= hash_directories(benign, password)
+    malicious_digests |= hash_directories(malicious, password, Reputation.MALICIOUS)
+    write_index(index, benign_digests, malicious_digests)
+
+    log.info(
+        f"Wrote {index}: {len(benign_digests)} benign and "
+        f"{len(malicious_digests - benign_digests)} malicious files"
+    )
+
+
+@cli.group("cache")
+def cache():
+    """
+    Manage the caches of GuardDog
+
+    Expired caches keep being used while they are refreshed in the background,
+    unless GUARDDOG_TOP_PACKAGES_AUTO_REFRESH is false. Sandboxed scans only read
+    the finding cache, which is filled by unsandboxed scans and by warm.
+    """
+
+
+@cache.command(
+    "refresh", help="Download the top packages used by the typosquatting rule"
+)
+@click.option(
+    "--ecosystem",
+    "ecosystems",
+    multiple=True,
+    type=click.Choice([e.value for e in ECOSYSTEM], case_sensitive=False),
+    help="Ecosystem to refresh the cache of, all of them if not specified",
+)
+def cache_refresh(ecosystems):
+    failed = False
+    for ecosystem in ECOSYSTEM:
+        if ecosystems and ecosystem.value not in ecosystems:
+            continue
+        detector = get_metadata_detectors(ecosystem).get("typosquatting")
+        if detector is None:
+            continue
+        try:
+            refreshed = detector.refresh_top_packages()
+        except RuntimeError as e:
+            log.error(f"Unable to refresh the top {ecosystem.value} packages: {e}")
+            failed = True
+            continue
+        if refreshed:
+            log.info(
+                f"Refreshed the top {ecosystem.value} packages: "
+                f"{len(detector.popular_packages)} packages"
+            )
+    if failed:
+        sys.exit(1)
+
+
+@cache.command(
+    "warm",
+    help="Record the YARA matches of the files of trusted packages in the finding cache",
+)
+@click.option(
+    "--ecosystem",
+    required=True,
+    type=click.Choice([e.value for e in ECOSYSTEM], case_sensitive=False),
+    help="Ecosystem of the packages, whose rules the files are matched against",
+)
+@click.argument(
+    "directories",
+    nargs=-1,
+    required=True,
+    type=click.Path(exists=True, file_okay=False),
+)
+def cache_warm(ecosystem, directories):
+    # Files are matched without the sandbox, which keeps the cache read-only
+    from guarddog.analyzer.analyzer import Analyzer
+
+    if not FINDING_CACHE:
+        log.error("The finding cache is disabled, set GUARDDOG_FINDING_CACHE=true")
+        sys.exit(1)
+
+    analyzer = Analyzer(ecosystem=ECOSYSTEM(ecosystem.lower()))
+    for directory in directories:
+        analyzer.analyze_sourcecode(directory)
+        log.info(f"Recorded the YARA matches of the files of {directory}")
+
+
 # Adding all ecosystems as subcommands
 for e in ECOSYSTEM:
     cli.add_command(CliEcosystem(e), e.name.lower())
 
 
+# Given the result of a scan stopping at a risk label, exit non-zero if the
+# package reaches the label
+def exit_when_label_reached(result: dict, label: RiskLabel):
+    reached = RiskLabel(
+        result.get("risk_score", {}).get("label", RiskLabel.NO_RISKS_DETECTED)
+    )
+    rank = list(RiskLabel).index
+    if rank(reached) >= rank(label):
+        exit(EXIT_CODE_ISSUES_FOUND)
+    exit(0)
+
+
 # Given the results, exit with the appropriate status code
 def exit_with_status_code(results):
     for result in results:
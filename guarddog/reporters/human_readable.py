@@ -339,6 +339,14 @@ class HumanReadableReporter(BaseReporter):
             lines += HumanReadableReporter._format_findings(risks, path_prefix, ceiling)
         if risk_score:
             lines += HumanReadableReporter._format_summary(risk_score, len(risks))
+        if results.get("partial"):
+            skipped = len(results.get("skipped_rules", []))
+            lines.append(
+                colored(
+                    f"Partial scan: {skipped} rule(s) skipped once the verdict was decided",
+                    "dark_grey",
+                )
+            )
 
         return "\n".join(lines)
 
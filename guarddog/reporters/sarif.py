@@ -6,8 +6,9 @@ from guarddog.analyzer.metadata import get_metadata_detectors
 from guarddog.ecosystems import ECOSYSTEM
 from guarddog.reporters import BaseReporter
 from guarddog.scanners.scanner import DependencyFile
-from typing import List
+from typing import List, Optional
 from guarddog.reporters.human_readable import HumanReadableReporter
+from guarddog.utils.line_index import LineIndex
 
 
 class SarifReporter(BaseReporter):
@@ -113,17 +114,49 @@ class SarifReporter(BaseReporter):
             """
             return {"artifactLocation": {"uri": uri}, "region": region}
 
+        # Content and newline index of each dependency file, read at most once
+        dependency_file_lines: dict[str, Optional[tuple[bytes, LineIndex]]] = {}
+
+        def get_columns(file_path: str, line: int, package: str) -> tuple[int, int]:
+            """
+            Locates the package name on its line of the dependency file,
+            defaults to the start of the line when it can't be found
+            """
+            if file_path not in dependency_file_lines:
+                try:
+                    with open(file_path, "rb") as f:
+                        content = f.read()
+                    dependency_file_lines[file_path] = (content, LineIndex(content))
+                except OSError:
+                    dependency_file_lines[file_path] = None
+
+            indexed = dependency_file_lines[file_path]
+            if indexed is not None:
+                content, line_index = indexed
+                start = line_index.line_start(line)
+                if start is not None:
+                    column = content[start : line_index.line_end(line)].find(
+                        package.encode()
+                    )
+                    if column != -1:
+                        return column + 1, column + 1 + len(package)
+            return 1, len(package)
+
         def get_region(
             dependency_files: List[DependencyFile], package: str
         ) -> tuple[DependencyFile, dict]:
             for dependency_file in dependency_files:
                 for d in dependency_file.dependencies:
                     if d.name == package:
+                        line = list(d.versions)[0].location
+                        start_column, end_column = get_columns(
+                            dependency_file.file_path, line, package
+                        )
                         return dependency_file, {
-                            "startLine": list(d.versions)[0].location,
-                            "endLine": list(d.versions)[0].location,
-                            "startColumn": 1,
-                            "endColumn": len(package),
+                            "startLine": line,
+                            "endLine": line,
+                            "startColumn": start_column,
+                            "endColumn": end_column,
                         }
             raise ValueError(
                 f"Could not find the package {package} in the dependency files"
@@ -32,6 +32,9 @@ def apply_sandbox(
 ) -> None:
     """Apply kernel-level sandbox. Always blocks network. Raises on failure.
 
+    guarddog's caches are not accessible under the sandbox, so that a scan
+    can't poison the following ones: load them beforehand (Analyzer.load_caches).
+
     Args:
         scan_paths: paths that need READ access (package dirs, archive files)
         writable_paths: paths that need READ_WRITE access (temp extraction dirs)
@@ -1,19 +1,33 @@
+import importlib
 from typing import Optional
 
-from .github_action_project_scanner import GitHubActionDependencyScanner
-from .npm_package_scanner import NPMPackageScanner
-from .npm_project_scanner import NPMRequirementsScanner
-from .pypi_package_scanner import PypiPackageScanner
-from .pypi_project_scanner import PypiRequirementsScanner
-from .go_package_scanner import GoModuleScanner
-from .go_project_scanner import GoDependenciesScanner
-from .github_action_scanner import GithubActionScanner
-from .extension_scanner import ExtensionScanner
-from .rubygems_package_scanner import RubyGemsPackageScanner
-from .rubygems_project_scanner import RubyGemsRequirementsScanner
 from .scanner import PackageScanner, ProjectScanner
 from ..ecosystems import ECOSYSTEM
 
+# Module of each scanner. Scanners are imported when first requested, so that
+# a scan only imports the dependencies of the ecosystem it scans
+# (e.g. semantic_version or yaml)
+_SCANNERS = {
+    "GitHubActionDependencyScanner": "github_action_project_scanner",
+    "NPMPackageScanner": "npm_package_scanner",
+    "NPMRequirementsScanner": "npm_project_scanner",
+    "PypiPackageScanner": "pypi_package_scanner",
+    "PypiRequirementsScanner": "pypi_project_scanner",
+    "GoModuleScanner": "go_package_scanner",
+    "GoDependenciesScanner": "go_project_scanner",
+    "GithubActionScanner": "github_action_scanner",
+    "ExtensionScanner": "extension_scanner",
+    "RubyGemsPackageScanner": "rubygems_package_scanner",
+    "RubyGemsRequirementsScanner": "rubygems_project_scanner",
+}
+
+
+def __getattr__(name: str):
+    if name in _SCANNERS:
+        module = importlib.import_module(f"{__name__}.{_SCANNERS[name]}")
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 def get_package_scanner(ecosystem: ECOSYSTEM) -> Optional[PackageScanner]:
     """
@@ -29,16 +43,28 @@ def get_package_scanner(ecosystem: ECOSYSTEM) -> Optional[PackageScanner]:
     """
     match ecosystem:
         case ECOSYSTEM.PYPI:
+            from .pypi_package_scanner import PypiPackageScanner
+
             return PypiPackageScanner()
         case ECOSYSTEM.NPM:
+            from .npm_package_scanner import NPMPackageScanner
+
             return NPMPackageScanner()
         case ECOSYSTEM.GO:
+            from .go_package_scanner import GoModuleScanner
+
             return GoModuleScanner()
         case ECOSYSTEM.GITHUB_ACTION:
+            from .github_action_scanner import GithubActionScanner
+
             return GithubActionScanner()
         case ECOSYSTEM.EXTENSION:
+            from .extension_scanner import ExtensionScanner
+
             return ExtensionScanner()
         case ECOSYSTEM.RUBYGEMS:
+            from .rubygems_package_scanner import RubyGemsPackageScanner
+
             return RubyGemsPackageScanner()
     return None
 
@@ -57,15 +83,25 @@ def get_project_scanner(ecosystem: ECOSYSTEM) -> Optional[ProjectScanner]:
     """
     match ecosystem:
         case ECOSYSTEM.PYPI:
+            from .pypi_project_scanner import PypiRequirementsScanner
+
             return PypiRequirementsScanner()
         case ECOSYSTEM.NPM:
+            from .npm_project_scanner import NPMRequirementsScanner
+
             return NPMRequirementsScanner()
         case ECOSYSTEM.GO:
+            from .go_project_scanner import GoDependenciesScanner
+
             return GoDependenciesScanner()
         case ECOSYSTEM.GITHUB_ACTION:
+            from .github_action_project_scanner import GitHubActionDependencyScanner
+
             return GitHubActionDependencyScanner()
         case ECOSYSTEM.EXTENSION:
             return None  # we're not including dependency scanning for this PR
         case ECOSYSTEM.RUBYGEMS:
+            from .rubygems_project_scanner import RubyGemsRequirementsScanner
+
             return RubyGemsRequirementsScanner()
     return None
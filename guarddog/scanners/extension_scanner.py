@@ -1,11 +1,13 @@
 import logging
 import os
 import typing
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 
 import requests
 
 from guarddog.analyzer.analyzer import Analyzer
+from guarddog.analyzer.file_manifest import FileEntry
+from guarddog.analyzer.scan_baseline import ScanBaseline
 from guarddog.ecosystems import ECOSYSTEM
 from guarddog.scanners.scanner import PackageScanner, noop
 
@@ -135,6 +137,8 @@ class ExtensionScanner(PackageScanner):
         rules=None,
         callback: typing.Callable[[dict], None] = noop,
         info=None,
+        manifest: Optional[List[FileEntry]] = None,
+        baseline: Optional[ScanBaseline] = None,
     ) -> dict:
         """
         Scan a local VSCode extension directory
@@ -143,6 +147,9 @@ class ExtensionScanner(PackageScanner):
             path: Path to extension directory containing package.json
             rules: Set of rules to use
             callback: Callback to apply to analyzer output
+            manifest: Files of an archive read in memory, scanned instead of
+                the files under path
+            baseline: Files and findings of a previously scanned version
 
         Returns:
             Scan results
@@ -151,7 +158,9 @@ class ExtensionScanner(PackageScanner):
             rules = set(rules)
 
         # Use only sourcecode analysis for local scans, consistent with other ecosystems
-        results = self.analyzer.analyze_sourcecode(path, rules=rules)
+        results = self.analyzer.analyze_sourcecode(
+            path, rules=rules, manifest=manifest, baseline=baseline
+        )
         callback(results)
 
         return results
@@ -10,9 +10,10 @@ from dataclasses import dataclass
 from typing import List, Optional, Set, Tuple
 from urllib.parse import quote, urlparse
 
-import requests
-
 from guarddog.analyzer.analyzer import Analyzer
+from guarddog.analyzer.file_manifest import FileEntry, build_archive_manifest
+from guarddog.analyzer.metadata.typosquatting import TyposquatDetector
+from guarddog.analyzer.scan_baseline import ScanBaseline
 from guarddog.utils.archives import safe_extract
 from guarddog.utils.config import PARALLELISM
 
@@ -21,6 +22,15 @@ log = logging.getLogger("guarddog")
 _GITHUB_HOSTS = {"github.com", "www.github.com"}
 
 
+def __getattr__(name: str):
+    # requests is slow to import and only needed to download a package
+    if name == "requests":
+        import requests
+
+        return requests
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 def _assert_safe_github_url(parsed, url: str) -> None:
     """Reject schemes, userinfo, and ports that could send GitHub credentials
     to a non-GitHub host via a crafted authority component (GHSA-587r-mc96-6f2p).
@@ -165,6 +175,8 @@ class PackageScanner:
         rules=None,
         callback: typing.Callable[[dict], None] = noop,
         info=None,
+        manifest: Optional[List[FileEntry]] = None,
+        baseline: Optional[ScanBaseline] = None,
     ) -> dict:
         """
         Scans local package
@@ -175,6 +187,11 @@ class PackageScanner:
             callback (typing.Callable[[dict], None], optional): Callback to apply to Analyzer output
             info (dict, optional): Package metadata for metadata detectors.
                 When provided, metadata rules run alongside source code rules.
+            manifest (list, optional): Files of an archive read in memory, scanned
+                instead of the files under path.
+            baseline (ScanBaseline, optional): Files and findings of a previously
+                scanned version, only files changed since are scanned by the
+                source code rules.
 
         Raises:
             Exception: Analyzer exception
@@ -192,11 +209,26 @@ class PackageScanner:
             pkg_name = (info.get("info") or info).get("name")
             pkg_version = (info.get("info") or info).get("version")
             return self.analyzer.analyze(
-                path, info=info, rules=rules, name=pkg_name, version=pkg_version
+                path,
+                info=info,
+                rules=rules,
+                name=pkg_name,
+                version=pkg_version,
+                manifest=manifest,
+                baseline=baseline,
+            )
+
+        if self.analyzer.stop_at is not None:
+            results = self.analyzer.analyze_until_verdict(
+                path, rules=rules, manifest=manifest
             )
+            callback(results)
+            return results
 
         # Source code only (original behavior)
-        sourcecode_results = self.analyzer.analyze_sourcecode(path, rules=rules)
+        sourcecode_results = self.analyzer.analyze_sourcecode(
+            path, rules=rules, manifest=manifest, baseline=baseline
+        )
         callback(sourcecode_results)
 
         risk_score = self.analyzer.calculate_package_risk_score(sourcecode_results)
@@ -211,6 +243,48 @@ class PackageScanner:
             "risks": formatted_risks,
         }
 
+    def scan_archive(
+        self,
+        archive_path,
+        rules=None,
+        callback: typing.Callable[[dict], None] = noop,
+        info=None,
+        zip_password: Optional[bytes] = None,
+        baseline: Optional[ScanBaseline] = None,
+    ) -> dict:
+        """
+        Scans a local package archive in memory, without extracting it to disk
+
+        The members of the archive go through the same safety checks as when
+        extracting it, then are matched from memory.
+
+        Args:
+            archive_path (str): Path to the tar or zip archive of the package
+            rules (set, optional): Set of rule names to use. Defaults to all rules.
+            callback (typing.Callable[[dict], None], optional): Callback to apply to Analyzer output
+            info (dict, optional): Package metadata for metadata detectors.
+            zip_password (bytes, optional): Password of an encrypted zip archive
+            baseline (ScanBaseline, optional): Files and findings of a previously
+                scanned version
+
+        Raises:
+            ValueError: the archive is unsupported or exceeds safety limits
+            InMemoryBudgetExceeded: the files of the archive are too large to be
+                held in memory
+
+        Returns:
+            dict: Analyzer output with rules to results mapping
+        """
+        manifest = build_archive_manifest(archive_path, zip_password)
+        return self.scan_local(
+            archive_path,
+            rules,
+            callback,
+            info=info,
+            manifest=manifest,
+            baseline=baseline,
+        )
+
     @abstractmethod
     def download_and_get_package_info(
         self, directory: str, package_name: str, version=None
@@ -218,7 +292,13 @@ class PackageScanner:
         raise NotImplementedError("download_and_get_package_info is not implemented")
 
     def _scan_remote(
-        self, name, base_dir, version=None, rules=None, write_package_info=False
+        self,
+        name,
+        base_dir,
+        version=None,
+        rules=None,
+        write_package_info=False,
+        baseline: Optional[ScanBaseline] = None,
     ):
         directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), base_dir)
 
@@ -232,7 +312,9 @@ class PackageScanner:
             log.debug("Unable to download package, ignoring: " + str(e))
             return {"issues": 0, "errors": {"download-package": str(e)}}
 
-        results = self.analyzer.analyze(file_path, package_info, rules, name, version)
+        results = self.analyzer.analyze(
+            file_path, package_info, rules, name, version, baseline=baseline
+        )
         if write_package_info:
             package_name = name.replace("/", "-")
             suffix = (
@@ -246,7 +328,13 @@ class PackageScanner:
         return results
 
     def scan_remote(
-        self, name, version=None, rules=None, base_dir=None, write_package_info=False
+        self,
+        name,
+        version=None,
+        rules=None,
+        base_dir=None,
+        write_package_info=False,
+        baseline: Optional[ScanBaseline] = None,
     ):
         """
         Scans a remote package
@@ -260,6 +348,8 @@ class PackageScanner:
             scan.
             * `write_package_info` (bool, default False): if set to true, the result of the PyPI metadata API is written
              to a json file
+            * `baseline` (ScanBaseline, optional): files and findings of a previously scanned version of the package,
+            only files added or modified since are scanned by the source code rules
 
         Raises:
             Exception: Analyzer exception
@@ -268,12 +358,14 @@ class PackageScanner:
             dict: Analyzer output with rules to results mapping
         """
         if base_dir is not None:
-            return self._scan_remote(name, base_dir, version, rules, write_package_info)
+            return self._scan_remote(
+                name, base_dir, version, rules, write_package_info, baseline
+            )
 
         with tempfile.TemporaryDirectory() as tmpdirname:
             # Directory to download compressed and uncompressed package
             return self._scan_remote(
-                name, tmpdirname, version, rules, write_package_info
+                name, tmpdirname, version, rules, write_package_info, baseline
             )
 
     def _fetch_archive(self, url: str, archive_path: str) -> None:
@@ -285,6 +377,8 @@ class PackageScanner:
             url (str): download link
             archive_path (str): path to save the downloaded file
         """
+        import requests
+
         log.debug(f"Downloading package archive from {url}")
         response = requests.get(url, stream=True)
 
@@ -382,6 +476,15 @@ class ProjectScanner:
             result = self.package_scanner.scan_remote(dependency, version, rules)
             return {"dependency": dependency, "version": version, "result": result}
 
+        # Dependencies that could be typosquatting are scanned first
+        typosquats = self.screen_typosquats(dependencies, rules)
+        if typosquats:
+            log.info(
+                f"{len(typosquats)} dependencies could be typosquatting, scanning them first: "
+                + ", ".join(sorted(typosquats))
+            )
+        dependencies = sorted(dependencies, key=lambda d: d.name not in typosquats)
+
         num_workers = PARALLELISM
 
         log.info(f"Scanning using at most {num_workers} parallel worker threads\n")
@@ -419,6 +522,29 @@ class ProjectScanner:
 
         return results
 
+    def screen_typosquats(
+        self, dependencies: List[Dependency], rules=None
+    ) -> dict[str, list[str]]:
+        """
+        Screens the names of the dependencies for typosquatting at once, before
+        any of them is downloaded
+
+        Args:
+            dependencies: dependencies to screen
+            rules: rules of the scan, nothing is screened unless they
+                include the typosquatting rule
+
+        Returns:
+            dict: names of the popular packages each dependency could be
+            typosquatting, for the dependencies that could be
+        """
+        detector = self.package_scanner.analyzer.metadata_detectors.get("typosquatting")
+        if not isinstance(detector, TyposquatDetector):
+            return {}
+        if rules is not None and detector.get_name() not in rules:
+            return {}
+        return detector.screen(dependency.name for dependency in dependencies)
+
     def scan_remote(
         self, url: str, branch: str, requirements_name: str
     ) -> tuple[List[Dependency], list[dict]]:
@@ -447,6 +573,8 @@ class ProjectScanner:
             }
         """
 
+        import requests
+
         req_url = _build_raw_github_url(url, branch, requirements_name)
         token = self._authenticate_by_access_token()
         resp = requests.get(url=req_url, auth=token)
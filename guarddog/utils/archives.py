@@ -3,6 +3,7 @@ import os
 import pathlib
 import stat
 import zipfile
+from typing import Iterator
 
 import tarsafe  # type: ignore
 
@@ -39,6 +40,118 @@ def is_supported_archive(path: str) -> bool:
     return is_tar_archive(path) or is_zip_archive(path)
 
 
+def _check_compression_bomb(
+    file_count: int,
+    total_size: int,
+    archive_size: int,
+) -> None:
+    """
+    Checks for compression bombs and file descriptor exhaustion attacks.
+
+    @param file_count: Number of files in the archive
+    @param total_size: Total uncompressed size in bytes
+    @param archive_size: Compressed archive size in bytes
+    @raise ValueError: If any safety limit is exceeded
+    """
+    if file_count > MAX_FILE_COUNT:
+        raise ValueError(
+            f"Archive contains {file_count} files, exceeding maximum allowed "
+            f"count ({MAX_FILE_COUNT}). Possible file descriptor exhaustion attack."
+        )
+
+    if total_size > MAX_UNCOMPRESSED_SIZE:
+        raise ValueError(
+            f"Archive uncompressed size ({total_size} bytes) exceeds maximum allowed "
+            f"size ({MAX_UNCOMPRESSED_SIZE} bytes). Possible compression bomb."
+        )
+
+    if archive_size > 0:
+        compression_ratio = total_size / archive_size
+        if compression_ratio > MAX_COMPRESSION_RATIO:
+            raise ValueError(
+                f"Archive compression ratio ({compression_ratio:.1f}:1) exceeds maximum "
+                f"allowed ratio ({MAX_COMPRESSION_RATIO}:1). Possible compression bomb."
+            )
+
+
+def _is_unsafe_zip_symlink(
+    zip_info: zipfile.ZipInfo,
+    zip_file: zipfile.ZipFile,
+    target_directory: str,
+    zip_password: bytes | None,
+) -> bool:
+    """
+    Check if a zip entry is a symlink pointing outside the target directory.
+
+    Follows the same logic as tarsafe: reads the symlink target and checks if
+    the resolved path would be outside the extraction directory.
+
+    @param zip_info: The ZipInfo object to check
+    @param zip_file: The ZipFile object to read the symlink target
+    @param target_directory: The directory the archive is extracted to
+    @param zip_password: Optional password for encrypted ZIP archives
+    @return: True if the symlink is unsafe, False otherwise
+    """
+    # Check if this is a symlink
+    # external_attr stores Unix file mode in upper 16 bits
+    attr = zip_info.external_attr >> 16
+    # Mask with 0o170000 to get just the file type bits
+    # 0o120000 = symbolic link
+    if (attr & 0o170000) != 0o120000:
+        return False
+
+    linkname = zip_file.read(zip_info, pwd=zip_password).decode("utf-8")
+
+    symlink_file = pathlib.Path(
+        os.path.normpath(os.path.join(target_directory, linkname))
+    )
+    if not os.path.abspath(os.path.join(target_directory, symlink_file)).startswith(
+        target_directory
+    ):
+        return True
+
+    return False
+
+
+def _is_zip_device(zip_info: zipfile.ZipInfo) -> bool:
+    """
+    Check if a zip entry is a device file (character or block device).
+
+    @param zip_info: The ZipInfo object to check
+    @return: True if this is a device file, False otherwise
+    """
+    # external_attr stores Unix file mode in upper 16 bits
+    # Mask with 0o170000 to get just the file type bits
+    attr = zip_info.external_attr >> 16
+    file_type = attr & 0o170000
+    # Check for character device (0o020000) or block device (0o060000)
+    return file_type == 0o020000 or file_type == 0o060000
+
+
+def _read_zip_member(
+    zip_file: zipfile.ZipFile, member: zipfile.ZipInfo, zip_password: bytes | None
+) -> bytes:
+    """
+    Reads a zip member, turning password failures into explicit errors.
+
+    @raise RuntimeError: If the member is encrypted and the password is missing or wrong
+    """
+    is_encrypted = bool(member.flag_bits & 0x1)
+    if is_encrypted and zip_password is None:
+        raise RuntimeError(
+            f"{member.filename}: password required for encrypted ZIP "
+            f"(pass --zip-password)"
+        )
+    try:
+        return zip_file.read(member, pwd=zip_password)
+    except RuntimeError:
+        if is_encrypted:
+            raise RuntimeError(
+                f"{member.filename}: Bad password for encrypted ZIP"
+            ) from None
+        raise
+
+
 def safe_extract(
     source_archive: str,
     target_directory: str,
@@ -61,86 +174,6 @@ def safe_extract(
 
     """
 
-    def _check_compression_bomb(
-        file_count: int,
-        total_size: int,
-        archive_size: int,
-    ) -> None:
-        """
-        Checks for compression bombs and file descriptor exhaustion attacks.
-
-        @param file_count: Number of files in the archive
-        @param total_size: Total uncompressed size in bytes
-        @param archive_size: Compressed archive size in bytes
-        @raise ValueError: If any safety limit is exceeded
-        """
-        if file_count > MAX_FILE_COUNT:
-            raise ValueError(
-                f"Archive contains {file_count} files, exceeding maximum allowed "
-                f"count ({MAX_FILE_COUNT}). Possible file descriptor exhaustion attack."
-            )
-
-        if total_size > MAX_UNCOMPRESSED_SIZE:
-            raise ValueError(
-                f"Archive uncompressed size ({total_size} bytes) exceeds maximum allowed "
-                f"size ({MAX_UNCOMPRESSED_SIZE} bytes). Possible compression bomb."
-            )
-
-        if archive_size > 0:
-            compression_ratio = total_size / archive_size
-            if compression_ratio > MAX_COMPRESSION_RATIO:
-                raise ValueError(
-                    f"Archive compression ratio ({compression_ratio:.1f}:1) exceeds maximum "
-                    f"allowed ratio ({MAX_COMPRESSION_RATIO}:1). Possible compression bomb."
-                )
-
-    def _is_unsafe_symlink(
-        zip_info: zipfile.ZipInfo, zip_file: zipfile.ZipFile
-    ) -> bool:
-        """
-        Check if a zip entry is a symlink pointing outside the target directory.
-
-        Follows the same logic as tarsafe: reads the symlink target and checks if
-        the resolved path would be outside the extraction directory.
-
-        @param zip_info: The ZipInfo object to check
-        @param zip_file: The ZipFile object to read the symlink target
-        @return: True if the symlink is unsafe, False otherwise
-        """
-        # Check if this is a symlink
-        # external_attr stores Unix file mode in upper 16 bits
-        attr = zip_info.external_attr >> 16
-        # Mask with 0o170000 to get just the file type bits
-        # 0o120000 = symbolic link
-        if (attr & 0o170000) != 0o120000:
-            return False
-
-        linkname = zip_file.read(zip_info, pwd=zip_password).decode("utf-8")
-
-        symlink_file = pathlib.Path(
-            os.path.normpath(os.path.join(target_directory, linkname))
-        )
-        if not os.path.abspath(os.path.join(target_directory, symlink_file)).startswith(
-            target_directory
-        ):
-            return True
-
-        return False
-
-    def _is_device(zip_info: zipfile.ZipInfo) -> bool:
-        """
-        Check if a zip entry is a device file (character or block device).
-
-        @param zip_info: The ZipInfo object to check
-        @return: True if this is a device file, False otherwise
-        """
-        # external_attr stores Unix file mode in upper 16 bits
-        # Mask with 0o170000 to get just the file type bits
-        attr = zip_info.external_attr >> 16
-        file_type = attr & 0o170000
-        # Check for character device (0o020000) or block device (0o060000)
-        return file_type == 0o020000 or file_type == 0o060000
-
     log.debug(f"Extracting archive {source_archive} to directory {target_directory}")
 
     archive_size = os.path.getsize(source_archive)
@@ -191,7 +224,9 @@ def safe_extract(
             # Validate and extract each file safely
             for member in zip_file.infolist():
                 # Check for unsafe symlinks (zip don't supports hardlinks)
-                if _is_unsafe_symlink(member, zip_file):
+                if _is_unsafe_zip_symlink(
+                    member, zip_file, target_directory, zip_password
+                ):
                     # we avoid unsafe files extraction but scan the rest of the package
                     log.warning(
                         f"Archived file {member.filename} is an unsafe symlink. Skipping extraction"
@@ -199,7 +234,7 @@ def safe_extract(
                     continue
 
                 # Check for device files
-                if _is_device(member):
+                if _is_zip_device(member):
                     # we avoid unsafe files extraction but scan the rest of the package
                     log.warning(
                         f"Archived file {member.filename} is a device file type. Skipping extraction"
@@ -228,3 +263,163 @@ def safe_extract(
         raise ValueError(
             f"unsupported or unreadable archive (not a valid tar or zip): {source_archive}"
         )
+
+
+# Root the members of an archive read in memory are checked against, as if the
+# archive was extracted there
+_IN_MEMORY_ROOT = os.path.abspath(os.path.join(os.sep, "guarddog-archive"))
+
+
+def _check_tar_member(member: tarsafe.TarInfo) -> None:
+    """
+    Applies the checks tarsafe runs before extracting an archive to a member
+    read in memory.
+
+    @param member: The tar member to check
+    @raise tarsafe.TarSafeException: If the member is a traversal attempt, a link
+                                     outside the archive or a device file
+    """
+
+    def is_contained(path: str) -> bool:
+        resolved = os.path.abspath(os.path.join(_IN_MEMORY_ROOT, path))
+        return os.path.commonpath([_IN_MEMORY_ROOT, resolved]) == _IN_MEMORY_ROOT
+
+    if not is_contained(member.name):
+        raise tarsafe.TarSafeException(
+            f"Attempted directory traversal for member: {member.name}"
+        )
+    if member.issym() and not is_contained(member.linkname):
+        raise tarsafe.TarSafeException(
+            f"Attempted directory traversal via symlink for member: {member.linkname}"
+        )
+    if member.islnk() and not is_contained(member.linkname):
+        raise tarsafe.TarSafeException(
+            f"Attempted directory traversal via link for member: {member.linkname}"
+        )
+    if member.ischr() or member.isblk():
+        raise tarsafe.TarSafeException("tarfile returns true for isblk() or ischr()")
+
+
+def _tar_link_target(member: tarsafe.TarInfo) -> str | None:
+    """
+    Returns the normalized name of the member a tar link points to, resolved
+    the way tarfile does, None if the member isn't a link
+    """
+    if member.issym():
+        return os.path.normpath(
+            "/".join(filter(None, (os.path.dirname(member.name), member.linkname)))
+        )
+    if member.islnk():
+        return os.path.normpath(member.linkname)
+    return None
+
+
+def _sanitize_member_name(name: str) -> str:
+    """
+    Normalizes an archive member name into the path it would be extracted to,
+    relative to the target directory, the way zipfile does.
+    """
+    name = os.path.splitdrive(name.replace("\\", "/"))[1]
+    return "/".join(part for part in name.split("/") if part not in ("", ".", ".."))
+
+
+def iter_archive_members(
+    source_archive: str,
+    zip_password: bytes | None = None,
+) -> Iterator[tuple[str, bytes]]:
+    """
+    iter_archive_members reads the files of an archive in memory, without
+    extracting them to disk.
+
+    Members go through the same safety checks as safe_extract: archives over the
+    size, file count or compression ratio limits are rejected, unsafe tar members
+    raise like tarsafe does, and unsafe zip symlinks and device files are skipped.
+    Members are read one at a time, the content of tar links is counted in the
+    size and ratio limits as it is read. A link to a member already read yields
+    the same bytes object as that member, rather than a copy.
+
+    @param source_archive:      The archive to read
+    @param zip_password:        Optional password for encrypted ZIP archives
+    @raise ValueError           If the archive type is unsupported or exceeds safety limits
+    @return                     (path relative to the archive root, content) of each file
+    """
+    log.debug(f"Reading archive {source_archive} in memory")
+
+    archive_size = os.path.getsize(source_archive)
+
+    if tarsafe.is_tarfile(source_archive):
+        if zip_password is not None:
+            raise ValueError(
+                "--zip-password is only supported for ZIP archives "
+                "(.zip, .whl, .egg); tar archives have no native password support"
+            )
+
+        with tarsafe.open(source_archive) as tar:
+            members = [
+                member
+                for member in tar.getmembers()
+                if member.isfile() or member.issym() or member.islnk()
+            ]
+            _check_compression_bomb(
+                len(members),
+                sum(member.size for member in members if member.isfile()),
+                archive_size,
+            )
+
+            for member in tar.getmembers():
+                _check_tar_member(member)
+
+            # Content of the link targets read so far, by normalized name
+            targets = {_tar_link_target(member) for member in members} - {None}
+            contents: dict[str, bytes] = {}
+            total_size = 0
+            for member in members:
+                target = _tar_link_target(member)
+                content = contents.get(target) if target is not None else None
+                if content is None:
+                    # Links are resolved within the archive
+                    try:
+                        fileobj = tar.extractfile(member)
+                    except KeyError:
+                        fileobj = None
+                    if fileobj is None:
+                        continue
+                    with fileobj:
+                        content = fileobj.read()
+                if os.path.normpath(member.name) in targets:
+                    contents[os.path.normpath(member.name)] = content
+
+                # Link sizes are only known once their target is found
+                total_size += len(content)
+                _check_compression_bomb(len(members), total_size, archive_size)
+                yield _sanitize_member_name(member.name), content
+
+    elif zipfile.is_zipfile(source_archive):
+        with zipfile.ZipFile(source_archive, "r") as zip_file:
+            files = [info for info in zip_file.infolist() if not info.is_dir()]
+            _check_compression_bomb(
+                len(files), sum(info.file_size for info in files), archive_size
+            )
+
+            for member in files:
+                if _is_unsafe_zip_symlink(
+                    member, zip_file, _IN_MEMORY_ROOT, zip_password
+                ):
+                    log.warning(
+                        f"Archived file {member.filename} is an unsafe symlink. Skipping it"
+                    )
+                    continue
+
+                if _is_zip_device(member):
+                    log.warning(
+                        f"Archived file {member.filename} is a device file type. Skipping it"
+                    )
+                    continue
+
+                name = _sanitize_member_name(member.filename)
+                if name:
+                    yield name, _read_zip_member(zip_file, member, zip_password)
+    else:
+        raise ValueError(
+            f"unsupported or unreadable archive (not a valid tar or zip): {source_archive}"
+        )
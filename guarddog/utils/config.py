@@ -29,6 +29,15 @@ TOP_PACKAGES_CACHE_LOCATION: str = os.environ.get(
     ),
 )
 
+"""
+This flag specifies if expired top packages caches are refreshed in the background
+- True [default]: The expired cache is used, and refreshed in a background thread
+- False: The expired cache is used, it is only refreshed by `guarddog cache refresh`
+"""
+TOP_PACKAGES_AUTO_REFRESH: bool = (
+    os.environ.get("GUARDDOG_TOP_PACKAGES_AUTO_REFRESH", "true").lower() == "true"
+)
+
 """
 This parameter specifies comman separated file extentions that YARA rules will not run against
 - Default: ini,md,rst,txt,lock,json,yaml,yml,toml,xml,html,rst,csv,sql,pdf,doc,docx,ppt,
@@ -61,3 +70,155 @@ This parameter specifies the maximum number of files allowed in an archive
 - Default: 100000
 """
 MAX_FILE_COUNT: int = int(os.environ.get("GUARDDOG_MAX_FILE_COUNT", 100000))
+
+"""
+This parameter specifies the directory where guarddog persists its caches (compiled rules, ...)
+- Default: $XDG_CACHE_HOME/guarddog, or ~/.cache/guarddog
+"""
+CACHE_LOCATION: str = os.environ.get(
+    "GUARDDOG_CACHE_LOCATION",
+    os.path.join(
+        os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "guarddog"
+    ),
+)
+
+"""
+This flag enables matching the files of a single package against YARA rules in parallel
+- True: files are matched by a pool of at most PARALLELISM worker threads
+- False [default]: files are matched sequentially
+"""
+YARA_PARALLEL_SCAN: bool = (
+    os.environ.get("GUARDDOG_YARA_PARALLEL_SCAN", "false").lower() == "true"
+)
+
+"""
+This flag enables scanning local and remote archives in memory
+- True: archive members are read and matched from memory, without being extracted to disk
+- False [default]: archives are extracted to a temporary directory before being scanned
+"""
+IN_MEMORY_ARCHIVE_SCAN: bool = (
+    os.environ.get("GUARDDOG_IN_MEMORY_ARCHIVE_SCAN", "false").lower() == "true"
+)
+
+"""
+This parameter specifies the total size, in bytes, of the members of an archive scanned in memory
+above which the archive is extracted to disk and scanned from there instead
+- Default: 256 MB
+"""
+IN_MEMORY_ARCHIVE_MAX_SIZE: int = int(
+    os.environ.get("GUARDDOG_IN_MEMORY_ARCHIVE_MAX_SIZE", 256 * 1024 * 1024)
+)
+
+"""
+This parameter specifies the size, in bytes, above which a file is matched against YARA rules
+in overlapping windows of that size rather than all at once. Each window is matched as a file of
+its own: conditions on `filesize` or on absolute offsets apply to the window, not to the file.
+- Default: 16 MB, must be positive
+"""
+YARA_CHUNK_SIZE: int = int(os.environ.get("GUARDDOG_YARA_CHUNK_SIZE", 16 * 1024 * 1024))
+
+"""
+This parameter specifies the overlap, in bytes, between consecutive windows of a file matched
+in chunks. Matches longer than the overlap may be missed at window boundaries, and so may rules
+whose condition needs strings further apart than the overlap.
+- Default: 64 KB, must be at least 0 and less than GUARDDOG_YARA_CHUNK_SIZE
+"""
+YARA_CHUNK_OVERLAP: int = int(os.environ.get("GUARDDOG_YARA_CHUNK_OVERLAP", 64 * 1024))
+
+if YARA_CHUNK_SIZE <= 0:
+    raise ValueError(
+        f"GUARDDOG_YARA_CHUNK_SIZE must be a positive number of bytes, got {YARA_CHUNK_SIZE}"
+    )
+if not 0 <= YARA_CHUNK_OVERLAP < YARA_CHUNK_SIZE:
+    raise ValueError(
+        "GUARDDOG_YARA_CHUNK_OVERLAP must be at least 0 and less than GUARDDOG_YARA_CHUNK_SIZE "
+        f"({YARA_CHUNK_SIZE}), got {YARA_CHUNK_OVERLAP}"
+    )
+
+"""
+This parameter specifies the timeout, in seconds, of YARA on each window of a file matched in chunks
+- Default: 60
+"""
+YARA_SCAN_TIMEOUT: int = int(os.environ.get("GUARDDOG_YARA_SCAN_TIMEOUT", 60))
+
+"""
+This parameter specifies the size, in bytes, above which a file is not matched against YARA rules.
+Skipped files are listed in the errors of the scan.
+- Default: 512 MB
+"""
+YARA_MAX_FILE_SIZE: int = int(
+    os.environ.get("GUARDDOG_YARA_MAX_FILE_SIZE", 512 * 1024 * 1024)
+)
+
+"""
+This flag enables caching the YARA matches of each file, keyed by its SHA-256 and the ruleset,
+so files shared by many packages and versions are matched only once
+- True: matches are persisted in a SQLite database under GUARDDOG_FINDING_CACHE_LOCATION.
+  Sandboxed scans, the default, only read the cache: matches are recorded by scans run with
+  --no-sandbox and by `guarddog cache warm`
+- False [default]: every file is matched on every scan
+"""
+FINDING_CACHE: bool = (
+    os.environ.get("GUARDDOG_FINDING_CACHE", "false").lower() == "true"
+)
+
+"""
+This parameter specifies the directory of the finding cache
+- Default: the findings directory of GUARDDOG_CACHE_LOCATION
+"""
+FINDING_CACHE_LOCATION: str = os.environ.get(
+    "GUARDDOG_FINDING_CACHE_LOCATION", os.path.join(CACHE_LOCATION, "findings")
+)
+
+"""
+This parameter specifies the size, in bytes, of the cached matches above which the least
+recently used files are evicted from the finding cache
+- Default: 256 MB
+"""
+FINDING_CACHE_MAX_SIZE: int = int(
+    os.environ.get("GUARDDOG_FINDING_CACHE_MAX_SIZE", 256 * 1024 * 1024)
+)
+
+"""
+This flag enables persisting the WHOIS lookups of email domains, shared by every guarddog process
+of the user until they expire
+- True [default]: lookups are persisted in a SQLite database under GUARDDOG_DOMAIN_CACHE_LOCATION
+- False: each domain is looked up once per process
+"""
+DOMAIN_CACHE: bool = os.environ.get("GUARDDOG_DOMAIN_CACHE", "true").lower() == "true"
+
+"""
+This parameter specifies the directory of the domain cache
+- Default: the domains directory of GUARDDOG_CACHE_LOCATION
+"""
+DOMAIN_CACHE_LOCATION: str = os.environ.get(
+    "GUARDDOG_DOMAIN_CACHE_LOCATION", os.path.join(CACHE_LOCATION, "domains")
+)
+
+"""
+This parameter specifies how long, in seconds, the lookup of a registered domain is cached. A domain
+that expires in the meantime is only reported once its lookup expires too
+- Default: 1 day
+"""
+DOMAIN_CACHE_TTL: int = int(os.environ.get("GUARDDOG_DOMAIN_CACHE_TTL", 24 * 3600))
+
+"""
+This parameter specifies how long, in seconds, the lookup of a domain that doesn't exist ("no match")
+is cached
+- Default: 1 hour
+"""
+DOMAIN_CACHE_NEGATIVE_TTL: int = int(
+    os.environ.get("GUARDDOG_DOMAIN_CACHE_NEGATIVE_TTL", 3600)
+)
+
+"""
+This parameter specifies the location of the hash reputation index of known benign and known malicious
+files, built with `guarddog hash-index build`. Known files are not matched against YARA rules, known
+malicious files are reported by the known-malicious-file rule. Scans don't use it when the file doesn't exist,
+and then report an error for known-malicious-file when the rule was selected explicitly.
+- Default: hash-reputation.idx in GUARDDOG_CACHE_LOCATION
+"""
+HASH_REPUTATION_INDEX: str = os.environ.get(
+    "GUARDDOG_HASH_REPUTATION_INDEX",
+    os.path.join(CACHE_LOCATION, "hash-reputation.idx"),
+)
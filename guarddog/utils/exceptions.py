@@ -1,2 +1,6 @@
 class MissingEnvironmentVariable(Exception):
     pass
+
+
+class InMemoryBudgetExceeded(Exception):
+    pass
@@ -0,0 +1,60 @@
+"""
+Newline offset index of a file
+
+Converting byte offsets to line numbers by re-reading a file for every offset
+costs O(offsets x file size). The index records the offset of every newline in
+a single pass, after which each conversion is a binary search.
+"""
+
+import re
+from array import array
+from bisect import bisect_left
+from typing import Optional
+
+_NEWLINE = re.compile(b"\n")
+
+
+class LineIndex:
+    """
+    Sorted byte offsets of the newlines of a file
+
+    Line numbers are 1-indexed, as reported to users.
+    """
+
+    def __init__(self, content: bytes):
+        self.size = len(content)
+        self.newlines = array("q", (m.start() for m in _NEWLINE.finditer(content)))
+
+    @classmethod
+    def from_file(cls, file_path: str) -> "LineIndex":
+        with open(file_path, "rb") as f:
+            return cls(f.read())
+
+    @property
+    def line_count(self) -> int:
+        return len(self.newlines) + 1
+
+    def line_number(self, offset: int) -> int:
+        """
+        Returns the line (1-indexed) holding the byte at a given offset
+        """
+        return bisect_left(self.newlines, offset) + 1
+
+    def line_start(self, line_number: int) -> Optional[int]:
+        """
+        Returns the offset of the first byte of a line, None if out of range
+        """
+        if line_number < 1 or line_number > self.line_count:
+            return None
+        return 0 if line_number == 1 else self.newlines[line_number - 2] + 1
+
+    def line_end(self, line_number: int) -> Optional[int]:
+        """
+        Returns the offset of the newline ending a line (or the end of the
+        file for the last line), None if out of range
+        """
+        if line_number < 1 or line_number > self.line_count:
+            return None
+        if line_number > len(self.newlines):
+            return self.size
+        return self.newlines[line_number - 1]
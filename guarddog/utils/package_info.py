@@ -1,7 +1,5 @@
 import logging
 
-import requests
-
 log = logging.getLogger("guarddog")
 
 
@@ -19,6 +17,8 @@ def get_package_info(name: str) -> dict:
         json: package attributes and values
     """
 
+    import requests
+
     url = "https://pypi.org/pypi/%s/json" % (name,)
     log.debug(f"Retrieving PyPI package metadata from {url}")
     response = requests.get(url)
@@ -0,0 +1,62 @@
+import sys
+import time
+
+from guarddog.analyzer.sourcecode import (
+    RULES_MANIFEST_PATH,
+    YaraRule,
+    get_sourcecode_rules,
+    load_yara_rules,
+    write_rules_manifest,
+)
+from guarddog.ecosystems import ECOSYSTEM
+
+
+def _timed(function, *args, **kwargs) -> float:
+    start = time.perf_counter()
+    function(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def _report(what: str, before: float, after: float):
+    print(
+        f"{what} takes {after * 1000:.1f}ms instead of {before * 1000:.1f}ms, "
+        f"{(before - after) * 1000:.1f}ms saved at startup"
+    )
+
+
+def precompile_rulesets():
+    # yara-python is only needed to precompile the rulesets
+    import yara  # type: ignore
+
+    from guarddog.analyzer.yara_rules import get_rule_path, precompile_rules
+
+    selections = {
+        frozenset(r.id for r in get_sourcecode_rules(ecosystem, YaraRule))
+        for ecosystem in ECOSYSTEM
+    }
+    for rule_names in selections:
+        path = precompile_rules(rule_names)
+        print(f"Precompiled {len(rule_names)} rules to {path}")
+        _report(
+            "Loading the precompiled rules",
+            _timed(
+                yara.compile,
+                filepaths={name: get_rule_path(name) for name in rule_names},
+            ),
+            _timed(yara.load, filepath=path),
+        )
+
+
+if __name__ == "__main__":
+    manifest = write_rules_manifest(RULES_MANIFEST_PATH)
+    print(
+        f"Wrote the manifest of {len(manifest['rules'])} rules to {RULES_MANIFEST_PATH}"
+    )
+    _report(
+        "Loading the rule metadata",
+        _timed(load_yara_rules, manifest_path=None),
+        _timed(load_yara_rules, manifest_path=RULES_MANIFEST_PATH),
+    )
+
+    if "--compile" in sys.argv[1:]:
+        precompile_rulesets()
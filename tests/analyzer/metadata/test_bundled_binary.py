@@ -3,6 +3,7 @@ import tempfile
 
 import pytest
 
+from guarddog.analyzer.file_manifest import FileEntry
 from guarddog.analyzer.metadata.bundled_binary import BundledBinary
 from guarddog.analyzer.metadata.npm import NPMBundledBinary
 from guarddog.analyzer.metadata.pypi import PypiBundledBinary
@@ -145,3 +146,32 @@ class TestBundleBinary:
             assert "exe" in msg
             assert "file2" in msg
             assert "elf" in msg
+
+    @pytest.mark.parametrize(
+        "detector",
+        [
+            (pypi_detector),
+            (npm_detector),
+        ],
+    )
+    def test_archive_members_in_memory(self, detector: BundledBinary):
+        manifest = [
+            FileEntry(
+                abspath="pkg.tgz/package/linux.txt",
+                relpath="package/linux.txt",
+                name="linux.txt",
+                content=self.binary_sample_elf,
+            ),
+            FileEntry(
+                abspath="pkg.tgz/package/index.js",
+                relpath="package/index.js",
+                name="index.js",
+                content=b"module.exports = {}",
+            ),
+        ]
+
+        matches, msg = detector.detect_in_manifest({}, manifest)
+
+        assert matches
+        assert "linux.txt (elf)" in msg
+        assert "index.js" not in msg
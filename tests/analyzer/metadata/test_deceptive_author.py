@@ -20,8 +20,9 @@ npm_detector = NPMDeceptiveAuthor()
 # required because mocking in tests will cause get_domain_creation_date()
 # to return different results for a same domain
 @pytest.fixture(autouse=True)
-def clear_caches():
+def clear_caches(monkeypatch):
     guarddog.analyzer.metadata.utils.get_domain_creation_date.cache_clear()
+    monkeypatch.setattr(guarddog.analyzer.metadata.utils, "DOMAIN_CACHE", False)
 
 
 class TestDeceptiveAuthor:
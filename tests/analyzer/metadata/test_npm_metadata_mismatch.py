@@ -1,7 +1,9 @@
+import json
 from copy import deepcopy
 
 import pytest
 
+from guarddog.analyzer.file_manifest import FileEntry
 from guarddog.analyzer.metadata.npm.metadata_mismatch import (
     NPMMetadataMismatchDetector,
     _normalize_git_url,
@@ -111,6 +113,31 @@ class TestNPMMetadataMismatch:
         result, _ = self.mismatch_detector.detect(npm_version_metadata, path="./")
         assert result is False
 
+    def test_package_json_read_in_memory(self, npm_package_info):
+        package_json_metadata = deepcopy(
+            npm_package_info["versions"][self.target_version]
+        )
+        package_json_metadata["scripts"] = {"preinstall": "node steal.js"}
+        manifest = [
+            FileEntry(
+                abspath="pkg.tgz/package/package.json",
+                relpath="package/package.json",
+                name="package.json",
+                content=json.dumps(package_json_metadata).encode(),
+            )
+        ]
+
+        result, message = self.mismatch_detector.detect_in_manifest(
+            npm_package_info, manifest, version=self.target_version
+        )
+        assert result is True
+        assert "node steal.js" in message
+
+        with pytest.raises(ValueError, match="package/package.json"):
+            self.mismatch_detector.detect_in_manifest(
+                npm_package_info, [], version=self.target_version
+            )
+
 
 class TestNormalizeGitUrl:
     """Unit tests for _normalize_git_url."""
@@ -0,0 +1,206 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+from click.testing import CliRunner
+
+from guarddog.analyzer.metadata import get_metadata_detectors, typosquatting
+from guarddog.analyzer.metadata.popular_names import (
+    PopularNames,
+    open_names,
+    write_names,
+)
+from guarddog.analyzer.metadata.pypi import PypiTyposquatDetector
+from guarddog.analyzer.metadata.typosquatting import wait_for_background_refreshes
+from guarddog.cli import cli
+from guarddog.ecosystems import ECOSYSTEM
+
+CACHE_FILE = "top_pypi_packages.json"
+NAMES_FILE = "top_pypi_packages.names"
+STALE_TIMESTAMP = int(time.time()) - 60 * 24 * 3600
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(typosquatting, "TOP_PACKAGES_CACHE_LOCATION", str(tmp_path))
+    return tmp_path
+
+
+def write_cache(cache_dir, packages, timestamp):
+    with open(cache_dir / CACHE_FILE, "w") as f:
+        json.dump({"downloaded_timestamp": timestamp, "packages": packages}, f)
+
+
+def read_cache(cache_dir):
+    with open(cache_dir / CACHE_FILE) as f:
+        return json.load(f)
+
+
+def serve_top_packages(monkeypatch, packages):
+    calls = []
+
+    def network_raw(self, url):
+        calls.append(url)
+        if packages is None:
+            return None
+        return {"rows": [{"project": name} for name in packages]}
+
+    monkeypatch.setattr(
+        PypiTyposquatDetector, "_get_top_packages_network_raw", network_raw
+    )
+    return calls
+
+
+def test_stale_cache_is_served_and_refreshed_in_background(cache_dir, monkeypatch):
+    write_cache(cache_dir, ["requests"], STALE_TIMESTAMP)
+    calls = serve_top_packages(monkeypatch, ["requests", "flask"])
+
+    # The stale names are served without waiting for the download
+    assert PypiTyposquatDetector().popular_packages == {"requests"}
+
+    wait_for_background_refreshes()
+    assert len(calls) == 1
+    cache = read_cache(cache_dir)
+    assert cache["packages"] == ["requests", "flask"]
+    assert cache["downloaded_timestamp"] > STALE_TIMESTAMP
+    assert PypiTyposquatDetector().popular_packages == {"requests", "flask"}
+
+
+def test_stale_cache_is_not_refreshed_without_auto_refresh(cache_dir, monkeypatch):
+    monkeypatch.setattr(typosquatting, "TOP_PACKAGES_AUTO_REFRESH", False)
+    write_cache(cache_dir, ["requests"], STALE_TIMESTAMP)
+    calls = serve_top_packages(monkeypatch, ["requests", "flask"])
+
+    assert PypiTyposquatDetector().popular_packages == {"requests"}
+    wait_for_background_refreshes()
+    assert not calls
+    assert read_cache(cache_dir)["downloaded_timestamp"] == STALE_TIMESTAMP
+
+
+def test_missing_cache_is_downloaded(cache_dir, monkeypatch):
+    calls = serve_top_packages(monkeypatch, ["requests"])
+
+    assert PypiTyposquatDetector().popular_packages == {"requests"}
+    assert len(calls) == 1
+    assert read_cache(cache_dir)["packages"] == ["requests"]
+
+
+def test_refresh_replaces_fresh_cache(cache_dir, monkeypatch):
+    write_cache(cache_dir, ["requests"], int(time.time()))
+    serve_top_packages(monkeypatch, ["requests", "flask"])
+
+    detector = PypiTyposquatDetector()
+    assert detector.refresh_top_packages()
+    assert detector.popular_packages == {"requests", "flask"}
+    assert read_cache(cache_dir)["packages"] == ["requests", "flask"]
+    assert sorted(os.listdir(cache_dir)) == [CACHE_FILE, NAMES_FILE]
+
+
+def test_failed_refresh_keeps_cache(cache_dir, monkeypatch):
+    write_cache(cache_dir, ["requests"], STALE_TIMESTAMP)
+    serve_top_packages(monkeypatch, None)
+
+    with pytest.raises(RuntimeError):
+        PypiTyposquatDetector().refresh_top_packages()
+    assert read_cache(cache_dir)["packages"] == ["requests"]
+
+
+def test_cli_refreshes_cache(cache_dir, monkeypatch):
+    write_cache(cache_dir, ["requests"], STALE_TIMESTAMP)
+    calls = serve_top_packages(monkeypatch, ["requests", "flask"])
+    # Leave the detector shared with the other tests alone
+    monkeypatch.setitem(
+        get_metadata_detectors(ECOSYSTEM.PYPI), "typosquatting", PypiTyposquatDetector()
+    )
+
+    result = CliRunner().invoke(cli, ["cache", "refresh", "--ecosystem", "pypi"])
+    assert result.exit_code == 0, result.output
+    assert len(calls) == 1
+    assert read_cache(cache_dir)["packages"] == ["requests", "flask"]
+
+    serve_top_packages(monkeypatch, None)
+    result = CliRunner().invoke(cli, ["cache", "refresh", "--ecosystem", "pypi"])
+    assert result.exit_code == 1
+
+
+def test_popular_names_file(tmp_path):
+    source = tmp_path / CACHE_FILE
+    source.write_text("{}")
+    path = str(tmp_path / NAMES_FILE)
+    names = {"requests", "flask", "zope-interface", "ñandú", ""}
+    write_names(path, names, STALE_TIMESTAMP, os.stat(source))
+
+    popular = open_names(path, str(source))
+    assert isinstance(popular, PopularNames)
+    assert set(popular) == names
+    assert len(popular) == len(names)
+    assert all(name in popular for name in names)
+    assert "django" not in popular and "request" not in popular
+    assert popular.downloaded_timestamp == STALE_TIMESTAMP
+    assert popular - {"flask"} == names - {"flask"}
+    popular.close()
+
+    # Once the JSON cache is modified, its popular names file is outdated
+    source.write_text('{"packages": []}')
+    assert open_names(path, str(source)) is None
+
+
+def test_names_are_loaded_from_compact_file(cache_dir, monkeypatch):
+    write_cache(cache_dir, ["Requests", "zope.interface"], int(time.time()))
+    serve_top_packages(monkeypatch, None)
+
+    popular = PypiTyposquatDetector().popular_packages
+    assert popular == {"requests", "zope-interface"}
+    assert (cache_dir / NAMES_FILE).exists()
+
+    # The JSON cache is not parsed again
+    monkeypatch.setattr(
+        PypiTyposquatDetector, "_load_cache_file", lambda self, path: None
+    )
+    popular = PypiTyposquatDetector().popular_packages
+    assert isinstance(popular, PopularNames)
+    assert popular == {"requests", "zope-interface"}
+    assert PypiTyposquatDetector().get_typosquatted_package("zope-interfase") == [
+        "zope-interface"
+    ]
+
+
+def test_cache_files_are_readable_by_other_users(cache_dir, monkeypatch):
+    umask = os.umask(0o022)
+    try:
+        write_cache(cache_dir, ["requests"], STALE_TIMESTAMP)
+        serve_top_packages(monkeypatch, ["requests", "flask"])
+        PypiTyposquatDetector().refresh_top_packages()
+    finally:
+        os.umask(umask)
+
+    assert os.stat(cache_dir / CACHE_FILE).st_mode & 0o777 == 0o644
+    assert os.stat(cache_dir / NAMES_FILE).st_mode & 0o777 == 0o644
+
+
+def test_background_refresh_finishes_before_exit(cache_dir):
+    write_cache(cache_dir, ["requests"], STALE_TIMESTAMP)
+    script = f"""
+import time
+from guarddog.analyzer.metadata import typosquatting
+from guarddog.analyzer.metadata.pypi import PypiTyposquatDetector
+
+def network_raw(self, url):
+    time.sleep(0.5)
+    return {{"rows": [{{"project": "requests"}}, {{"project": "flask"}}]}}
+
+typosquatting.TOP_PACKAGES_CACHE_LOCATION = {str(cache_dir)!r}
+typosquatting.TOP_PACKAGES_AUTO_REFRESH = True
+PypiTyposquatDetector._get_top_packages_network_raw = network_raw
+assert PypiTyposquatDetector().popular_packages == {{"requests"}}
+"""
+    result = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+
+    assert read_cache(cache_dir)["packages"] == ["requests", "flask"]
+    assert not [name for name in os.listdir(cache_dir) if name.endswith(".tmp")]
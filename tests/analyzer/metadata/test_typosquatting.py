@@ -1,14 +1,65 @@
+import random
+import string
+
 import pytest
 
 from guarddog.analyzer.metadata.go import GoTyposquatDetector
 from guarddog.analyzer.metadata.npm import NPMTyposquatDetector
 from guarddog.analyzer.metadata.pypi import PypiTyposquatDetector
+from guarddog.analyzer.metadata.rubygems import RubyGemsTyposquatDetector
 from tests.analyzer.metadata.resources.sample_project_info import (
     generate_pypi_project_info,
     generate_npm_project_info,
 )
 
 
+def scan_typosquatted_package(detector, package_name) -> list[str]:
+    """
+    Compares a name to every popular package and its variants, as the detectors
+    did before looking names up in an index
+    """
+    if package_name in detector.popular_packages:
+        return []
+
+    typosquatted = set()
+    for popular_package in detector.popular_packages:
+        variants = [
+            popular_package,
+            *detector._get_confused_forms(popular_package),
+            *detector._generate_permutations(popular_package),
+        ]
+        if any(detector._is_length_one_edit_away(package_name, v) for v in variants):
+            typosquatted.add(popular_package)
+    return list(typosquatted)
+
+
+def typo_names(rng: random.Random, names: list[str], count: int) -> list[str]:
+    """
+    Returns names with a random typo in a popular name, one of its variants or
+    a hyphen permutation of it
+    """
+    alphabet = string.ascii_lowercase + "-."
+    typos = []
+    for _ in range(count):
+        name = rng.choice(names)
+        if "-" in name and rng.random() < 0.3:
+            terms = name.split("-")
+            rng.shuffle(terms)
+            name = "-".join(terms)
+        i = rng.randrange(len(name) + 1)
+        edit = rng.choice(["delete", "insert", "substitute", "swap", "none"])
+        if edit == "delete" and i < len(name):
+            name = name[:i] + name[i + 1 :]
+        elif edit == "insert":
+            name = name[:i] + rng.choice(alphabet) + name[i:]
+        elif edit == "substitute" and i < len(name):
+            name = name[:i] + rng.choice(alphabet) + name[i + 1 :]
+        elif edit == "swap" and i < len(name) - 1:
+            name = name[:i] + name[i + 1] + name[i] + name[i + 2 :]
+        typos.append(name)
+    return typos
+
+
 class TestTyposquatting:
     pypi_detector = PypiTyposquatDetector()
     npm_detector = NPMTyposquatDetector()
@@ -107,3 +158,30 @@ class TestTyposquatting:
         project_info = generate_npm_project_info("name", "lodash.pick")
         matches, _ = self.npm_detector.detect(project_info)
         assert not matches
+
+    @pytest.mark.parametrize(
+        "detector_class",
+        [
+            PypiTyposquatDetector,
+            NPMTyposquatDetector,
+            GoTyposquatDetector,
+            RubyGemsTyposquatDetector,
+        ],
+    )
+    def test_index_matches_scanning_popular_packages(self, detector_class):
+        rng = random.Random(0)
+        detector = detector_class()
+        # Scanning compares a name to every permutation of the popular names
+        names = sorted(p for p in detector.popular_packages if p.count("-") < 6)
+        detector.popular_packages = set(rng.sample(names, 300))
+
+        variants = [
+            variant
+            for package in sorted(detector.popular_packages)
+            for variant in [package, *detector._get_confused_forms(package)]
+        ]
+        queries = typo_names(rng, variants, 200) + ["", "a", "-", "ab"]
+        for name in queries:
+            assert sorted(detector.get_typosquatted_package(name)) == sorted(
+                scan_typosquatted_package(detector, name)
+            ), name
@@ -0,0 +1,41 @@
+"""
+Scaling benchmarks of the source code analyzer
+
+These are not part of the default test run, run them with `make benchmark`.
+Each benchmark times the same workload at two sizes and checks the cost grows
+linearly: a 10x larger input must not take much more than 10x longer.
+"""
+
+import time
+
+from guarddog import ecosystems
+from guarddog.analyzer.analyzer import Analyzer
+
+# A quadratic step would make the larger run ~100x slower
+MAX_SCALING_FACTOR = 25
+
+
+def _time_analyze_yara(analyzer, path, rules) -> float:
+    start = time.perf_counter()
+    analyzer.analyze_yara(str(path), rules)
+    return time.perf_counter() - start
+
+
+def test_yara_findings_dedup_scales_linearly(tmp_path):
+    analyzer = Analyzer(ecosystem=ecosystems.ECOSYSTEM.PYPI)
+    rules = {"threat-filesystem-read"}
+    line = 'open("/home/user/.aws/credentials").read()\n'
+
+    timings = {}
+    for raw_matches in (10_000, 100_000):
+        package = tmp_path / str(raw_matches)
+        package.mkdir()
+        (package / "setup.py").write_text(line * raw_matches)
+
+        result = analyzer.analyze_yara(str(package), rules)
+        # Every raw match but the first and last lines yields the same snippet
+        assert len(result["results"]["threat-filesystem-read"]) == 3
+
+        timings[raw_matches] = _time_analyze_yara(analyzer, package, rules)
+
+    assert timings[100_000] < timings[10_000] * MAX_SCALING_FACTOR
@@ -0,0 +1,54 @@
+"""
+Benchmarks of the risk engine
+
+These are not part of the default test run, run them with `make benchmark`.
+"""
+
+import time
+
+from guarddog.analyzer.risk_engine import (
+    Finding,
+    Level,
+    calculate_risk_score,
+    form_risks_from_findings,
+)
+
+# A quadratic step would make the larger run ~100x slower
+MAX_SCALING_FACTOR = 25
+
+IDENTIFIES = [
+    "capability.network",
+    "capability.network.outbound",
+    "capability.filesystem.read",
+    "capability.process",
+    "threat.network.outbound",
+    "threat.filesystem.read",
+    "threat.process.spawn",
+    "threat.runtime.obfuscation",
+]
+
+
+def _findings(count: int) -> list[Finding]:
+    return [
+        Finding(
+            rule_name=f"rule-{i % 50}",
+            file_path=f"src/module{i % 1000}.py",
+            identifies=IDENTIFIES[i % len(IDENTIFIES)],
+            severity=Level.MEDIUM,
+            mitre_tactics=["exfiltration"],
+        )
+        for i in range(count)
+    ]
+
+
+def _time_scoring(findings) -> float:
+    start = time.perf_counter()
+    calculate_risk_score(form_risks_from_findings(findings))
+    return time.perf_counter() - start
+
+
+def test_risk_scoring_scales_linearly():
+    timings = {count: _time_scoring(_findings(count)) for count in (10_000, 100_000)}
+
+    assert timings[100_000] < timings[10_000] * MAX_SCALING_FACTOR
+    assert timings[100_000] < 1.0
@@ -0,0 +1,58 @@
+"""
+Memory benchmarks of the risk engine
+
+These are not part of the default test run, run them with `make benchmark`.
+"""
+
+import tracemalloc
+
+from guarddog import ecosystems
+from guarddog.analyzer.analyzer import Analyzer
+from guarddog.analyzer.risk_engine import form_risks_from_findings
+
+RULES = [
+    "threat-filesystem-read",
+    "capability-filesystem-read",
+    "threat-network-exfiltration",
+    "capability-network-outbound",
+]
+
+# Bytes allocated per finding, most of them by the Finding objects (about 400
+# before findings were slotted)
+MAX_BYTES_PER_FINDING = 200
+
+
+def _sourcecode_results(count: int) -> dict:
+    return {
+        "results": {
+            rule: [
+                {
+                    "location": f"src/module{i % 500}.py:{i}",
+                    "code": f"payload({i})",
+                    "message": f"Matched {rule}",
+                }
+                for i in range(count // len(RULES))
+            ]
+            for rule in RULES
+        }
+    }
+
+
+def test_risk_objects_memory():
+    analyzer = Analyzer(ecosystem=ecosystems.ECOSYSTEM.PYPI)
+    count = 100_000
+    sourcecode_results = _sourcecode_results(count)
+
+    tracemalloc.start()
+    try:
+        findings = analyzer._convert_to_findings(sourcecode_results["results"])
+        risks = form_risks_from_findings(findings)
+        formatted_risks = analyzer.format_risks(risks, sourcecode_results)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert len(findings) == count
+    assert formatted_risks
+    print(f"{peak / count:.0f} bytes per finding")
+    assert peak / count < MAX_BYTES_PER_FINDING
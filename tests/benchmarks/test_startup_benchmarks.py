@@ -0,0 +1,44 @@
+"""
+Benchmarks of the startup of the CLI
+
+These are not part of the default test run, run them with `make benchmark`.
+"""
+
+import os
+import subprocess
+import sys
+
+# Time spent importing modules when scanning a local directory, measured by
+# `python -X importtime`. Importing every scanner and detector took ~350ms
+IMPORT_TIME_BUDGET = 0.3
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+
+
+def _import_time(*args: str) -> float:
+    """
+    Runs the CLI in a new interpreter and returns the time spent importing
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "guarddog", *args],
+        capture_output=True,
+        text=True,
+        cwd=PROJECT_ROOT,
+    )
+    assert result.returncode == 0, result.stderr
+    self_times = [
+        line.split("|")[0].removeprefix("import time:").strip()
+        for line in result.stderr.splitlines()
+        if line.startswith("import time:") and line.count("|") == 2
+    ]
+    return sum(int(t) for t in self_times if t.isdigit()) / 1_000_000
+
+
+def test_local_scan_import_time(tmp_path):
+    (tmp_path / "setup.py").write_text("print('hello')\n")
+
+    # The fastest of a few runs, the first one may read modules from disk
+    import_time = min(
+        _import_time("pypi", "scan", str(tmp_path), "--no-sandbox") for _ in range(3)
+    )
+    assert import_time < IMPORT_TIME_BUDGET
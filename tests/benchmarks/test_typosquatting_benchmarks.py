@@ -0,0 +1,96 @@
+"""
+Benchmarks of the typosquatting detectors
+
+These are not part of the default test run, run them with `make benchmark`.
+"""
+
+import random
+import time
+import tracemalloc
+
+from guarddog.analyzer.metadata.npm import NPMTyposquatDetector
+from guarddog.analyzer.metadata.pypi import PypiTyposquatDetector
+from tests.analyzer.metadata.test_typosquatting import (
+    scan_typosquatted_package,
+    typo_names,
+)
+
+# Scanning the popular packages takes ~0.1s per PyPI name, and ~0.4s per npm
+# name. Looking a name up in the index takes tens of microseconds
+MIN_SPEEDUP = 100
+MAX_INDEX_BUILD_TIME = 2.0
+
+# Screening a 2,000 dependencies lockfile, once the index is built (~50ms)
+LOCKFILE_SIZE = 2_000
+MAX_SCREENING_TIME = 0.2
+
+# Checking whether a package is popular parsed the JSON cache into a set
+# (~40ms and ~1.4MB retained for PyPI), the compact names file is mapped in
+# well under a millisecond and keeps a few kilobytes on the heap
+MAX_POPULAR_CHECK_TIME = 0.005
+MAX_POPULAR_CHECK_MEMORY = 64 * 1024
+
+
+def _time_per_name(function, names) -> float:
+    start = time.perf_counter()
+    for name in names:
+        function(name)
+    return (time.perf_counter() - start) / len(names)
+
+
+def _benchmark(detector) -> None:
+    rng = random.Random(0)
+    names = typo_names(rng, sorted(detector.popular_packages), 20)
+
+    start = time.perf_counter()
+    detector.index
+    assert time.perf_counter() - start < MAX_INDEX_BUILD_TIME
+
+    scan = _time_per_name(lambda n: scan_typosquatted_package(detector, n), names)
+    lookup = _time_per_name(detector.get_typosquatted_package, names)
+    assert lookup * MIN_SPEEDUP < scan
+
+    for name in names:
+        assert sorted(detector.get_typosquatted_package(name)) == sorted(
+            scan_typosquatted_package(detector, name)
+        )
+
+
+def test_pypi_typosquatting_lookup():
+    _benchmark(PypiTyposquatDetector())
+
+
+def test_npm_typosquatting_lookup():
+    _benchmark(NPMTyposquatDetector())
+
+
+def test_lockfile_screening():
+    detector = PypiTyposquatDetector()
+    detector.index
+    rng = random.Random(0)
+    popular = sorted(detector.popular_packages)
+    names = rng.sample(popular, LOCKFILE_SIZE // 2) + typo_names(
+        rng, popular, LOCKFILE_SIZE // 2
+    )
+
+    start = time.perf_counter()
+    detector.screen(names)
+    assert time.perf_counter() - start < MAX_SCREENING_TIME
+
+
+def test_popular_package_check():
+    # Writes the compact names file if it is missing or outdated
+    PypiTyposquatDetector().popular_packages
+
+    detector = PypiTyposquatDetector()
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        assert detector.get_typosquatted_package("requests") == []
+        elapsed = time.perf_counter() - start
+        retained, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert elapsed < MAX_POPULAR_CHECK_TIME
+    assert retained < MAX_POPULAR_CHECK_MEMORY
@@ -1,8 +1,15 @@
+import io
 import os
+import tarfile
+from unittest import mock
 
 import pytest
+import tarsafe  # type: ignore
 
-from guarddog.utils.archives import safe_extract
+import guarddog.cli
+from guarddog.analyzer.file_manifest import build_archive_manifest
+from guarddog.utils.archives import iter_archive_members, safe_extract
+from guarddog.utils.exceptions import InMemoryBudgetExceeded
 
 FIXTURES = os.path.join(os.path.dirname(__file__), "resources", "archives")
 ENCRYPTED_ZIP = os.path.join(FIXTURES, "encrypted.zip")
@@ -29,3 +36,82 @@ def test_encrypted_zip_wrong_password_raises(tmp_path):
 def test_tar_archive_rejects_password(tmp_path):
     with pytest.raises(ValueError, match="only supported for ZIP"):
         safe_extract(PLAIN_TARGZ, str(tmp_path), zip_password=ZIP_PASSWORD)
+
+
+def test_archive_members_are_read_in_memory():
+    assert dict(iter_archive_members(ENCRYPTED_ZIP, zip_password=ZIP_PASSWORD)) == {
+        "index.js": b'console.log("hi")\n',
+        "package.json": b'{"name":"x","version":"1.0.0"}\n',
+    }
+
+    tar_members = dict(iter_archive_members(PLAIN_TARGZ))
+    assert "index.js" in tar_members
+    assert tar_members["package.json"].startswith(b"{")
+
+
+def test_archive_members_apply_extraction_checks(tmp_path):
+    with pytest.raises(RuntimeError, match="password required"):
+        list(iter_archive_members(ENCRYPTED_ZIP))
+    with pytest.raises(ValueError, match="only supported for ZIP"):
+        list(iter_archive_members(PLAIN_TARGZ, zip_password=ZIP_PASSWORD))
+
+    traversal = tmp_path / "traversal.tar.gz"
+    with tarfile.open(traversal, "w:gz") as tar:
+        member = tarfile.TarInfo("../evil.js")
+        payload = b"require('child_process')"
+        member.size = len(payload)
+        tar.addfile(member, io.BytesIO(payload))
+    with pytest.raises(tarsafe.TarSafeException, match="directory traversal"):
+        list(iter_archive_members(str(traversal)))
+
+
+def _write_linked_tar(path, link_count, size=64 * 1024):
+    # Links to a single incompressible member
+    with tarfile.open(path, "w:gz") as tar:
+        member = tarfile.TarInfo("package/index.js")
+        payload = os.urandom(size)
+        member.size = len(payload)
+        tar.addfile(member, io.BytesIO(payload))
+        for i in range(link_count):
+            link = tarfile.TarInfo(f"package/link-{i}.js")
+            link.type = tarfile.LNKTYPE if i % 2 else tarfile.SYMTYPE
+            link.linkname = "package/index.js" if i % 2 else "index.js"
+            tar.addfile(link)
+    return str(path)
+
+
+def test_archive_links_share_their_target_content(tmp_path):
+    archive = _write_linked_tar(tmp_path / "links.tar.gz", 20)
+
+    members = list(iter_archive_members(archive))
+    assert len(members) == 21
+    assert all(content is members[0][1] for _, content in members)
+
+    # Links are held in memory once
+    manifest = build_archive_manifest(archive, max_size=64 * 1024)
+    assert len(manifest) == 21
+
+
+def test_archive_links_count_in_compression_limits(tmp_path):
+    archive = _write_linked_tar(tmp_path / "links.tar.gz", 200)
+
+    with pytest.raises(ValueError, match="compression bomb"):
+        list(iter_archive_members(archive))
+
+
+def test_archive_over_in_memory_budget_is_extracted(tmp_path):
+    archive = _write_linked_tar(tmp_path / "links.tar.gz", 0)
+    with pytest.raises(InMemoryBudgetExceeded):
+        build_archive_manifest(archive, max_size=1024)
+
+    scanner = mock.MagicMock()
+    scanner.scan_archive.side_effect = InMemoryBudgetExceeded("too large")
+    scanner.scan_local.return_value = {}
+    extract_dir = str(tmp_path / "extracted")
+    with mock.patch.object(guarddog.cli, "IN_MEMORY_ARCHIVE_SCAN", True):
+        guarddog.cli._scan_archive(scanner, archive, extract_dir, None, None, None)
+
+    scanner.scan_local.assert_called_once_with(
+        extract_dir, None, info=None, baseline=None
+    )
+    assert os.path.exists(os.path.join(extract_dir, "package", "index.js"))
@@ -0,0 +1,107 @@
+import os
+import subprocess
+import sys
+
+import pytest
+import yara  # type: ignore
+
+from guarddog import ecosystems
+from guarddog.analyzer.analyzer import Analyzer
+from guarddog.analyzer.chunked_match import iter_windows, match_in_windows
+
+RULES = {"threat-filesystem-read", "capability-process-hooks"}
+
+
+def _write_large_source(directory, name="bundle.js"):
+    filler = "var x = 1;\n" * 400
+    path = directory / name
+    path.write_text(
+        filler
+        + 'fs.readFileSync("/home/user/.aws/credentials");\n'
+        + filler
+        + 'fs.readFileSync("/etc/passwd");\n'
+        + filler
+    )
+    return path
+
+
+def test_windows_overlap_and_cover_the_file():
+    windows = list(iter_windows(10_000, 4096, 512))
+    assert windows[0] == (0, 4096)
+    assert windows[-1][1] == 10_000
+    for (_, previous_end), (start, _) in zip(windows, windows[1:]):
+        assert previous_end - start == 512
+
+
+@pytest.mark.parametrize("window_size, overlap", [(0, 0), (4096, 4096), (4096, -1)])
+def test_invalid_windows_are_rejected(window_size, overlap):
+    with pytest.raises(ValueError):
+        list(iter_windows(10_000, window_size, overlap))
+
+
+@pytest.mark.parametrize(
+    "variable, value",
+    [("GUARDDOG_YARA_CHUNK_SIZE", "0"), ("GUARDDOG_YARA_CHUNK_OVERLAP", "16777216")],
+)
+def test_invalid_chunk_settings_are_rejected(variable, value):
+    result = subprocess.run(
+        [sys.executable, "-c", "import guarddog.utils.config"],
+        env={**os.environ, variable: value},
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode != 0
+    assert f"ValueError: {variable} must be" in result.stderr
+
+
+def test_chunked_scan_matches_whole_file_scan(tmp_path):
+    _write_large_source(tmp_path)
+
+    whole = Analyzer(ecosystem=ecosystems.ECOSYSTEM.NPM)
+    chunked = Analyzer(ecosystem=ecosystems.ECOSYSTEM.NPM)
+    chunked.chunk_size = 4096
+    chunked.chunk_overlap = 512
+
+    expected = whole.analyze_sourcecode(str(tmp_path), RULES)
+    result = chunked.analyze_sourcecode(str(tmp_path), RULES)
+
+    # Matches of separate windows are merged in offset order
+    def by_location(findings):
+        return sorted(findings, key=lambda f: f["location"])
+
+    assert len(expected["results"]["threat-filesystem-read"]) == 2
+    assert by_location(result["results"]["threat-filesystem-read"]) == by_location(
+        expected["results"]["threat-filesystem-read"]
+    )
+    assert result["issues"] == expected["issues"]
+    assert result["errors"] == expected["errors"] == {}
+
+
+def test_files_over_the_size_cap_are_reported(tmp_path):
+    _write_large_source(tmp_path)
+    analyzer = Analyzer(ecosystem=ecosystems.ECOSYSTEM.NPM)
+    analyzer.max_file_size = 1024
+
+    result = analyzer.analyze_sourcecode(str(tmp_path), RULES)
+
+    assert not result["results"]["threat-filesystem-read"]
+    assert "bundle.js" in result["errors"]["yara-file-size-limit"]
+
+
+def test_timed_out_windows_are_skipped():
+    class TimingOutRules:
+        def __init__(self):
+            self.calls = []
+
+        def match(self, data, timeout):
+            self.calls.append(timeout)
+            if len(self.calls) == 2:
+                raise yara.TimeoutError()
+            return []
+
+    rules = TimingOutRules()
+    matches, timed_out = match_in_windows(rules, b"a" * 10_000, 4096, 512, 5)
+
+    assert matches == []
+    assert timed_out == 1
+    assert rules.calls == [5, 5, 5]
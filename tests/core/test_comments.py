@@ -0,0 +1,77 @@
+import pytest
+
+from guarddog.analyzer.comments import index_comments
+from guarddog.ecosystems import LANGUAGE
+
+
+def _in_comment(source: str, needle: str, language: LANGUAGE) -> bool:
+    content = source.encode()
+    comment_index = index_comments(content, language)
+    assert comment_index is not None
+    return comment_index.contains(content.index(needle.encode()))
+
+
+@pytest.mark.parametrize(
+    "source,needle,expected",
+    [
+        ("// os.homedir()\nconst a = 1;", "os.homedir", True),
+        ("const a = os.homedir(); // home", "home", False),
+        ("const a = 1; // os.homedir()", "os.homedir", True),
+        ("/* block\n os.userInfo()\n*/\nos.userInfo();", "os.userInfo", True),
+        ("/* block */\nconst a = os.userInfo();", "os.userInfo", False),
+        ('const url = "http://evil.com"; os.homedir();', "os.homedir", False),
+        ('const s = "/*"; os.homedir(); // "*/"', "os.homedir", False),
+        ("const re = /'/g; os.homedir();", "os.homedir", False),
+        ("const re = /\\/\\*/; os.homedir();", "os.homedir", False),
+        ("const x = a / b; // c / d\nos.homedir();", "os.homedir", False),
+        ("const t = `// ${a}`; os.homedir();", "os.homedir", False),
+    ],
+)
+def test_javascript_comments(source, needle, expected):
+    assert _in_comment(source, needle, LANGUAGE.JAVASCRIPT) is expected
+
+
+@pytest.mark.parametrize(
+    "source,needle,expected",
+    [
+        ("# os.system('id')\nimport os", "os.system", True),
+        ("os.system('id')  # run", "run", True),
+        ("os.system('id')  # run", "os.system", False),
+        ('url = "http://x#y"\nos.system("id")', "os.system", False),
+        ('def f():\n    """\n    Uses os.system\n    """\n', "os.system", True),
+        ("'''\nos.system('id')\n'''\nx = 1", "os.system", True),
+        ('payload = """\nos.system("id")\n"""\nexec(payload)', "os.system", False),
+        ('exec(\n    """\nos.system("id")\n"""\n)', "os.system", False),
+        ('"""doc"""\nos.system("id")\n"""more"""', "os.system", False),
+    ],
+)
+def test_python_comments_and_docstrings(source, needle, expected):
+    assert _in_comment(source, needle, LANGUAGE.PYTHON) is expected
+
+
+@pytest.mark.parametrize(
+    "source,needle,expected",
+    [
+        ("# Etc.getlogin\nuser = Etc.getlogin", "Etc.getlogin", True),
+        ('name = "#{user}"; Etc.getlogin', "Etc.getlogin", False),
+        ("=begin\nEtc.getlogin\n=end\nputs 1", "Etc.getlogin", True),
+    ],
+)
+def test_ruby_comments(source, needle, expected):
+    assert _in_comment(source, needle, LANGUAGE.RUBY) is expected
+
+
+@pytest.mark.parametrize(
+    "source,needle,expected",
+    [
+        ('// os.Getenv("HOME")\nfunc main() {}', "os.Getenv", True),
+        ('s := `// raw`; os.Getenv("HOME")', "os.Getenv", False),
+        ('/* os.Getenv("HOME") */', "os.Getenv", True),
+    ],
+)
+def test_go_comments(source, needle, expected):
+    assert _in_comment(source, needle, LANGUAGE.GO) is expected
+
+
+def test_unsupported_language_has_no_index():
+    assert index_comments(b"# comment", None) is None
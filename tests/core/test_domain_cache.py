@@ -0,0 +1,111 @@
+from datetime import datetime, timezone
+
+import pytest
+
+import guarddog.analyzer.metadata.utils
+from guarddog.analyzer.metadata import domain_cache
+from guarddog.analyzer.metadata.domain_cache import DomainCache
+from guarddog.analyzer.metadata.utils import get_domain_creation_date
+from tests.analyzer.metadata.utils import MockWhoIs
+
+CREATION_DATE = datetime(1995, 8, 13, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(domain_cache.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def whois_calls(tmp_path, monkeypatch):
+    calls = []
+
+    def mock_whois(domain):
+        from whois.exceptions import PywhoisError
+
+        calls.append(domain)
+        if domain == "unclaimed.com":
+            raise PywhoisError('No match for "unclaimed.com".')
+        if domain == "rate-limited.com":
+            raise PywhoisError("Error trying to connect to socket: closing socket")
+        if domain == "no-date.com":
+            return MockWhoIs(None)
+        return MockWhoIs(CREATION_DATE.replace(tzinfo=None))
+
+    monkeypatch.setattr("whois.whois", mock_whois)
+    monkeypatch.setattr(guarddog.analyzer.metadata.utils, "DOMAIN_CACHE", True)
+    monkeypatch.setattr(
+        guarddog.analyzer.metadata.utils,
+        "_domain_cache",
+        DomainCache(str(tmp_path / "domains.db"), 3600, 60),
+    )
+    get_domain_creation_date.cache_clear()
+    yield calls
+    get_domain_creation_date.cache_clear()
+
+
+def test_lookups_are_shared_by_caches(tmp_path):
+    path = str(tmp_path / "domains.db")
+    DomainCache(path, 3600, 60).put("Example.com", CREATION_DATE, True)
+    DomainCache(path, 3600, 60).put("unclaimed.com", None, False)
+
+    # Another process opening the same database
+    cache = DomainCache(path, 3600, 60)
+    assert cache.get("example.com") == (CREATION_DATE, True)
+    assert cache.get("unclaimed.com") == (None, False)
+    assert cache.get("other.com") is None
+
+
+def test_lookups_expire(tmp_path, clock):
+    cache = DomainCache(str(tmp_path / "domains.db"), 3600, 60)
+    cache.put("example.com", CREATION_DATE, True)
+    cache.put("unclaimed.com", None, False)
+
+    clock[0] += 120
+    assert cache.get("example.com") == (CREATION_DATE, True)
+    assert cache.get("unclaimed.com") is None
+
+    clock[0] += 3600
+    assert cache.get("example.com") is None
+
+
+def test_unusable_cache_is_not_fatal(tmp_path):
+    (tmp_path / "not-a-directory").write_text("")
+    cache = DomainCache(str(tmp_path / "not-a-directory" / "domains.db"), 3600, 60)
+
+    cache.put("example.com", CREATION_DATE, True)
+    assert cache.get("example.com") is None
+
+
+def test_domains_are_looked_up_once_across_processes(whois_calls):
+    assert get_domain_creation_date("example.com") == (CREATION_DATE, True)
+    assert get_domain_creation_date("unclaimed.com") == (None, False)
+
+    # A new process only has the persistent cache
+    get_domain_creation_date.cache_clear()
+    assert get_domain_creation_date("example.com") == (CREATION_DATE, True)
+    assert get_domain_creation_date("unclaimed.com") == (None, False)
+    assert whois_calls == ["example.com", "unclaimed.com"]
+
+
+def test_failed_lookups_are_not_persisted(whois_calls):
+    assert get_domain_creation_date("rate-limited.com") == (None, True)
+    assert get_domain_creation_date("no-date.com") == (None, True)
+
+    get_domain_creation_date.cache_clear()
+    assert get_domain_creation_date("rate-limited.com") == (None, True)
+    assert get_domain_creation_date("no-date.com") == (None, True)
+    assert whois_calls == ["rate-limited.com", "no-date.com"] * 2
+
+
+def test_read_only_cache_is_not_written(tmp_path):
+    path = str(tmp_path / "domains.db")
+    DomainCache(path, 3600, 60).put("example.com", CREATION_DATE, True)
+
+    cache = DomainCache(path, 3600, 60)
+    cache.open(read_only=True)
+    assert cache.get("example.com") == (CREATION_DATE, True)
+    cache.put("other.com", CREATION_DATE, True)
+    assert DomainCache(path, 3600, 60).get("other.com") is None
@@ -0,0 +1,205 @@
+import os
+import random
+import shutil
+
+from click.testing import CliRunner
+
+from guarddog import ecosystems
+from guarddog.analyzer.analyzer import Analyzer
+from guarddog.analyzer.risk_engine import (
+    Finding,
+    IncrementalRiskScorer,
+    Level,
+    RiskLabel,
+    calculate_risk_score,
+    form_risks_from_findings,
+)
+from guarddog.analyzer.rule_metadata import plan_rule_batches
+from guarddog.cli import cli
+
+SAMPLES = os.path.join(os.path.dirname(__file__), "..", "analyzer", "sourcecode")
+IDENTIFIES = [
+    "capability.network",
+    "capability.network.outbound",
+    "capability.filesystem.read",
+    "capability.process",
+    "threat.network.outbound",
+    "threat.filesystem.read",
+    "threat.process.spawn",
+    "threat.runtime.obfuscation",
+    "threat.metadata.typosquatting",
+]
+TACTICS = [[], ["execution"], ["credential-access"], ["exfiltration"], ["discovery"]]
+
+
+def _random_rule(rng, i):
+    return Finding(
+        rule_name=f"rule-{i}",
+        file_path="",
+        identifies=rng.choice(IDENTIFIES),
+        severity=rng.choice(list(Level)),
+        mitre_tactics=rng.choice(TACTICS),
+        specificity=rng.choice(list(Level)),
+        sophistication=rng.choice(list(Level)),
+        max_hits=rng.choice([1, 3, 5]),
+    )
+
+
+def _random_findings(rng, rule):
+    return [
+        Finding(
+            rule_name=rule.rule_name,
+            file_path=f"file{rng.randrange(3)}.py",
+            identifies=rule.identifies,
+            severity=rule.severity,
+            mitre_tactics=rule.mitre_tactics,
+            specificity=rule.specificity,
+            sophistication=rule.sophistication,
+            max_hits=rule.max_hits,
+        )
+        for _ in range(rng.randrange(rule.max_hits + 1))
+    ]
+
+
+def test_score_bounds_hold_whatever_the_pending_rules_report():
+    rng = random.Random(0)
+    for _ in range(300):
+        rules = [_random_rule(rng, i) for i in range(rng.randrange(1, 12))]
+        findings = {rule.rule_name: _random_findings(rng, rule) for rule in rules}
+        final_score = calculate_risk_score(
+            form_risks_from_findings([f for fs in findings.values() for f in fs])
+        ).score
+
+        scorer = IncrementalRiskScorer()
+        for i, rule in enumerate(rules):
+            lowest, highest = scorer.score_bounds(rules[i:])
+            assert lowest <= scorer.score().score <= highest or not scorer.findings
+            assert lowest <= final_score <= highest
+            scorer.add_all(findings[rule.rule_name])
+
+        assert scorer.score_bounds([]) == (final_score, final_score)
+
+
+def test_verdict_is_decided_by_a_standalone_threat():
+    scorer = IncrementalRiskScorer()
+    pending = [
+        Finding(
+            rule_name="capability",
+            file_path="",
+            identifies="capability.network",
+            severity=Level.LOW,
+            mitre_tactics=[],
+            max_hits=1,
+        )
+    ]
+    # Capabilities alone never form risks
+    assert scorer.reaches(RiskLabel.SUSPICIOUS, pending) is False
+
+    pending.append(
+        Finding(
+            rule_name="threat",
+            file_path="",
+            identifies="threat.network.outbound",
+            severity=Level.HIGH,
+            mitre_tactics=["exfiltration"],
+            max_hits=5,
+        )
+    )
+    assert scorer.reaches(RiskLabel.SUSPICIOUS, pending) is None
+
+    scorer.add(
+        Finding(
+            rule_name="obfuscation",
+            file_path="setup.py",
+            identifies="threat.runtime.obfuscation",
+            severity=Level.HIGH,
+            mitre_tactics=["defense-evasion"],
+            specificity=Level.HIGH,
+            sophistication=Level.HIGH,
+        )
+    )
+    # The pending threats can't make low specificity dominant
+    assert scorer.reaches(RiskLabel.SUSPICIOUS, pending) is True
+    assert scorer.reaches(RiskLabel.SUSPICIOUS, []) is True
+
+
+def test_batches_cover_every_rule_once():
+    analyzer = Analyzer(ecosystem=ecosystems.ECOSYSTEM.PYPI)
+    batches = plan_rule_batches(
+        ecosystems.ECOSYSTEM.PYPI, analyzer.metadata_ruleset, analyzer.yara_ruleset
+    )
+
+    metadata_rules = [rule for batch, _ in batches for rule in batch]
+    sourcecode_rules = [rule for _, batch in batches for rule in batch]
+    assert sorted(metadata_rules) == sorted(analyzer.metadata_ruleset)
+    assert sorted(sourcecode_rules) == sorted(analyzer.yara_ruleset)
+
+
+def _copy_samples(directory, extension):
+    directory.mkdir()
+    for name in os.listdir(SAMPLES):
+        if name.endswith(extension):
+            shutil.copy(os.path.join(SAMPLES, name), directory)
+    return str(directory)
+
+
+def test_scan_stops_once_high_risk_is_certain(tmp_path):
+    package = _copy_samples(tmp_path / "package", ".py")
+    analyzer = Analyzer(ecosystem=ecosystems.ECOSYSTEM.PYPI)
+    expected = analyzer.calculate_package_risk_score(
+        analyzer.analyze_sourcecode(package)
+    )
+
+    analyzer.stop_at = RiskLabel.HIGH_RISK
+    result = analyzer.analyze_until_verdict(package)
+
+    assert expected["label"] == RiskLabel.HIGH_RISK
+    assert result["risk_score"]["label"] == RiskLabel.HIGH_RISK
+    assert result["partial"] is True
+    assert result["skipped_rules"]
+    assert not set(result["skipped_rules"]) & set(result["results"])
+
+
+def test_undecided_scan_runs_every_rule(tmp_path):
+    package = tmp_path / "package"
+    package.mkdir()
+    (package / "index.js").write_text("module.exports = 1;\n")
+    analyzer = Analyzer(ecosystem=ecosystems.ECOSYSTEM.NPM)
+    expected = analyzer.analyze_sourcecode(str(package))
+
+    analyzer.stop_at = RiskLabel.HIGH_RISK
+    result = analyzer.analyze_until_verdict(str(package))
+
+    assert "partial" not in result
+    assert result["results"] == expected["results"]
+    assert result["risk_score"]["label"] == RiskLabel.NO_RISKS_DETECTED
+
+
+def test_cli_exits_non_zero_when_label_is_reached(tmp_path):
+    package = _copy_samples(tmp_path / "package", ".py")
+    result = CliRunner().invoke(
+        cli,
+        [
+            "pypi",
+            "scan",
+            package,
+            "--stop-at",
+            "high_risk",
+            "--exit-non-zero-on-finding",
+            "--no-sandbox",
+        ],
+    )
+    assert result.exit_code == 1, result.output
+    assert "Partial scan" in result.output
+
+
+def test_cli_rejects_stop_at_with_manifest_or_profile(tmp_path):
+    package = tmp_path / "package"
+    package.mkdir()
+    (package / "setup.py").write_text("print('hello')\n")
+    for flag in ("--record-manifest", "--profile-rules"):
+        result = CliRunner().invoke(
+            cli,
+            ["pypi", "scan", str(package), "--stop-at", "high_risk", flag],
+        )
+        assert result.exit_code == 1, result.output
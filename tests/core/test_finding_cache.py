@@ -0,0 +1,141 @@
+from click.testing import CliRunner
+
+import guarddog.analyzer.analyzer
+import guarddog.analyzer.metadata.utils
+import guarddog.cli
+from guarddog import ecosystems
+from guarddog.analyzer.analyzer import Analyzer
+from guarddog.analyzer.chunked_match import RuleMatch, StringInstance, StringMatch
+from guarddog.analyzer.finding_cache import FindingCache
+
+RULES = {"threat-filesystem-read", "capability-process-hooks"}
+
+
+def _write_package(directory):
+    directory.mkdir()
+    (directory / "index.js").write_text(
+        'fs.readFileSync("/home/user/.aws/credentials");\n'
+        "// fs.readFileSync('/etc/passwd');\n"
+    )
+    return directory
+
+
+def _match(rule, size):
+    return RuleMatch(
+        rule=rule,
+        namespace=rule,
+        meta={"description": "test"},
+        strings=[
+            StringMatch(
+                identifier="$a",
+                instances=[StringInstance(0, b"x" * size, size)],
+            )
+        ],
+    )
+
+
+def test_cached_scan_matches_uncached_scan(tmp_path):
+    # The same file ships in two packages
+    first = _write_package(tmp_path / "first")
+    second = _write_package(tmp_path / "second")
+
+    expected = Analyzer(ecosystem=ecosystems.ECOSYSTEM.NPM).analyze_sourcecode(
+        str(first), RULES
+    )
+
+    analyzer = Analyzer(ecosystem=ecosystems.ECOSYSTEM.NPM)
+    analyzer.finding_cache = FindingCache(str(tmp_path / "cache.db"), 1024 * 1024)
+    matched = []
+    match_file = analyzer._match_file
+    analyzer._match_file = lambda rules, entry, *args: matched.append(
+        entry.relpath
+    ) or match_file(rules, entry, *args)
+
+    assert analyzer.analyze_sourcecode(str(first), RULES) == expected
+    assert analyzer.analyze_sourcecode(str(second), RULES) == expected
+    assert matched == ["index.js"]
+
+
+def test_cache_keys_on_ruleset(tmp_path):
+    cache = FindingCache(str(tmp_path / "cache.db"), 1024 * 1024)
+    cache.put("digest", "ruleset-a", [_match("rule", 4)])
+
+    assert cache.get("digest", "ruleset-a") == [_match("rule", 4)]
+    assert cache.get("digest", "ruleset-b") is None
+    assert cache.get("other", "ruleset-a") is None
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = FindingCache(str(tmp_path / "cache.db"), 1024)
+    cache.put("a", "ruleset", [_match("rule", 200)])
+    cache.put("b", "ruleset", [_match("rule", 200)])
+    # Reading "a" makes "b" the least recently used entry
+    assert cache.get("a", "ruleset") is not None
+    cache.put("c", "ruleset", [_match("rule", 200)])
+
+    assert cache.get("a", "ruleset") is not None
+    assert cache.get("b", "ruleset") is None
+    assert cache.get("c", "ruleset") is not None
+
+
+def test_unusable_cache_is_not_fatal(tmp_path):
+    (tmp_path / "not-a-directory").write_text("")
+    cache = FindingCache(str(tmp_path / "not-a-directory" / "cache.db"), 1024)
+
+    cache.put("a", "ruleset", [])
+    assert cache.get("a", "ruleset") is None
+
+
+def test_read_only_cache_is_not_written(tmp_path):
+    path = str(tmp_path / "cache.db")
+    FindingCache(path, 1024 * 1024).put("a", "ruleset", [_match("rule", 4)])
+
+    cache = FindingCache(path, 1024 * 1024)
+    cache.open(read_only=True)
+    assert cache.get("a", "ruleset") == [_match("rule", 4)]
+    cache.put("b", "ruleset", [_match("rule", 4)])
+    assert FindingCache(path, 1024 * 1024).get("b", "ruleset") is None
+
+    # A read-only cache that doesn't exist yet is not created
+    missing = FindingCache(str(tmp_path / "missing" / "cache.db"), 1024 * 1024)
+    missing.open(read_only=True)
+    missing.put("a", "ruleset", [])
+    assert missing.get("a", "ruleset") is None
+    assert not (tmp_path / "missing").exists()
+
+
+def test_cli_warms_cache_for_sandboxed_scans(tmp_path, monkeypatch):
+    monkeypatch.setattr(guarddog.cli, "FINDING_CACHE", True)
+    monkeypatch.setattr(guarddog.analyzer.analyzer, "FINDING_CACHE", True)
+    monkeypatch.setattr(
+        guarddog.analyzer.analyzer, "FINDING_CACHE_LOCATION", str(tmp_path / "cache")
+    )
+    monkeypatch.setattr(guarddog.analyzer.metadata.utils, "DOMAIN_CACHE", False)
+    trusted = _write_package(tmp_path / "trusted")
+    scanned = _write_package(tmp_path / "scanned")
+
+    result = CliRunner().invoke(
+        guarddog.cli.cli, ["cache", "warm", "--ecosystem", "npm", str(trusted)]
+    )
+    assert result.exit_code == 0, result.output
+
+    # A sandboxed scan opens the cache read-only
+    analyzer = Analyzer(ecosystem=ecosystems.ECOSYSTEM.NPM)
+    analyzer.load_caches()
+    matched = []
+    match_file = analyzer._match_file
+    analyzer._match_file = lambda rules, entry, *args: matched.append(
+        entry.relpath
+    ) or match_file(rules, entry, *args)
+
+    result = analyzer.analyze_sourcecode(str(scanned))
+    assert len(result["results"]["threat-filesystem-read"]) == 1
+    assert matched == []
+
+
+def test_cli_warm_requires_enabled_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(guarddog.cli, "FINDING_CACHE", False)
+    result = CliRunner().invoke(
+        guarddog.cli.cli, ["cache", "warm", "--ecosystem", "npm", str(tmp_path)]
+    )
+    assert result.exit_code == 1
@@ -0,0 +1,122 @@
+import hashlib
+import os
+import zipfile
+
+from click.testing import CliRunner
+
+from guarddog import ecosystems
+from guarddog.analyzer.analyzer import Analyzer
+from guarddog.analyzer.hash_reputation import (
+    KNOWN_MALICIOUS_FILE_RULE,
+    HashReputationIndex,
+    Reputation,
+    hash_directories,
+    read_index,
+    write_index,
+)
+from guarddog.cli import cli
+
+PAYLOAD = b'fs.readFileSync("/home/user/.aws/credentials");\n' * 4
+LIBRARY = b'fs.readFileSync("/etc/passwd"); // vendored library\n' * 4
+
+
+def _digest(content):
+    return hashlib.sha256(content).digest()
+
+
+def test_lookup_in_sorted_index(tmp_path):
+    benign = {_digest(str(i).encode()) for i in range(1000)}
+    malicious = {_digest(b"payload"), _digest(b"1")}
+    path = str(tmp_path / "index")
+    write_index(path, benign, malicious)
+
+    index = HashReputationIndex(path)
+    assert all(index.lookup(digest) == Reputation.BENIGN for digest in benign)
+    assert index.lookup(_digest(b"payload")) == Reputation.MALICIOUS
+    assert index.lookup(_digest(b"unknown")) is None
+    index.close()
+
+    # Files also shipped by benign packages are never reported as malicious
+    assert read_index(path) == (benign, {_digest(b"payload")})
+
+
+def test_hash_directories_reads_encrypted_archives(tmp_path):
+    samples = tmp_path / "samples"
+    samples.mkdir()
+    (samples / "__init__.py").write_bytes(b"")
+    (samples / "index.js").write_bytes(PAYLOAD)
+    # zipfile can't write encrypted archives, the password is ignored when
+    # reading unencrypted members
+    with zipfile.ZipFile(samples / "sample.zip", "w") as zf:
+        zf.writestr("package/lib.js", LIBRARY)
+
+    digests = hash_directories([str(samples)], b"infected", Reputation.MALICIOUS)
+
+    # Empty files are not indexed as malicious
+    assert digests == {_digest(PAYLOAD), _digest(LIBRARY)}
+
+
+def test_analyzer_skips_known_files(tmp_path):
+    package = tmp_path / "package"
+    package.mkdir()
+    (package / "payload.js").write_bytes(PAYLOAD)
+    (package / "library.js").write_bytes(LIBRARY)
+    path = str(tmp_path / "index")
+    write_index(path, {_digest(LIBRARY)}, {_digest(PAYLOAD)})
+
+    analyzer = Analyzer(ecosystem=ecosystems.ECOSYSTEM.NPM)
+    analyzer.hash_index = HashReputationIndex(path)
+    result = analyzer.analyze_sourcecode(str(package))
+
+    findings = result["results"][KNOWN_MALICIOUS_FILE_RULE]
+    assert [f["location"] for f in findings] == ["payload.js:1"]
+    # Neither file is matched by YARA
+    assert not result["results"]["threat-filesystem-read"]
+
+    risk_score = analyzer.calculate_package_risk_score(result)
+    risks = risk_score["_risks"]
+    assert [risk.threat_finding.rule_name for risk in risks] == [
+        KNOWN_MALICIOUS_FILE_RULE
+    ]
+    assert risks[0].capability_finding is None
+
+
+def test_analyzer_reports_missing_index(tmp_path):
+    package = tmp_path / "package"
+    package.mkdir()
+    (package / "payload.js").write_bytes(PAYLOAD)
+
+    analyzer = Analyzer(ecosystem=ecosystems.ECOSYSTEM.NPM)
+    analyzer.hash_index = None
+    result = analyzer.analyze_sourcecode(
+        str(package), rules={KNOWN_MALICIOUS_FILE_RULE}
+    )
+
+    assert KNOWN_MALICIOUS_FILE_RULE not in result["results"]
+    assert "no hash reputation index" in result["errors"][KNOWN_MALICIOUS_FILE_RULE]
+    # Scans of every rule don't report the index as missing
+    assert not analyzer.analyze_sourcecode(str(package))["errors"]
+
+
+def test_cli_builds_and_updates_index(tmp_path):
+    benign = tmp_path / "benign"
+    benign.mkdir()
+    (benign / "lib.js").write_bytes(LIBRARY)
+    malicious = tmp_path / "malicious"
+    malicious.mkdir()
+    (malicious / "index.js").write_bytes(PAYLOAD)
+    index = str(tmp_path / "index")
+
+    runner = CliRunner()
+    result = runner.invoke(
+        cli, ["hash-index", "build", "--benign", str(benign), "--index", index]
+    )
+    assert result.exit_code == 0, result.output
+    assert read_index(index) == ({_digest(LIBRARY)}, set())
+
+    result = runner.invoke(
+        cli, ["hash-index", "update", "--malicious", str(malicious), "--index", index]
+    )
+    assert result.exit_code == 0, result.output
+    assert read_index(index) == ({_digest(LIBRARY)}, {_digest(PAYLOAD)})
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
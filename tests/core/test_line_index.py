@@ -0,0 +1,31 @@
+import pytest
+
+from guarddog.utils.line_index import LineIndex
+
+CONTENT = b"first line\nsecond line\n\nfourth line"
+
+
+@pytest.mark.parametrize(
+    "offset",
+    [0, 5, 10, 11, 22, 23, 24, len(CONTENT) - 1, len(CONTENT)],
+)
+def test_line_number_matches_newline_count(offset):
+    assert LineIndex(CONTENT).line_number(offset) == CONTENT[:offset].count(b"\n") + 1
+
+
+def test_line_boundaries():
+    line_index = LineIndex(CONTENT)
+
+    assert line_index.line_count == 4
+    assert CONTENT[line_index.line_start(1) : line_index.line_end(1)] == b"first line"
+    assert CONTENT[line_index.line_start(3) : line_index.line_end(3)] == b""
+    assert CONTENT[line_index.line_start(4) : line_index.line_end(4)] == b"fourth line"
+    assert line_index.line_start(5) is None
+    assert line_index.line_end(0) is None
+
+
+def test_from_file(tmp_path):
+    file_path = tmp_path / "sample.js"
+    file_path.write_bytes(CONTENT)
+
+    assert LineIndex.from_file(str(file_path)).newlines.tolist() == [10, 22, 23]
@@ -0,0 +1,79 @@
+import json
+
+from guarddog import ecosystems
+from guarddog.analyzer.analyzer import Analyzer
+from guarddog.analyzer.profiling import ScanProfile
+import guarddog.cli
+
+RULES = {"threat-filesystem-read", "capability-process-hooks"}
+
+
+def _write_source(directory):
+    (directory / "index.js").write_text(
+        'fs.readFileSync("/home/user/.aws/credentials");\n'
+        'fs.readFileSync("/home/user/.aws/credentials");\n'
+        "// fs.readFileSync('/etc/passwd');\n"
+    )
+    (directory / "README.md").write_text("nothing to see\n")
+
+
+def test_profile_records_rules_and_files(tmp_path):
+    _write_source(tmp_path)
+    analyzer = Analyzer(ecosystem=ecosystems.ECOSYSTEM.NPM)
+    analyzer.profile_rules = True
+
+    result = analyzer.analyze_sourcecode(str(tmp_path), RULES)
+    profile = result["profile"]
+
+    assert set(profile["rules"]) == RULES
+    rule = profile["rules"]["threat-filesystem-read"]
+    assert rule["files_scanned"] == 1
+    assert rule["bytes_scanned"] == (tmp_path / "index.js").stat().st_size
+    # Duplicates and the commented out match are filtered out of the hits
+    assert rule["raw_instances"] > rule["hits"] == 1
+    assert rule["hits"] == len(result["results"]["threat-filesystem-read"])
+
+    assert list(profile["files"]) == ["index.js"]
+    assert profile["files"]["index.js"]["raw_instances"] == rule["raw_instances"]
+    assert profile["bytes_scanned"] == rule["bytes_scanned"]
+
+
+def test_profile_is_off_by_default(tmp_path):
+    _write_source(tmp_path)
+    analyzer = Analyzer(ecosystem=ecosystems.ECOSYSTEM.NPM)
+
+    assert "profile" not in analyzer.analyze_sourcecode(str(tmp_path), RULES)
+
+
+def test_profile_sorts_slowest_first():
+    profile = ScanProfile(["fast", "slow"])
+    profile.record_rule_match("fast", 10, 0.1)
+    profile.record_rule_match("slow", 10, 2.0)
+    profile.record_file_match("a.js", 10, 0.5)
+    profile.record_file_match("b.js", 20, 1.5)
+
+    report = profile.to_dict()
+
+    assert list(report["rules"]) == ["slow", "fast"]
+    assert list(report["files"]) == ["b.js", "a.js"]
+    assert report["bytes_scanned"] == 30
+    assert report["match_time"] == 2.0
+
+
+def test_json_output_has_a_profile_section(tmp_path, capsys):
+    _write_source(tmp_path)
+
+    guarddog.cli._scan(
+        str(tmp_path),
+        None,
+        ("threat-filesystem-read",),
+        (),
+        "json",
+        False,
+        ecosystems.ECOSYSTEM.NPM,
+        sandbox=False,
+        profile_rules=True,
+    )
+
+    output = json.loads(capsys.readouterr().out)
+    assert output["profile"]["rules"]["threat-filesystem-read"]["hits"] == 1
@@ -2,8 +2,10 @@ from unittest import mock
 
 import pytest
 
+from guarddog.scanners import scanner as scanner_module
 from guarddog.scanners.pypi_project_scanner import PypiRequirementsScanner
 from guarddog.scanners.scanner import (
+    Dependency,
     _build_raw_github_url,
     github_blob_to_raw_url,
 )
@@ -174,3 +176,44 @@ def test_github_blob_to_raw_url_rejects_userinfo():
 def test_github_blob_to_raw_url_rejects_explicit_port():
     with pytest.raises(ValueError, match="port"):
         github_blob_to_raw_url("https://github.com:8443/owner/repo/blob/main/file.zip")
+
+
+def _typosquat_scanner() -> PypiRequirementsScanner:
+    scanner = PypiRequirementsScanner()
+    detector = scanner.package_scanner.analyzer.metadata_detectors["typosquatting"]
+    detector.popular_packages = {"requests", "numpy", "flask"}
+    return scanner
+
+
+def test_screen_typosquats_before_downloading():
+    scanner = _typosquat_scanner()
+    dependencies = [
+        Dependency(name=name, versions=set())
+        for name in ["numpy", "Reqeusts", "reqeusts", "left-pad", "flaks"]
+    ]
+
+    assert scanner.screen_typosquats(dependencies) == {
+        "Reqeusts": ["requests"],
+        "reqeusts": ["requests"],
+        "flaks": ["flask"],
+    }
+    assert scanner.screen_typosquats(dependencies, rules={"shady-links"}) == {}
+
+
+def test_typosquats_are_scanned_first(monkeypatch):
+    scanner = _typosquat_scanner()
+    monkeypatch.setattr(scanner_module, "PARALLELISM", 1)
+    scanned = []
+    monkeypatch.setattr(
+        scanner.package_scanner,
+        "scan_remote",
+        lambda name, version, rules: scanned.append(name) or {},
+    )
+
+    dependencies = [
+        Dependency(name=name, versions=set())
+        for name in ["numpy", "left-pad", "flaks", "django"]
+    ]
+    scanner.scan_dependencies(dependencies)
+
+    assert scanned == ["flaks", "numpy", "left-pad", "django"]
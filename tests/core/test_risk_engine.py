@@ -2,9 +2,12 @@
 Unit tests for the risk engine
 """
 
+import random
+
 import pytest
 
 from guarddog.analyzer.risk_engine import (
+    CapabilityIndex,
     Finding,
     Risk,
     Level,
@@ -43,6 +46,30 @@ class TestValidation:
 class TestRiskFormation:
     """Test risk formation logic"""
 
+    def test_finding_parses_identifies(self):
+        finding = Finding(
+            rule_name="test",
+            file_path="test.py",
+            identifies="threat.network.outbound",
+            severity=Level.HIGH,
+            mitre_tactics=["exfiltration"],
+        )
+        assert (finding.type, finding.category, finding.detail) == (
+            "threat",
+            "network",
+            "outbound",
+        )
+        assert not hasattr(finding, "__dict__")
+
+        general = Finding(
+            rule_name="test",
+            file_path="test.py",
+            identifies="capability.network",
+            severity=Level.LOW,
+            mitre_tactics=[],
+        )
+        assert general.detail is None
+
     def test_can_form_risk_same_category_general(self):
         """General capability matches specific threat"""
         threat = Finding(
@@ -264,6 +291,77 @@ class TestRiskFormation:
         assert risks[0].severity == Level.HIGH  # Same file → no downgrade
         assert risks[0].capability_finding.rule_name == "cap-same"
 
+    def test_cross_category_pairs_with_first_capability(self):
+        findings = [
+            Finding(
+                rule_name="cap-process",
+                file_path="a.py",
+                identifies="capability.process",
+                severity=Level.LOW,
+                mitre_tactics=[],
+            ),
+            Finding(
+                rule_name="cap-filesystem",
+                file_path="malicious.py",
+                identifies="capability.filesystem.read",
+                severity=Level.LOW,
+                mitre_tactics=[],
+            ),
+            Finding(
+                rule_name="threat",
+                file_path="malicious.py",
+                identifies="threat.network.outbound",
+                severity=Level.HIGH,
+                mitre_tactics=["exfiltration"],
+            ),
+        ]
+        risks = form_risks_from_findings(findings)
+        assert len(risks) == 1
+        assert risks[0].severity == Level.LOW  # Downgraded by two levels
+        assert risks[0].capability_finding.rule_name == "cap-process"
+
+    def test_capability_index_matches_ordered_scan(self):
+        """The index picks the capability checking each one in order would"""
+        rng = random.Random(0)
+        identifies = [
+            "network",
+            "network.outbound",
+            "network.inbound",
+            "filesystem",
+            "filesystem.read",
+            "process",
+        ]
+        capabilities = [
+            Finding(
+                rule_name=f"cap-{i}",
+                file_path=f"file{rng.randrange(5)}.py",
+                identifies=f"capability.{rng.choice(identifies)}",
+                severity=Level.LOW,
+                mitre_tactics=[],
+            )
+            for i in range(40)
+        ]
+
+        for i in range(500):
+            threat = Finding(
+                rule_name=f"threat-{i}",
+                file_path=f"file{rng.randrange(6)}.py",
+                identifies=f"threat.{rng.choice(identifies)}",
+                severity=Level.HIGH,
+                mitre_tactics=["exfiltration"],
+            )
+            subset = rng.sample(capabilities, rng.randrange(len(capabilities)))
+
+            same_file = [
+                c
+                for c in subset
+                if can_form_risk(threat, c) and c.file_path == threat.file_path
+            ]
+            compatible = [c for c in subset if can_form_risk(threat, c)]
+            expected = (same_file or compatible or [None])[0]
+
+            assert CapabilityIndex(subset).find_compatible(threat) is expected
+
 
 class TestScoring:
     """Test scoring algorithm"""
@@ -0,0 +1,59 @@
+import logging
+
+import pytest
+
+from guarddog import ecosystems
+from guarddog.analyzer.risk_engine import Level
+from guarddog.analyzer.rule_metadata import (
+    get_metadata_risk_metadata,
+    get_sourcecode_risk_metadata,
+    normalize_risk_metadata,
+)
+
+
+def test_sourcecode_table_is_built_once_and_read_only():
+    table = get_sourcecode_risk_metadata(ecosystems.ECOSYSTEM.PYPI)
+    assert get_sourcecode_risk_metadata(ecosystems.ECOSYSTEM.PYPI) is table
+
+    metadata = table["threat-filesystem-read"]
+    assert metadata.identifies == "threat.filesystem.read"
+    assert isinstance(metadata.severity, Level)
+    assert metadata.max_hits == 5
+
+    with pytest.raises(TypeError):
+        table["threat-filesystem-read"] = metadata
+    with pytest.raises(AttributeError):
+        metadata.severity = Level.LOW
+    # The tactics are shared by every finding of the rule
+    assert isinstance(metadata.mitre_tactics, tuple)
+
+
+def test_metadata_table_parses_tactics():
+    table = get_metadata_risk_metadata(ecosystems.ECOSYSTEM.PYPI)
+    assert table
+    for metadata in table.values():
+        assert all(
+            tactic and tactic == tactic.strip() for tactic in metadata.mitre_tactics
+        )
+
+
+def test_invalid_metadata_is_normalized(caplog):
+    with caplog.at_level(logging.WARNING, logger="guarddog"):
+        metadata = normalize_risk_metadata(
+            "Rule test",
+            "threat.network.outbound",
+            "extreme",
+            ["exfiltration"],
+            None,
+            "low",
+        )
+    assert metadata.severity == Level.MEDIUM
+    assert metadata.specificity == Level.MEDIUM
+    assert metadata.sophistication == Level.LOW
+    assert "Rule test has invalid severity: extreme" in caplog.text
+
+    assert normalize_risk_metadata("Rule test", None, "high", [], None, None) is None
+    assert (
+        normalize_risk_metadata("Rule test", "threat.unknown", "high", [], None, None)
+        is None
+    )
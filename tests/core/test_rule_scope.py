@@ -0,0 +1,94 @@
+import os
+from fnmatch import fnmatch
+
+import pytest
+
+from guarddog.analyzer.file_manifest import FileEntry
+from guarddog.analyzer.rule_scope import RuleScopeIndex
+from guarddog.analyzer.sourcecode import SOURCECODE_RULES, YaraRule
+from guarddog.utils.config import YARA_EXT_EXCLUDE
+
+PATHS = [
+    "setup.py",
+    "pkg/setup.py",
+    "package.json",
+    "lib/package.json",
+    "index.js",
+    "dist/index.js",
+    "node_modules/dep/index.min.js",
+    "types/index.d.ts",
+    "src/main.go",
+    "ext/extconf.rb",
+    "Rakefile",
+    "foo.gemspec",
+    "README.md",
+    "Makefile",
+    "install.sh",
+    "pkg/__init__.pth",
+    "LICENSE",
+    "pkg-1.0.dist-info/METADATA",
+]
+
+
+def _fnmatch_applies(rule, relpath, name):
+    # Reference implementation: fnmatch every comma-separated pattern
+    if rule.path_include:
+        patterns = [p.strip() for p in rule.path_include.split(",")]
+        if not any(fnmatch(relpath, p) for p in patterns):
+            return False
+    elif name.lower().endswith(tuple(YARA_EXT_EXCLUDE)):
+        return False
+    if rule.path_exclude:
+        patterns = [p.strip() for p in rule.path_exclude.split(",")]
+        if any(fnmatch(relpath, p) or fnmatch(name, p) for p in patterns):
+            return False
+    return True
+
+
+@pytest.mark.parametrize("relpath", PATHS)
+def test_index_matches_fnmatch_filters(relpath):
+    rules = {rule.id: rule for rule in SOURCECODE_RULES}
+    name = os.path.basename(relpath)
+    entry = FileEntry(abspath=f"/tmp/{relpath}", relpath=relpath, name=name)
+
+    expected = {
+        rule_id
+        for rule_id, rule in rules.items()
+        if _fnmatch_applies(rule, relpath, name)
+    }
+    assert RuleScopeIndex(rules).rules_for(entry) == expected
+
+
+def test_index_dispatches_files_to_candidate_rules_only():
+    rules = {
+        "js": YaraRule(
+            id="js", file="js.yar", description="", ecosystem=None, path_include="*.js"
+        ),
+        "setup": YaraRule(
+            id="setup",
+            file="setup.yar",
+            description="",
+            ecosystem=None,
+            path_include="setup.py,*/setup.py",
+        ),
+        "nested": YaraRule(
+            id="nested",
+            file="nested.yar",
+            description="",
+            ecosystem=None,
+            path_include="*/scripts/*",
+        ),
+        "any": None,
+    }
+    index = RuleScopeIndex(rules)
+
+    def entry(relpath):
+        return FileEntry(
+            abspath=relpath, relpath=relpath, name=os.path.basename(relpath)
+        )
+
+    assert index.candidates(entry("lib/a.js")) == {"js", "nested", "any"}
+    assert index.candidates(entry("pkg/setup.py")) == {"setup", "nested", "any"}
+    assert index.rules_for(entry("lib/a.js")) == {"js", "any"}
+    assert index.rules_for(entry("pkg/scripts/run")) == {"nested", "any"}
+    assert index.rules_for(entry("README.md")) == set()
@@ -0,0 +1,62 @@
+import json
+
+from guarddog.analyzer import sourcecode
+from guarddog.analyzer.sourcecode import (
+    build_rules_manifest,
+    load_yara_rules,
+    read_rules_manifest,
+    write_rules_manifest,
+)
+
+
+def test_manifest_loads_the_parsed_rules(tmp_path):
+    path = str(tmp_path / "rules-manifest.json")
+    manifest = write_rules_manifest(path)
+
+    assert read_rules_manifest(path) == manifest["rules"]
+    loaded = load_yara_rules(manifest_path=path)
+    parsed = load_yara_rules(manifest_path=None)
+    assert loaded == parsed
+    assert [r.path_include_regex for r in loaded] == [
+        r.path_include_regex for r in parsed
+    ]
+
+
+def test_stale_manifest_entries_are_parsed(tmp_path, monkeypatch):
+    manifest = build_rules_manifest()
+    entry = manifest["rules"]["threat-filesystem-read.yar"]
+    entry["description"] = "outdated"
+    path = tmp_path / "rules-manifest.json"
+    path.write_text(json.dumps(manifest))
+
+    parse_calls = []
+    parse_yara_rule = sourcecode.parse_yara_rule
+
+    def counting_parse(file_name, content):
+        parse_calls.append(file_name)
+        return parse_yara_rule(file_name, content)
+
+    monkeypatch.setattr(sourcecode, "parse_yara_rule", counting_parse)
+
+    # The entry is used as long as the file is unchanged
+    rules = {r.id: r for r in load_yara_rules(manifest_path=str(path))}
+    assert rules["threat-filesystem-read"].description == "outdated"
+    assert parse_calls == []
+
+    entry["sha256"] = "0" * 64
+    path.write_text(json.dumps(manifest))
+    rules = {r.id: r for r in load_yara_rules(manifest_path=str(path))}
+    assert rules["threat-filesystem-read"].description != "outdated"
+    assert parse_calls == ["threat-filesystem-read.yar"]
+
+
+def test_unreadable_manifest_falls_back_to_parsing(tmp_path):
+    path = tmp_path / "rules-manifest.json"
+    path.write_text(json.dumps({"version": 0, "rules": {}}))
+    assert read_rules_manifest(str(path)) == {}
+
+    path.write_text("{")
+    assert read_rules_manifest(str(path)) == {}
+    assert load_yara_rules(manifest_path=str(path)) == load_yara_rules(
+        manifest_path=None
+    )
@@ -9,6 +9,7 @@ from guarddog.sandbox import (
     _get_common_read_paths,
     _path_variants,
 )
+from guarddog.utils.config import CACHE_LOCATION
 
 
 class TestIsAvailable:
@@ -57,6 +58,19 @@ class TestApplySandbox:
         caps = mock_nono.CapabilitySet.return_value
         caps.block_network.assert_called_once()
 
+    @patch("guarddog.sandbox._get_common_read_paths", return_value=["/usr"])
+    def test_caches_are_not_accessible(self, _mock_paths, tmp_path):
+        mock_nono = self._make_mock_nono()
+
+        with patch.dict("sys.modules", {"nono_py": mock_nono}):
+            apply_sandbox(scan_paths=[], writable_paths=[str(tmp_path)])
+
+        caps = mock_nono.CapabilitySet.return_value
+        granted = [c.args[0] for c in caps.allow_path.call_args_list]
+        assert not any(
+            path.startswith(os.path.realpath(CACHE_LOCATION)) for path in granted
+        )
+
     def test_common_read_paths_includes_sys_prefix(self):
         import sys
 
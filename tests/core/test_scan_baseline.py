@@ -0,0 +1,164 @@
+import json
+import os
+
+import pytest
+from click.testing import CliRunner
+
+from guarddog import ecosystems
+from guarddog.analyzer.analyzer import Analyzer
+from guarddog.analyzer.scan_baseline import ScanBaseline
+from guarddog.cli import cli
+
+RULES = {"threat-filesystem-read", "capability-process-hooks"}
+READ_CREDENTIALS = 'fs.readFileSync("/home/user/.aws/credentials");\n'
+
+
+def _write_version(directory, files):
+    directory.mkdir()
+    for name, content in files.items():
+        (directory / name).write_text(content)
+    return str(directory)
+
+
+def _spy_matched_files(analyzer):
+    matched = []
+    match_file = analyzer._match_file
+    analyzer._match_file = lambda rules, entry, *args: matched.append(
+        entry.relpath
+    ) or match_file(rules, entry, *args)
+    return matched
+
+
+@pytest.fixture
+def versions(tmp_path):
+    first = _write_version(
+        tmp_path / "1.0.0",
+        {
+            "index.js": READ_CREDENTIALS,
+            "removed.js": READ_CREDENTIALS,
+            "modified.js": "module.exports = 1;\n",
+        },
+    )
+    second = _write_version(
+        tmp_path / "1.0.1",
+        {
+            "index.js": READ_CREDENTIALS,
+            "modified.js": READ_CREDENTIALS,
+            "added.js": READ_CREDENTIALS,
+        },
+    )
+    return first, second
+
+
+def test_baseline_scan_matches_full_scan(versions):
+    first, second = versions
+    analyzer = Analyzer(ecosystem=ecosystems.ECOSYSTEM.NPM)
+    analyzer.record_manifest = True
+    report = analyzer.analyze_sourcecode(first, RULES)
+    expected = analyzer.analyze_sourcecode(second, RULES)
+
+    matched = _spy_matched_files(analyzer)
+    result = analyzer.analyze_sourcecode(
+        second, RULES, baseline=ScanBaseline.from_report(report)
+    )
+
+    assert result == expected
+    assert sorted(matched) == ["added.js", "modified.js"]
+    locations = [f["location"] for f in result["results"]["threat-filesystem-read"]]
+    assert sorted(locations) == ["added.js:1", "index.js:1", "modified.js:1"]
+
+
+def test_baseline_ignores_versioned_top_directory(tmp_path):
+    # Archives extract to a directory named after the version
+    first = tmp_path / "r1"
+    first.mkdir()
+    _write_version(
+        first / "pkg-1.0", {"a.js": READ_CREDENTIALS, "b.js": "module.exports = 1;\n"}
+    )
+    second = tmp_path / "r2"
+    second.mkdir()
+    _write_version(
+        second / "pkg-1.1", {"a.js": READ_CREDENTIALS, "b.js": READ_CREDENTIALS}
+    )
+    analyzer = Analyzer(ecosystem=ecosystems.ECOSYSTEM.NPM)
+    analyzer.record_manifest = True
+    report = analyzer.analyze_sourcecode(str(first), RULES)
+    assert report["file_manifest"]["root"] == "pkg-1.0"
+    assert set(report["file_manifest"]["files"]) == {"a.js", "b.js"}
+    expected = analyzer.analyze_sourcecode(str(second), RULES)
+
+    matched = _spy_matched_files(analyzer)
+    result = analyzer.analyze_sourcecode(
+        str(second), RULES, baseline=ScanBaseline.from_report(report)
+    )
+
+    assert matched == [os.path.join("pkg-1.1", "b.js")]
+    assert result == expected
+    locations = [f["location"] for f in result["results"]["threat-filesystem-read"]]
+    assert sorted(locations) == [
+        os.path.join("pkg-1.1", "a.js") + ":1",
+        os.path.join("pkg-1.1", "b.js") + ":1",
+    ]
+
+
+def test_baseline_of_other_rules_is_ignored(versions):
+    first, second = versions
+    analyzer = Analyzer(ecosystem=ecosystems.ECOSYSTEM.NPM)
+    analyzer.record_manifest = True
+    report = analyzer.analyze_sourcecode(first, {"threat-filesystem-read"})
+
+    matched = _spy_matched_files(analyzer)
+    analyzer.analyze_sourcecode(
+        second, RULES, baseline=ScanBaseline.from_report(report)
+    )
+
+    assert sorted(matched) == ["added.js", "index.js", "modified.js"]
+
+
+def test_report_without_manifest_is_rejected():
+    with pytest.raises(ValueError):
+        ScanBaseline.from_report({"results": {}})
+
+
+def test_cli_scans_from_previous_report(versions, tmp_path):
+    first, second = versions
+    runner = CliRunner()
+    result = runner.invoke(
+        cli,
+        [
+            "npm",
+            "scan",
+            first,
+            "--rules",
+            "threat-filesystem-read",
+            "--record-manifest",
+            "--output-format",
+            "json",
+        ],
+    )
+    assert result.exit_code == 0, result.output
+    report = json.loads(result.output)
+    assert set(report["file_manifest"]["files"]) == {
+        "index.js",
+        "removed.js",
+        "modified.js",
+    }
+
+    report_path = tmp_path / "1.0.0.json"
+    report_path.write_text(result.output)
+    result = runner.invoke(
+        cli,
+        [
+            "npm",
+            "scan",
+            second,
+            "--rules",
+            "threat-filesystem-read",
+            "--diff-from",
+            str(report_path),
+            "--output-format",
+            "json",
+        ],
+    )
+    assert result.exit_code == 0, result.output
+    assert json.loads(result.output)["issues"] == 3
@@ -1,3 +1,4 @@
+import tarfile
 import tempfile
 import os
 from unittest.mock import mock_open, patch
@@ -5,8 +6,10 @@ from unittest.mock import mock_open, patch
 import pytest
 
 from guarddog import ecosystems
-from guarddog.analyzer.analyzer import Analyzer
+from guarddog.analyzer.analyzer import SNIPPET_MAX_CONTEXT, Analyzer
+from guarddog.analyzer.file_manifest import build_archive_manifest
 from guarddog.ecosystems import LANGUAGE
+from guarddog.utils.archives import safe_extract
 
 pypi_analyzer = Analyzer(ecosystem=ecosystems.ECOSYSTEM.PYPI)
 npm_analyzer = Analyzer(ecosystem=ecosystems.ECOSYSTEM.NPM)
@@ -66,6 +69,93 @@ def test_filesystem_read_path_include_skips_metadata():
         assert source_result["results"].get("threat-filesystem-read")
 
 
+def test_analyze_sourcecode_matches_each_file_once():
+    """
+    The package is walked once and every file in scope of at least one rule is
+    matched a single time against the whole ruleset; out-of-scope files are
+    never read by YARA.
+    """
+    analyzer = Analyzer(ecosystem=ecosystems.ECOSYSTEM.PYPI)
+    compiled_rules = analyzer.get_compiled_rules(analyzer.yara_ruleset)
+    matched_files = []
+
+    class SpyRules:
+        def match(self, filepath, **kwargs):
+            matched_files.append(os.path.basename(filepath))
+            return compiled_rules.match(filepath, **kwargs)
+
+    with tempfile.TemporaryDirectory() as source_dir:
+        _write(source_dir, "client.py", 'open("/home/user/.aws/credentials")\n')
+        _write(source_dir, "index.js", "require('child_process').exec('id')\n")
+        _write(source_dir, "README.md", 'open("/home/user/.aws/credentials")\n')
+
+        with patch.object(analyzer, "get_compiled_rules", return_value=SpyRules()):
+            result = analyzer.analyze_sourcecode(source_dir)
+
+    assert sorted(matched_files) == ["client.py", "index.js"]
+    assert result["results"]["threat-filesystem-read"]
+
+
+def test_analyze_sourcecode_parallel_scan_matches_sequential_scan():
+    sequential = Analyzer(ecosystem=ecosystems.ECOSYSTEM.NPM)
+    parallel = Analyzer(ecosystem=ecosystems.ECOSYSTEM.NPM)
+    parallel.parallel_scan = True
+    parallel.scan_workers = 4
+
+    with tempfile.TemporaryDirectory() as source_dir:
+        for i in range(20):
+            _write(
+                source_dir,
+                f"lib/module_{i}.js",
+                f"const cp = require('child_process');\ncp.exec('curl http://{i}.example.com');\n",
+            )
+        _write(source_dir, "client.py", 'open("/home/user/.aws/credentials")\n')
+
+        assert parallel.analyze_sourcecode(
+            source_dir
+        ) == sequential.analyze_sourcecode(source_dir)
+
+
+def test_analyze_sourcecode_in_memory_archive_matches_extracted_archive(tmp_path):
+    source_dir = tmp_path / "source"
+    _write(
+        str(source_dir),
+        "package/index.js",
+        "const cp = require('child_process');\ncp.exec('curl http://example.com');\n",
+    )
+    _write(str(source_dir), "package/setup.py", 'open("/home/user/.aws/credentials")\n')
+    archive = tmp_path / "package.tar.gz"
+    with tarfile.open(archive, "w:gz") as tar:
+        tar.add(source_dir / "package", arcname="package")
+
+    extract_dir = tmp_path / "extracted"
+    extract_dir.mkdir()
+    safe_extract(str(archive), str(extract_dir))
+
+    extracted = npm_analyzer.analyze_sourcecode(str(extract_dir))
+    in_memory = npm_analyzer.analyze_sourcecode(
+        str(archive), manifest=build_archive_manifest(str(archive))
+    )
+    assert extracted["issues"] > 0
+    assert in_memory == extracted
+
+
+def test_analyze_sourcecode_reports_matches_far_apart_on_a_long_line():
+    # Snippets of matches on a minified line are clipped around each match
+    with tempfile.TemporaryDirectory() as source_dir:
+        size = 4 * SNIPPET_MAX_CONTEXT
+        _write(
+            source_dir,
+            "bundle.js",
+            f"var a='{'x' * size}';fs.readFileSync('/home/user/.aws/credentials');"
+            f"var b='{'y' * size}';fs.readFileSync('/home/user/.aws/credentials');\n",
+        )
+        result = npm_analyzer.analyze_sourcecode(source_dir)
+
+    findings = result["results"]["threat-filesystem-read"]
+    assert len(findings) == 2
+
+
 def test_get_snippet_valid_range():
     analyzer = Analyzer(ecosystem=ecosystems.ECOSYSTEM.PYPI)
     path = "/tmp/sample.py"
@@ -414,3 +504,53 @@ def test_is_match_in_comment_with_byte_offset():
             assert Analyzer.is_match_in_comment(f.name, line_number=3, byte_offset=byte_offset) is True
         finally:
             os.unlink(f.name)
+
+
+def test_helpers_share_a_mapped_file_buffer():
+    """Line numbering, comment checks and snippets give the same answers from a
+    mapped buffer of the file as when they re-read the file themselves."""
+    from guarddog.analyzer.file_manifest import map_file
+    from guarddog.utils.line_index import LineIndex
+
+    analyzer = Analyzer(ecosystem=ecosystems.ECOSYSTEM.NPM)
+    source = (
+        "const x = 1;\n"
+        "/* comment\n"
+        "with os.userInfo()\n"
+        "*/\n"
+        "// os.homedir()\n"
+        "const y = os.userInfo();\n"
+    )
+    with tempfile.TemporaryDirectory() as source_dir:
+        file_path = _write(source_dir, "index.js", source)
+        with map_file(file_path) as content:
+            line_index = LineIndex(content)
+            for needle in ("os.userInfo", "os.homedir", "const y"):
+                offset = source.index(needle)
+                line_number = line_index.line_number(offset)
+                assert line_number == analyzer.get_line_number_from_offset(
+                    file_path, offset
+                )
+                assert Analyzer.is_match_in_comment(
+                    file_path,
+                    line_number=line_number,
+                    byte_offset=offset,
+                    content=content,
+                    line_index=line_index,
+                ) == Analyzer.is_match_in_comment(
+                    file_path, line_number=line_number, byte_offset=offset
+                )
+                assert analyzer.get_lines_around_offset(
+                    file_path, offset, before=1, after=2, content=content
+                ) == analyzer.get_lines_around_offset(
+                    file_path, offset, before=1, after=2
+                )
+
+
+def test_map_file_reads_empty_file():
+    from guarddog.analyzer.file_manifest import map_file
+
+    with tempfile.TemporaryDirectory() as source_dir:
+        file_path = _write(source_dir, "empty.py", "")
+        with map_file(file_path) as content:
+            assert content == b""
@@ -0,0 +1,46 @@
+import os
+import subprocess
+import sys
+
+# Dependencies of the metadata detectors and project scanners, that a scan of a
+# local directory never needs
+HEAVY_MODULES = {
+    "pygit2",
+    "whois",
+    "disposable_email_domains",
+    "semantic_version",
+    "yaml",
+    "guarddog.analyzer.metadata.npm",
+    "guarddog.analyzer.metadata.go",
+    "guarddog.analyzer.metadata.github_action",
+    "guarddog.analyzer.metadata.rubygems",
+}
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+
+
+def imported_modules(*args: str) -> set[str]:
+    """
+    Runs the CLI in a new interpreter and returns the modules it imported
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "guarddog", *args],
+        capture_output=True,
+        text=True,
+        cwd=PROJECT_ROOT,
+    )
+    assert result.returncode == 0, result.stderr
+    return {
+        line.rsplit("|", 1)[1].strip()
+        for line in result.stderr.splitlines()
+        if line.startswith("import time:") and line.count("|") == 2
+    }
+
+
+def test_local_scan_only_imports_what_it_runs(tmp_path):
+    (tmp_path / "setup.py").write_text("print('hello')\n")
+
+    modules = imported_modules("pypi", "scan", str(tmp_path), "--no-sandbox")
+
+    assert "guarddog.analyzer.analyzer" in modules
+    assert not modules & HEAVY_MODULES
@@ -0,0 +1,90 @@
+import os
+
+import yara  # type: ignore
+
+from guarddog import ecosystems
+from guarddog.analyzer import yara_rules
+from guarddog.analyzer.analyzer import Analyzer
+from guarddog.analyzer.finding_cache import FindingCache
+from guarddog.analyzer.metadata import utils as metadata_utils
+from guarddog.analyzer.metadata.domain_cache import DomainCache
+
+
+def test_compile_rules_persists_and_reloads_ruleset(tmp_path, monkeypatch):
+    monkeypatch.setattr(yara_rules, "YARA_RULES_CACHE_LOCATION", str(tmp_path))
+    rule_names = {"threat-filesystem-read", "capability-process-hooks"}
+
+    rules = yara_rules.compile_rules(rule_names)
+    cached = os.listdir(tmp_path)
+    assert cached == [f"{yara_rules.get_ruleset_fingerprint(rule_names)}.yarc"]
+
+    compile_calls = []
+    monkeypatch.setattr(
+        yara, "compile", lambda *args, **kwargs: compile_calls.append(args)
+    )
+    reloaded = yara_rules.compile_rules(rule_names)
+    assert compile_calls == []
+
+    data = b'open("/home/user/.aws/credentials").read()'
+    assert [m.namespace for m in rules.match(data=data)] == [
+        m.namespace for m in reloaded.match(data=data)
+    ]
+
+
+def test_ruleset_fingerprint_depends_on_selection():
+    assert yara_rules.get_ruleset_fingerprint(
+        ["threat-filesystem-read"]
+    ) != yara_rules.get_ruleset_fingerprint(
+        ["threat-filesystem-read", "capability-process-hooks"]
+    )
+
+
+def test_compile_rules_survives_unwritable_cache(tmp_path, monkeypatch):
+    blocker = tmp_path / "not-a-directory"
+    blocker.write_text("")
+    monkeypatch.setattr(yara_rules, "YARA_RULES_CACHE_LOCATION", str(blocker))
+
+    assert yara_rules.compile_rules({"threat-filesystem-read"})
+
+
+def test_analyzer_memoizes_compiled_rules(tmp_path, monkeypatch):
+    monkeypatch.setattr(yara_rules, "YARA_RULES_CACHE_LOCATION", str(tmp_path))
+    analyzer = Analyzer(ecosystem=ecosystems.ECOSYSTEM.PYPI)
+
+    first = analyzer.get_compiled_rules({"threat-filesystem-read"})
+    second = analyzer.get_compiled_rules({"threat-filesystem-read"})
+    assert first is second
+    assert analyzer.get_compiled_rules(analyzer.yara_ruleset) is not first
+
+
+def test_analyzer_loads_caches_before_sandbox(tmp_path, monkeypatch):
+    monkeypatch.setattr(yara_rules, "YARA_RULES_CACHE_LOCATION", str(tmp_path))
+    domain_cache = DomainCache(str(tmp_path / "domains.db"), 3600, 60)
+    monkeypatch.setattr(metadata_utils, "DOMAIN_CACHE", True)
+    monkeypatch.setattr(metadata_utils, "_domain_cache", domain_cache)
+    analyzer = Analyzer(ecosystem=ecosystems.ECOSYSTEM.PYPI)
+    analyzer.finding_cache = FindingCache(str(tmp_path / "findings.db"), 1024)
+
+    analyzer.load_caches({"threat-filesystem-read", "typosquatting"})
+    assert list(analyzer.compiled_rules) == [frozenset({"threat-filesystem-read"})]
+    assert analyzer.finding_cache.read_only
+    assert domain_cache.read_only
+
+
+def test_compile_rules_loads_precompiled_ruleset(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        yara_rules, "YARA_RULES_CACHE_LOCATION", str(tmp_path / "cache")
+    )
+    monkeypatch.setattr(
+        yara_rules, "PRECOMPILED_RULES_LOCATION", str(tmp_path / "compiled")
+    )
+    rule_names = {"threat-filesystem-read"}
+    yara_rules.precompile_rules(rule_names)
+
+    compile_calls = []
+    monkeypatch.setattr(
+        yara, "compile", lambda *args, **kwargs: compile_calls.append(args)
+    )
+    assert yara_rules.compile_rules(rule_names)
+    assert compile_calls == []
+    assert not (tmp_path / "cache").exists()
@@ -1,3 +1,4 @@
+import json
 import os.path
 import tempfile
 
@@ -160,3 +161,31 @@ def test_sarif_output(manifest, ecosystem, local_scan_results, warning_count):
         sarif_data = load_sarif_file(os.path.join(tmp_dirname, "results.sarif"))
         stats_warning = sarif_data.get_report().get_issue_count_for_severity("warning")
         assert stats_warning == warning_count
+
+
+def test_sarif_region_locates_package_on_its_line(tmp_path):
+    requirements = tmp_path / "requirements.txt"
+    requirements.write_text("flask==2.0.0\n  mock2==2.0.0\n")
+    dependency_files = [
+        DependencyFile(
+            file_path=str(requirements),
+            dependencies=[
+                Dependency(
+                    name="mock2",
+                    versions={DependencyVersion(version="2.0.0", location=2)},
+                )
+            ],
+        )
+    ]
+
+    stdout, _ = SarifReporter.render_verify(
+        dependency_files=dependency_files,
+        rule_names=[],
+        scan_results=[npm_local_scan_results[1]],
+        ecosystem=ECOSYSTEM.PYPI,
+    )
+
+    region = json.loads(stdout)["runs"][0]["results"][0]["locations"][0][
+        "physicalLocation"
+    ]["region"]
+    assert region == {"startLine": 2, "endLine": 2, "startColumn": 3, "endColumn": 8}